@@ -13,6 +13,7 @@ from flask_cors import CORS
 
 from config import config
 from routes import register_blueprints
+from utils.query_trace import init_query_tracing
 
 
 def create_app() -> Flask:
@@ -35,7 +36,8 @@ def create_app() -> Flask:
         app,
         resources={r"/api/*": {"origins": allowed_origins}},
         supports_credentials=True,
-        allow_headers=["Content-Type", "Authorization"],
+        allow_headers=["Content-Type", "Authorization", "Idempotency-Key"],
+        expose_headers=["Idempotent-Replayed"],
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     )
 
@@ -78,6 +80,9 @@ def create_app() -> Flask:
             "details": error_msg if is_dev else None
         }), 500
 
+    # Per-request PostgREST call tracing (Server-Timing, round-trip budget)
+    init_query_tracing(app)
+
     # Register all route blueprints
     register_blueprints(app)
 
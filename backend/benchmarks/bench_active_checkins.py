@@ -0,0 +1,94 @@
+"""
+Benchmark: round trips per GET /api/checkin/active.
+
+Seeds the in-memory stand-in database with a church, its groups and an
+increasing number of active check-ins, then reports how many PostgREST
+calls one dashboard refresh costs at each roster size.
+
+Run from the backend directory:
+    python -m benchmarks.bench_active_checkins
+"""
+
+import time
+import uuid
+from datetime import datetime
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+ROSTER_SIZES = [10, 100, 300]
+REQUESTS_PER_SIZE = 20
+GROUP_NAMES = ["Little Angels", "Saints", "Disciples", "Trendsetters"]
+
+
+def seed(client: StandInClient, roster_size: int) -> None:
+    church_id = str(uuid.uuid4())
+    teacher_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("users", [{"user_id": teacher_id, "church_id": church_id, "role": "Teacher", "name": "Teacher"}])
+
+    groups = [
+        {"group_id": str(uuid.uuid4()), "church_id": church_id, "name": name}
+        for name in GROUP_NAMES
+    ]
+    client.seed("groups", groups)
+
+    now = datetime.utcnow().isoformat()
+    for i in range(roster_size):
+        guardian_id = str(uuid.uuid4())
+        child_id = str(uuid.uuid4())
+        client.seed("guardians", [{
+            "guardian_id": guardian_id,
+            "church_id": church_id,
+            "parent_id": f"RS{i + 1:03d}",
+            "name": f"Parent {i + 1}",
+        }])
+        client.seed("children", [{
+            "child_id": child_id,
+            "church_id": church_id,
+            "parent_id": guardian_id,
+            "registration_id": f"RS{i + 1:03d}/01",
+            "name": f"Child {i + 1}",
+            "group_id": groups[i % len(groups)]["group_id"],
+        }])
+        client.seed("check_in_records", [{
+            "record_id": str(uuid.uuid4()),
+            "church_id": church_id,
+            "child_id": child_id,
+            "guardian_id": guardian_id,
+            "teacher_id": teacher_id,
+            "method": "QR",
+            "timestamp_in": now,
+            "timestamp_out": None,
+        }])
+
+
+def run() -> None:
+    print(f"{'roster':>8} {'round trips/request':>20} {'mean ms':>10}")
+    for roster_size in ROSTER_SIZES:
+        client = StandInClient()
+        seed(client, roster_size)
+        supabase_client._client = client
+        supabase_client.invalidate_default_church_id()
+        from app import create_app  # imported late so startup uses the stand-in
+
+        app = create_app()
+        http = app.test_client()
+
+        client.reset_counters()
+        started = time.perf_counter()
+        for _ in range(REQUESTS_PER_SIZE):
+            res = http.get("/api/checkin/active")
+            assert res.status_code == 200, res.get_json()
+            assert len(res.get_json()["data"]) == roster_size
+        elapsed = time.perf_counter() - started
+
+        print(
+            f"{roster_size:>8} "
+            f"{client.round_trips / REQUESTS_PER_SIZE:>20.1f} "
+            f"{elapsed / REQUESTS_PER_SIZE * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
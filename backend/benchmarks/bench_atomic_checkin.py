@@ -0,0 +1,152 @@
+"""
+Benchmark: check-ins written by check_in_child() (one RPC) vs. one query per step.
+
+Against a real Postgres: books --children fixture children into a
+throwaway session for each path, checks every one in through
+POST /api/checkin/scan-qr, and reports request time (p50/p95) and
+PostgREST calls per check-in - once with the migration 007 function and
+once through the child lookup, user lookup, insert and booking update it
+replaces. Then checks both paths left the same rows behind: one record per
+child with the session, booking and teacher on it, and every booking
+flipped to checked_in. The sessions, bookings and records it wrote are
+deleted at the end.
+
+Point SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY at a local stack
+(`supabase start`) with the schema, migrations 001-007 and the
+database/INSERT_PARENTS_CHILDREN.sql fixture loaded, then run from the
+backend directory:
+    python -m benchmarks.bench_atomic_checkin
+    python -m benchmarks.bench_atomic_checkin --children 40
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+_CALLS = re.compile(r'desc="(\d+) PostgREST calls"')
+
+
+def book_session(client, church_id: str, teacher_id: str, child_ids: list[str], label: str) -> tuple[str, list[dict]]:
+    session = client.table("sessions").insert({
+        "church_id": church_id,
+        "teacher_id": teacher_id,
+        "title": f"Atomic check-in benchmark ({label}) {uuid.uuid4().hex[:8]}",
+        "session_date": datetime.utcnow().date().isoformat(),
+    }).execute().data[0]
+    children = client.table("children").select("child_id, parent_id").in_("child_id", child_ids).execute().data
+    bookings = client.table("session_bookings").insert([
+        {"session_id": session["session_id"], "child_id": child["child_id"], "guardian_id": child["parent_id"],
+         "qr_code": uuid.uuid4().hex, "otp_code": f"{i:06d}", "status": "booked"}
+        for i, child in enumerate(children)
+    ]).execute().data
+    return session["session_id"], bookings
+
+
+def check_in_all(http, session_id: str, teacher_id: str, bookings: list[dict]) -> tuple[list[float], list[int]]:
+    times, calls = [], []
+    for booking in bookings:
+        started = time.perf_counter()
+        res = http.post("/api/checkin/scan-qr", json={"qr_code": booking["qr_code"], "session_id": session_id,
+                                                      "teacher_id": teacher_id})
+        times.append((time.perf_counter() - started) * 1000)
+        assert res.status_code == 201, res.get_json()
+        calls.append(int(_CALLS.search(res.headers["Server-Timing"]).group(1)))
+    return times, calls
+
+
+def written_rows(client, session_id: str, teacher_id: str, bookings: list[dict]) -> list[str]:
+    """What is wrong with the rows a path left behind (empty when nothing)."""
+    problems = []
+    records = client.table("check_in_records").select("child_id, booking_id, teacher_id, method") \
+        .eq("session_id", session_id).execute().data
+    by_child = {}
+    for record in records:
+        by_child.setdefault(record["child_id"], []).append(record)
+    states = client.table("session_bookings").select("booking_id, status, checked_in_at") \
+        .eq("session_id", session_id).execute().data
+    state = {row["booking_id"]: row for row in states}
+    for booking in bookings:
+        rows = by_child.get(booking["child_id"], [])
+        if len(rows) != 1:
+            problems.append(f"child {booking['child_id']}: {len(rows)} records")
+        elif (rows[0]["booking_id"], rows[0]["teacher_id"], rows[0]["method"]) != \
+                (booking["booking_id"], teacher_id, "QR"):
+            problems.append(f"child {booking['child_id']}: record {rows[0]}")
+        row = state.get(booking["booking_id"], {})
+        if row.get("status") != "checked_in" or not row.get("checked_in_at"):
+            problems.append(f"booking {booking['booking_id']}: {row.get('status')}")
+    return problems
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--children", type=int, default=20, help="children checked in per path")
+    args = parser.parse_args()
+
+    os.environ["QUERY_TRACE"] = "true"
+    os.environ["QUERY_TRACE_HEADER"] = "true"
+    os.environ["QUERY_ROUND_TRIP_BUDGET"] = "0"
+    # Keep notification writes out of the timings
+    os.environ["NOTIFICATION_WORKERS"] = "0"
+    os.environ["NOTIFICATION_DRAIN_SECONDS"] = "0"
+
+    from supabase_client import get_supabase, get_default_church_id
+    from utils import atomic_checkin
+
+    client = get_supabase()
+    church_id = get_default_church_id()
+    if client is None or church_id is None:
+        print("❌ Supabase not configured - set SUPABASE_URL and a key for a local stack")
+        return 1
+    teachers = client.table("users").select("user_id").eq("church_id", church_id) \
+        .in_("role", ["Admin", "Teacher"]).limit(1).execute().data
+    children = client.table("children").select("child_id").eq("church_id", church_id) \
+        .limit(args.children).execute().data
+    if not teachers or not children:
+        print("❌ No teacher or children in the default church - load the fixture first")
+        return 1
+    teacher_id = teachers[0]["user_id"]
+    child_ids = [child["child_id"] for child in children]
+
+    from app import create_app  # imported late so tracing wraps the client
+
+    http = create_app().test_client()
+    sessions = []
+    failed = False
+    try:
+        print(f"{len(child_ids)} check-ins per path through POST /api/checkin/scan-qr")
+        print(f"{'path':>9} {'p50 ms':>7} {'p95 ms':>7} {'calls':>6}  rows")
+        for label in ("queries", "rpc"):
+            atomic_checkin._missing.clear()
+            if label == "queries":
+                atomic_checkin._missing.set()
+            session_id, bookings = book_session(client, church_id, teacher_id, child_ids, label)
+            sessions.append(session_id)
+            times, calls = check_in_all(http, session_id, teacher_id, bookings)
+            if label == "rpc" and not atomic_checkin.is_available():
+                print("❌ check_in_child() not deployed - run database/migrations/007_atomic_checkin.sql")
+                return 1
+            problems = written_rows(client, session_id, teacher_id, bookings)
+            failed = failed or bool(problems)
+            p95 = statistics.quantiles(times, n=20)[-1] if len(times) > 1 else times[0]
+            print(f"{label:>9} {statistics.median(times):>7.1f} {p95:>7.1f} {statistics.mean(calls):>6.1f}  "
+                  f"{'ok' if not problems else '; '.join(problems[:3])}")
+    finally:
+        for session_id in sessions:
+            client.table("check_in_records").delete().eq("session_id", session_id).execute()
+            client.table("sessions").delete().eq("session_id", session_id).execute()
+
+    if failed:
+        print("❌ a path left missing, duplicate or unflipped rows behind")
+        return 1
+    print("✅ both paths wrote one record per child and flipped every booking")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,83 @@
+"""
+Benchmark: authorizing requests with legacy vs. signed session tokens.
+
+Signs an admin in through /api/auth/login + /api/auth/verify-mfa, then
+calls GET /api/users repeatedly with the signed token and with a legacy
+token_{email}_{timestamp} token (principal cache disabled, so every legacy
+request resolves the user from the database). Also checks that suspending
+the user makes the signed token stop working immediately.
+
+Run from the backend directory:
+    python -m benchmarks.bench_auth_tokens
+"""
+
+import os
+import time
+import uuid
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+REQUESTS = 200
+
+
+def seed(client: StandInClient) -> tuple[str, str]:
+    church_id = str(uuid.uuid4())
+    admin_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("users", [
+        {"user_id": admin_id, "church_id": church_id, "email": "admin@example.com",
+         "role": "SuperAdmin", "name": "Admin", "is_active": True},
+        {"user_id": str(uuid.uuid4()), "church_id": church_id, "email": "teacher@example.com",
+         "role": "Teacher", "name": "Teacher", "is_active": True},
+    ])
+    return church_id, admin_id
+
+
+def sign_in(http, email: str) -> str:
+    login = http.post("/api/auth/login", json={"email": email, "password": "password123"}).get_json()["data"]
+    res = http.post("/api/auth/verify-mfa", json={"code": login["otpCode"], "token": login["token"]})
+    assert res.status_code == 200, res.get_json()
+    return res.get_json()["data"]["token"]
+
+
+def measure(http, client: StandInClient, token: str) -> tuple[float, float]:
+    headers = {"Authorization": f"Bearer {token}"}
+    client.reset_counters()
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        res = http.get("/api/users", headers=headers)
+        assert res.status_code == 200, res.get_json()
+    elapsed = time.perf_counter() - started
+    return client.round_trips / REQUESTS, elapsed / REQUESTS
+
+
+def run() -> None:
+    os.environ["PRINCIPAL_CACHE_TTL"] = "0"
+    os.environ["TOKEN_ALLOW_LEGACY"] = "true"  # off by default; measured for comparison
+    os.environ["CODE_STORE_BACKEND"] = "memory"
+    client = StandInClient()
+    _, admin_id = seed(client)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    http = create_app().test_client()
+    signed = sign_in(http, "admin@example.com")
+    legacy = f"token_admin@example.com_{time.time()}"
+
+    print(f"{'token':>8} {'trips/request':>14} {'ms/request':>11}")
+    for label, token in (("legacy", legacy), ("signed", signed)):
+        trips, seconds = measure(http, client, token)
+        print(f"{label:>8} {trips:>14.2f} {seconds * 1000:>11.2f}")
+
+    # Suspension revokes the signed token without waiting for it to expire
+    client.table("users").update({"is_active": False}).eq("user_id", admin_id).execute()
+    from utils.tokens import revoke_user_tokens
+    revoke_user_tokens(admin_id)
+    res = http.get("/api/users", headers={"Authorization": f"Bearer {signed}"})
+    print(f"after revocation: HTTP {res.status_code}")
+
+
+if __name__ == "__main__":
+    run()
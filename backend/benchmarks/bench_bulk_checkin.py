@@ -0,0 +1,86 @@
+"""
+Benchmark: checking in a classroom one child at a time vs. in bulk.
+
+Seeds a session and a roster, then compares the round trips and latency of
+N calls to POST /api/checkin/manual against one POST /api/checkin/bulk.
+Notifications are queued but never delivered (NOTIFICATION_WORKERS=0), so
+the counts cover only what the teacher waits for.
+
+Run from the backend directory:
+    python -m benchmarks.bench_bulk_checkin
+"""
+
+import os
+import time
+import uuid
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+CLASS_SIZES = [10, 40]
+
+
+def seed(client: StandInClient, class_size: int) -> tuple[str, str, list[str]]:
+    church_id = str(uuid.uuid4())
+    teacher_id = str(uuid.uuid4())
+    session_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("users", [{"user_id": teacher_id, "church_id": church_id, "role": "Teacher", "name": "Teacher"}])
+    client.seed("sessions", [{"session_id": session_id, "church_id": church_id, "title": "Sunday School"}])
+
+    child_ids = []
+    for i in range(class_size):
+        guardian_id = str(uuid.uuid4())
+        child_id = str(uuid.uuid4())
+        client.seed("guardians", [{
+            "guardian_id": guardian_id,
+            "church_id": church_id,
+            "name": f"Parent {i + 1}",
+            "email": f"parent{i + 1}@example.com",
+        }])
+        client.seed("children", [{
+            "child_id": child_id,
+            "church_id": church_id,
+            "parent_id": guardian_id,
+            "name": f"Child {i + 1}",
+        }])
+        child_ids.append(child_id)
+    return teacher_id, session_id, child_ids
+
+
+def measure(class_size: int, bulk: bool) -> tuple[int, float]:
+    client = StandInClient()
+    teacher_id, session_id, child_ids = seed(client, class_size)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    http = create_app().test_client()
+    client.reset_counters()
+    started = time.perf_counter()
+    if bulk:
+        res = http.post("/api/checkin/bulk", json={
+            "session_id": session_id, "teacher_id": teacher_id, "child_ids": child_ids,
+        })
+        assert res.status_code == 200 and res.get_json()["checkedIn"] == class_size, res.get_json()
+    else:
+        for child_id in child_ids:
+            res = http.post("/api/checkin/manual", json={
+                "session_id": session_id, "teacher_id": teacher_id, "child_id": child_id,
+            })
+            assert res.status_code == 201, res.get_json()
+    return client.round_trips, time.perf_counter() - started
+
+
+def run() -> None:
+    os.environ["NOTIFICATION_WORKERS"] = "0"
+    os.environ["NOTIFICATION_DRAIN_SECONDS"] = "0"
+    rows = [(size, *measure(size, False), *measure(size, True)) for size in CLASS_SIZES]
+
+    print(f"{'class':>6} {'manual trips':>13} {'manual ms':>10} {'bulk trips':>11} {'bulk ms':>8}")
+    for size, manual_trips, manual_s, bulk_trips, bulk_s in rows:
+        print(f"{size:>6} {manual_trips:>13} {manual_s * 1000:>10.1f} {bulk_trips:>11} {bulk_s * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    run()
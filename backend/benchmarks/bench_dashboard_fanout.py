@@ -0,0 +1,121 @@
+"""
+Benchmark: concurrent fan-out in the dashboards (utils/fanout.py).
+
+Seeds a family (guardian, two children, a teen account) and a teacher with
+a term of check-ins, with every PostgREST call sleeping --latency-ms. Each
+dashboard is requested repeatedly and the report compares the request time
+with the summed time of its queries (the Server-Timing db duration): run
+one after another the two would be equal, with the independent reads sent
+together the request only waits for the slowest one.
+
+Run from the backend directory:
+    python -m benchmarks.bench_dashboard_fanout
+    python -m benchmarks.bench_dashboard_fanout --latency-ms 40
+    QUERY_FANOUT_THREADS=0 python -m benchmarks.bench_dashboard_fanout   # sequential baseline
+"""
+
+import argparse
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+REQUESTS = 20
+
+_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) PostgREST calls"')
+
+
+def seed(client: StandInClient) -> dict:
+    church_id = str(uuid.uuid4())
+    teacher_id = str(uuid.uuid4())
+    teen_user_id = str(uuid.uuid4())
+    guardian_id = str(uuid.uuid4())
+    group_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("groups", [{"group_id": group_id, "church_id": church_id, "name": "Trendsetters",
+                            "teacher_id": teacher_id}])
+    client.seed("attendance_summary", [
+        {"summary_id": str(uuid.uuid4()), "church_id": church_id, "group_id": group_id,
+         "date": (datetime.utcnow() - timedelta(days=7 * week)).date().isoformat(), "total_attended": 2}
+        for week in range(8)
+    ])
+    client.seed("guardians", [{"guardian_id": guardian_id, "church_id": church_id, "parent_id": "RS001",
+                               "name": "Parent 1", "email": "parent1@example.com"}])
+
+    child_ids = [str(uuid.uuid4()) for _ in range(2)]
+    client.seed("children", [
+        {"child_id": child_id, "church_id": church_id, "parent_id": guardian_id, "group_id": group_id,
+         "name": f"Child {i + 1}", "registration_id": f"RS001/0{i + 1}", "date_of_birth": "2012-05-01"}
+        for i, child_id in enumerate(child_ids)
+    ])
+    client.seed("users", [
+        {"user_id": teacher_id, "church_id": church_id, "role": "Teacher", "name": "Teacher"},
+        {"user_id": teen_user_id, "church_id": church_id, "role": "Teen", "name": "Child 1",
+         "email": "teen@example.com", "linked_child_id": child_ids[0]},
+    ])
+
+    now = datetime.utcnow()
+    client.seed("check_in_records", [
+        {"record_id": str(uuid.uuid4()), "church_id": church_id, "child_id": child_id,
+         "guardian_id": guardian_id, "teacher_id": teacher_id, "group_id": group_id, "method": "QR",
+         "timestamp_in": (now - timedelta(days=7 * week)).isoformat(),
+         "timestamp_out": None if week == 0 else (now - timedelta(days=7 * week, hours=-2)).isoformat()}
+        for week in range(12)
+        for child_id in child_ids
+    ])
+    return {"guardian_id": guardian_id, "teacher_id": teacher_id, "teen_user_id": teen_user_id,
+            "group_id": group_id}
+
+
+def endpoints(world: dict) -> list[tuple[str, str]]:
+    return [
+        ("parent details (uuid)", f"/api/parents/{world['guardian_id']}/details"),
+        ("parent details (RS001)", "/api/parents/RS001/details"),
+        ("teen dashboard", f"/api/teens/dashboard?user_id={world['teen_user_id']}"),
+        ("teacher dashboard", f"/api/teachers/dashboard?teacher_id={world['teacher_id']}"),
+        ("group stats", f"/api/groups/{world['group_id']}/stats"),
+        ("admin analytics", "/api/analytics/admin"),
+    ]
+
+
+def measure(http, path: str) -> tuple[float, float, int]:
+    request_ms = db_ms = trips = 0.0
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        res = http.get(path)
+        request_ms += (time.perf_counter() - started) * 1000
+        assert res.status_code == 200, res.get_json()
+        match = _DB.search(res.headers.get("Server-Timing", ""))
+        db_ms += float(match.group(1))
+        trips += int(match.group(2))
+    return request_ms / REQUESTS, db_ms / REQUESTS, trips / REQUESTS
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated network time per PostgREST call")
+    args = parser.parse_args()
+
+    os.environ["QUERY_TRACE"] = "true"
+    os.environ["QUERY_TRACE_HEADER"] = "true"
+    os.environ["QUERY_ROUND_TRIP_BUDGET"] = "0"
+    client = StandInClient(latency_ms=args.latency_ms)
+    world = seed(client)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    http = create_app().test_client()
+    print(f"{args.latency_ms:g} ms per PostgREST call")
+    print(f"{'endpoint':>24} {'trips':>6} {'db ms':>7} {'request ms':>11}")
+    for label, path in endpoints(world):
+        request_ms, db_ms, trips = measure(http, path)
+        print(f"{label:>24} {trips:>6.1f} {db_ms:>7.1f} {request_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    run()
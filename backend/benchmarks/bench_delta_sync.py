@@ -0,0 +1,146 @@
+"""
+Benchmark: full vs. ?since=<cursor> refreshes of the tablet lists.
+
+Seeds a session with --children booked and checked-in children, then
+refreshes GET /api/checkin/active and GET /api/sessions/<id>/bookings the
+way tablets do: one full load, then a refresh after a handful of changes
+(walk-in check-ins, check-outs, a cancelled and a new booking, a deleted
+record). Reports response bytes and PostgREST calls of a full reload vs.
+the delta, and checks that applying the delta to the first list gives the
+same list as a full reload.
+
+Run from the backend directory:
+    python -m benchmarks.bench_delta_sync
+    python -m benchmarks.bench_delta_sync --children 500
+"""
+
+import argparse
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+_CALLS = re.compile(r'desc="(\d+) PostgREST calls"')
+
+
+def seed(client: StandInClient, children: int) -> dict:
+    church_id = str(uuid.uuid4())
+    teacher_id = str(uuid.uuid4())
+    group_id = str(uuid.uuid4())
+    session_id = str(uuid.uuid4())
+    # Loaded a while before the first refresh, outside the cursor overlap
+    now = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("users", [{"user_id": teacher_id, "church_id": church_id, "role": "Teacher", "name": "Teacher"}])
+    client.seed("groups", [{"group_id": group_id, "church_id": church_id, "name": "Saints"}])
+    client.seed("sessions", [{
+        "session_id": session_id, "church_id": church_id, "group_id": group_id,
+        "title": "Sunday School", "session_date": datetime.utcnow().date().isoformat(),
+    }])
+    child_ids = []
+    for i in range(children + 5):
+        guardian_id = str(uuid.uuid4())
+        child_ids.append(str(uuid.uuid4()))
+        client.seed("guardians", [{
+            "guardian_id": guardian_id, "church_id": church_id, "parent_id": f"RS{i + 1:03d}",
+            "name": f"Parent {i + 1}", "email": f"parent{i + 1}@example.com", "phone": "+254700000000",
+        }])
+        client.seed("children", [{
+            "child_id": child_ids[-1], "church_id": church_id, "parent_id": guardian_id,
+            "group_id": group_id, "name": f"Child {i + 1}", "registration_id": f"RS{i + 1:03d}/01",
+        }])
+        if i >= children:
+            continue  # walk-ins
+        client.seed("session_bookings", [{
+            "booking_id": str(uuid.uuid4()), "session_id": session_id, "child_id": child_ids[-1],
+            "guardian_id": guardian_id, "qr_code": uuid.uuid4().hex * 2, "otp_code": "123456",
+            "status": "checked_in", "booked_at": now, "checked_in_at": now, "updated_at": now,
+        }])
+        client.seed("check_in_records", [{
+            "record_id": str(uuid.uuid4()), "church_id": church_id, "child_id": child_ids[-1],
+            "guardian_id": guardian_id, "teacher_id": teacher_id, "session_id": session_id,
+            "method": "QR", "timestamp_in": now, "updated_at": now,
+        }])
+    return {"teacher_id": teacher_id, "session_id": session_id, "child_ids": child_ids}
+
+
+def fetch(http, path: str) -> tuple[dict, int, int]:
+    res = http.get(path)
+    assert res.status_code == 200, res.get_json()
+    return res.get_json(), len(res.data), int(_CALLS.search(res.headers["Server-Timing"]).group(1))
+
+
+def apply(rows: dict, body: dict, key: str) -> dict:
+    """What a tablet does with a refresh: replace, or upsert and drop."""
+    if body["full"]:
+        rows = {}
+    rows = dict(rows)
+    for row in body["data"]:
+        rows[row[key]] = row
+    for row_id in body["removed"]:
+        rows.pop(row_id, None)
+    return rows
+
+
+def make_changes(client: StandInClient, http, world: dict, children: int) -> None:
+    child_ids = world["child_ids"]
+    for child_id in child_ids[children:children + 3]:
+        res = http.post("/api/checkin/manual", json={"child_id": child_id, "teacher_id": world["teacher_id"]})
+        assert res.status_code == 201, res.get_json()
+    records = client.table("check_in_records").select("record_id, child_id").execute().data
+    by_child = {row["child_id"]: row["record_id"] for row in records}
+    for child_id in child_ids[:4]:
+        client.table("check_in_records").update({"timestamp_out": datetime.utcnow().isoformat()}) \
+            .eq("record_id", by_child[child_id]).execute()
+    client.table("check_in_records").delete().eq("record_id", by_child[child_ids[4]]).execute()
+
+    bookings = client.table("session_bookings").select("booking_id, child_id").execute().data
+    cancelled = next(row["booking_id"] for row in bookings if row["child_id"] == child_ids[5])
+    assert http.delete(f"/api/bookings/{cancelled}").status_code == 200
+    res = http.post(f"/api/sessions/{world['session_id']}/book", json={"child_id": child_ids[-1]})
+    assert res.status_code == 201, res.get_json()
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--children", type=int, default=200, help="children booked and checked in")
+    args = parser.parse_args()
+
+    os.environ["CODE_STORE_BACKEND"] = "memory"
+    os.environ["QUERY_TRACE"] = "true"
+    os.environ["QUERY_TRACE_HEADER"] = "true"
+    os.environ["QUERY_ROUND_TRIP_BUDGET"] = "0"
+    os.environ["NOTIFICATION_WORKERS"] = "0"
+    os.environ["NOTIFICATION_DRAIN_SECONDS"] = "0"
+    client = StandInClient()
+    world = seed(client, args.children)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    http = create_app().test_client()
+    lists = [
+        ("active check-ins", "/api/checkin/active", "recordId"),
+        ("session bookings", f"/api/sessions/{world['session_id']}/bookings", "id"),
+    ]
+    first = {path: fetch(http, path)[0] for _, path, _ in lists}
+    make_changes(client, http, world, args.children)
+
+    print(f"{args.children} children, 3 walk-ins, 4 check-outs, 1 deleted record, 1 cancelled and 1 new booking")
+    print(f"{'list':>18} {'full bytes':>11} {'delta bytes':>12} {'full trips':>11} {'delta trips':>12} {'rows':>8}")
+    for label, path, key in lists:
+        full, full_bytes, full_trips = fetch(http, path)
+        delta, delta_bytes, delta_trips = fetch(http, f"{path}?since={first[path]['cursor']}")
+        assert not delta["full"], delta
+        expected = apply({}, full, key)
+        assert apply(apply({}, first[path], key), delta, key) == expected, label
+        rows = f"{len(delta['data'])}+{len(delta['removed'])}"
+        print(f"{label:>18} {full_bytes:>11} {delta_bytes:>12} {full_trips:>11} {delta_trips:>12} {rows:>8}")
+    print("delta applied to the first load matches a full reload")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,126 @@
+"""
+Benchmark: retried check-ins and bookings with and without Idempotency-Key.
+
+Seeds a class, then plays the tablet that times out and sends the same
+request again: POST /api/checkin/manual and POST /api/sessions/<id>/book,
+each sent --retries extra times, first without and then with an
+Idempotency-Key header (utils/idempotency.py). Reports PostgREST calls per
+retry, time per retry and the check-in records left behind. Then sends one
+request and its retry at the same moment (the retry waits for the original
+and replays it), and reuses a key for a different child (422).
+
+Run from the backend directory:
+    python -m benchmarks.bench_idempotency
+"""
+
+import argparse
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+
+def seed(client: StandInClient, children: int) -> dict:
+    church_id = str(uuid.uuid4())
+    teacher_id = str(uuid.uuid4())
+    group_id = str(uuid.uuid4())
+    session_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("users", [{"user_id": teacher_id, "church_id": church_id, "role": "Teacher", "name": "Teacher"}])
+    client.seed("groups", [{"group_id": group_id, "church_id": church_id, "name": "Saints"}])
+    client.seed("sessions", [{"session_id": session_id, "church_id": church_id, "group_id": group_id,
+                              "title": "Sunday School", "session_date": datetime.utcnow().date().isoformat()}])
+    child_ids = [str(uuid.uuid4()) for _ in range(children)]
+    guardian_ids = [str(uuid.uuid4()) for _ in range(children)]
+    client.seed("guardians", [
+        {"guardian_id": guardian_id, "church_id": church_id, "name": f"Parent {i + 1}"}
+        for i, guardian_id in enumerate(guardian_ids)
+    ])
+    client.seed("children", [
+        {"child_id": child_id, "church_id": church_id, "group_id": group_id, "parent_id": guardian_id,
+         "name": f"Child {i + 1}"}
+        for i, (child_id, guardian_id) in enumerate(zip(child_ids, guardian_ids))
+    ])
+    return {"teacher_id": teacher_id, "session_id": session_id, "child_ids": child_ids}
+
+
+def records_for(client: StandInClient, child_id: str) -> int:
+    return len(client.tables["check_in_records"].lookup("child_id", [child_id]))
+
+
+def retry(client: StandInClient, http, path: str, body: dict, retries: int, key: str | None):
+    headers = {"Idempotency-Key": key} if key else {}
+    first = http.post(path, json=body, headers=headers)
+    client.reset_counters()
+    started = time.perf_counter()
+    statuses = set()
+    for _ in range(retries):
+        res = http.post(path, json=body, headers=headers)
+        statuses.add((res.status_code, res.headers.get("Idempotent-Replayed") == "true"))
+    elapsed = (time.perf_counter() - started) * 1000 / retries
+    return first, client.round_trips / retries, elapsed, statuses
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--retries", type=int, default=5, help="extra sends of each request")
+    parser.add_argument("--latency-ms", type=float, default=5, help="simulated network time per PostgREST call")
+    args = parser.parse_args()
+
+    os.environ["CODE_STORE_BACKEND"] = "memory"
+    os.environ["NOTIFICATION_WORKERS"] = "0"
+    os.environ["NOTIFICATION_DRAIN_SECONDS"] = "0"
+    client = StandInClient(latency_ms=args.latency_ms)
+    world = seed(client, 8)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    http = create_app().test_client()
+    children = iter(world["child_ids"])
+    print(f"{args.retries} retries per request, {args.latency_ms:g} ms per PostgREST call")
+    print(f"{'request':>22} {'key':>4} {'trips/retry':>12} {'ms/retry':>9} {'records':>8}  retry responses")
+    for label, key in (("no", None), ("yes", uuid.uuid4().hex)):
+        child_id = next(children)
+        body = {"child_id": child_id, "teacher_id": world["teacher_id"], "session_id": world["session_id"]}
+        first, trips, ms, statuses = retry(client, http, "/api/checkin/manual", body, args.retries, key)
+        assert first.status_code == 201, first.get_json()
+        print(f"{'POST /checkin/manual':>22} {label:>4} {trips:>12.1f} {ms:>9.1f} {records_for(client, child_id):>8}"
+              f"  {sorted(statuses)}")
+
+        child_id = next(children)
+        path = f"/api/sessions/{world['session_id']}/book"
+        first, trips, ms, statuses = retry(client, http, path, {"child_id": child_id}, args.retries, key and key + "-b")
+        assert first.status_code == 201, first.get_json()
+        print(f"{'POST /sessions/<id>/book':>22} {label:>4} {trips:>12.1f} {ms:>9.1f} {'-':>8}  {sorted(statuses)}")
+
+    # The retry arrives while the original is still running
+    child_id = next(children)
+    key = uuid.uuid4().hex
+    body = {"child_id": child_id, "teacher_id": world["teacher_id"]}
+    responses = []
+
+    def send():
+        res = create_app().test_client().post("/api/checkin/manual", json=body, headers={"Idempotency-Key": key})
+        responses.append((res.status_code, res.headers.get("Idempotent-Replayed") == "true", res.get_json()))
+
+    threads = [threading.Thread(target=send) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    same = responses[0][2] == responses[1][2]
+    print(f"concurrent retry: {sorted((s, r) for s, r, _ in responses)}, same body {same}, "
+          f"records {records_for(client, child_id)}")
+
+    reused = http.post("/api/checkin/manual", json=dict(body, child_id=next(children)),
+                       headers={"Idempotency-Key": key})
+    print(f"key reused for another child: {reused.status_code} {reused.get_json()['error']}")
+
+
+if __name__ == "__main__":
+    run()
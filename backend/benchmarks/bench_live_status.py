@@ -0,0 +1,159 @@
+"""
+Benchmark: live check-in status over Server-Sent Events vs. polling.
+
+Seeds a class of children, then compares what N parent phones cost while
+nothing happens and how quickly they learn about a check-in:
+
+- polling: each phone calls GET /api/checkin/status/<child_id> every
+  --poll-seconds
+- streaming: each phone holds GET /api/checkin/stream?child_id=... open
+
+After the idle window every child is checked in (POST /api/checkin/manual)
+and the streams report how long after the request was sent the checked_in
+event arrived.
+
+The process is patched by gevent the way gunicorn's gevent worker patches
+it (Procfile), so phones are greenlets and the stream cap is the production
+default; streams refused with 503 are counted.
+
+Run from the backend directory:
+    python -m benchmarks.bench_live_status
+    python -m benchmarks.bench_live_status --phones 900 --idle-seconds 5
+"""
+
+from gevent import monkey
+
+# Patched before anything else is imported, as gunicorn's gevent worker does
+monkey.patch_all()
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+
+def seed(client: StandInClient, phones: int) -> dict:
+    church_id = str(uuid.uuid4())
+    teacher_id = str(uuid.uuid4())
+    group_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("users", [{"user_id": teacher_id, "church_id": church_id, "role": "Teacher", "name": "Teacher"}])
+    client.seed("groups", [{"group_id": group_id, "church_id": church_id, "name": "Saints"}])
+    child_ids = [str(uuid.uuid4()) for _ in range(phones)]
+    guardian_ids = [str(uuid.uuid4()) for _ in range(phones)]
+    client.seed("guardians", [
+        {"guardian_id": guardian_id, "church_id": church_id, "name": f"Parent {i + 1}"}
+        for i, guardian_id in enumerate(guardian_ids)
+    ])
+    client.seed("children", [
+        {"child_id": child_id, "church_id": church_id, "group_id": group_id, "parent_id": guardian_id,
+         "name": f"Child {i + 1}"}
+        for i, (child_id, guardian_id) in enumerate(zip(child_ids, guardian_ids))
+    ])
+    return {"teacher_id": teacher_id, "child_ids": child_ids}
+
+
+def poll(app, child_ids: list[str], idle_seconds: float, every: float) -> int:
+    stop = time.monotonic() + idle_seconds
+
+    def phone(child_id: str) -> int:
+        http = app.test_client()
+        sent = 0
+        while time.monotonic() < stop:
+            assert http.get(f"/api/checkin/status/{child_id}").status_code == 200
+            sent += 1
+            time.sleep(every)
+        return sent
+
+    with ThreadPoolExecutor(len(child_ids)) as pool:
+        return sum(pool.map(phone, child_ids))
+
+
+def stream(app, child_id: str, opened: threading.Barrier, received: dict, refused: list) -> None:
+    res = app.test_client().get(f"/api/checkin/stream?child_id={child_id}", buffered=False)
+    if res.status_code == 503:
+        # Over the cap: this phone keeps polling
+        refused.append(child_id)
+        res.close()
+        opened.wait()
+        return
+    assert res.status_code == 200, res.status_code
+    opened.wait()
+    event = None
+    try:
+        for chunk in res.response:
+            text = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if text.startswith("event: status"):
+                continue
+            if "event: checked_in" in text:
+                event = json.loads(text.split("data: ", 1)[1])
+                received[child_id] = time.perf_counter()
+                break
+    finally:
+        res.close()
+    assert event and event["childId"] == child_id
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--phones", type=int, default=300, help="parents watching their child's status")
+    parser.add_argument("--idle-seconds", type=float, default=3, help="time before the check-ins start")
+    parser.add_argument("--poll-seconds", type=float, default=1, help="polling interval per phone")
+    parser.add_argument("--latency-ms", type=float, default=5, help="simulated network time per PostgREST call")
+    args = parser.parse_args()
+
+    os.environ["CODE_STORE_BACKEND"] = "memory"
+    os.environ["NOTIFICATION_WORKERS"] = "0"
+    os.environ["NOTIFICATION_DRAIN_SECONDS"] = "0"
+    os.environ["LIVE_STATUS_HEARTBEAT"] = "1"
+    client = StandInClient(latency_ms=args.latency_ms)
+    world = seed(client, args.phones)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    from utils.live_status import get_status_broker
+
+    app = create_app()
+    child_ids = world["child_ids"]
+    print(f"{args.phones} phones, {args.idle_seconds:g} s idle, {args.latency_ms:g} ms per PostgREST call")
+
+    client.reset_counters()
+    polls = poll(app, child_ids, args.idle_seconds, args.poll_seconds)
+    print(f"polling every {args.poll_seconds:g} s: {polls} requests, {client.round_trips} PostgREST calls while idle")
+
+    opened = threading.Barrier(len(child_ids) + 1)
+    received: dict[str, float] = {}
+    refused: list[str] = []
+    threads = [threading.Thread(target=stream, args=(app, c, opened, received, refused)) for c in child_ids]
+    for thread in threads:
+        thread.start()
+    opened.wait()
+    client.reset_counters()
+    time.sleep(args.idle_seconds)
+    stats = get_status_broker().stats()
+    print(f"streaming: {stats['openStreams']} open streams (cap {stats['maxStreams']}), {len(refused)} refused, "
+          f"{client.round_trips} PostgREST calls while idle")
+
+    http = app.test_client()
+    sent: dict[str, float] = {}
+    for child_id in child_ids:
+        sent[child_id] = time.perf_counter()
+        res = http.post("/api/checkin/manual", json={"child_id": child_id, "teacher_id": world["teacher_id"]})
+        assert res.status_code == 201, res.get_json()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    lags = sorted((received[c] - sent[c]) * 1000 for c in child_ids if c in received)
+    print(f"check-in events delivered: {len(lags)}/{len(child_ids) - len(refused)}, "
+          f"lag p50 {lags[len(lags) // 2]:.1f} ms, max {lags[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    run()
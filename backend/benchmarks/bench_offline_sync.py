@@ -0,0 +1,182 @@
+"""
+Benchmark: offline kiosk sync (routes/sync.py) vs. scanning online.
+
+Seeds a session with --children bookings and a few walk-ins, downloads the
+kiosk snapshot, then replays a morning queued offline: a QR check-in per
+booking (codes taken from the snapshot), manual walk-ins, some check-outs,
+one wrong code, one unknown child and one child checked in online while the
+kiosk was offline. The queue is uploaded in one batch and again (a retry
+after a timeout), and compared with sending the same check-ins one at a
+time to /api/checkin/scan-qr. Every PostgREST call sleeps --latency-ms.
+
+The stand-in runs apply_offline_sync() (migration 008) as a Python copy of
+the SQL function; --without-rpc leaves it out, so the upload falls back to
+one guarded update per kiosk timestamp.
+
+Run from the backend directory:
+    python -m benchmarks.bench_offline_sync
+    python -m benchmarks.bench_offline_sync --children 300 --latency-ms 20
+    python -m benchmarks.bench_offline_sync --without-rpc
+"""
+
+import argparse
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+from routes.sync import BOOKING_TRANSITIONS
+
+WALK_INS = 10
+
+
+def apply_offline_sync(client: StandInClient, p_church_id: str, p_closes: list, p_bookings: list) -> dict:
+    """database/migrations/008_offline_sync_writes.sql on the stand-in tables."""
+    records = client.get_table("check_in_records")
+    closed = []
+    for close in p_closes:
+        for row in records.lookup("record_id", [close["record_id"]]):
+            if row.get("church_id") == p_church_id and row.get("timestamp_out") is None:
+                records.update(row, {"timestamp_out": close["timestamp_out"]})
+                closed.append(row["record_id"])
+    bookings = client.get_table("session_bookings")
+    sessions = client.get_table("sessions")
+    moved = []
+    for change in p_bookings:
+        for row in bookings.lookup("booking_id", [change["booking_id"]]):
+            session = sessions.lookup("session_id", [row.get("session_id")])
+            if not session or session[0].get("church_id") != p_church_id:
+                continue
+            if row.get("status") not in BOOKING_TRANSITIONS.get(change["status"], []):
+                continue
+            bookings.update(row, {k: v for k, v in change.items() if k != "booking_id" and v is not None})
+            moved.append(row["booking_id"])
+    return {"closed": closed, "bookings": moved}
+
+
+def seed(client: StandInClient, children: int) -> dict:
+    church_id = str(uuid.uuid4())
+    teacher_id = str(uuid.uuid4())
+    group_id = str(uuid.uuid4())
+    session_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("users", [{"user_id": teacher_id, "church_id": church_id, "role": "Teacher", "name": "Teacher"}])
+    client.seed("groups", [{"group_id": group_id, "church_id": church_id, "name": "Saints"}])
+    client.seed("sessions", [
+        {"session_id": session_id, "church_id": church_id, "group_id": group_id,
+         "title": title, "session_date": datetime.utcnow().date().isoformat()}
+        for session_id, title in zip(session_ids, ("First Service", "Second Service"))
+    ])
+    child_ids = []
+    for i in range(children + WALK_INS):
+        guardian_id = str(uuid.uuid4())
+        child_ids.append(str(uuid.uuid4()))
+        client.seed("guardians", [{"guardian_id": guardian_id, "church_id": church_id,
+                                   "parent_id": f"RS{i + 1:03d}", "name": f"Parent {i + 1}"}])
+        client.seed("children", [{
+            "child_id": child_ids[-1], "church_id": church_id, "parent_id": guardian_id,
+            "group_id": group_id, "name": f"Child {i + 1}", "registration_id": f"RS{i + 1:03d}/01",
+        }])
+        if i < children:
+            client.seed("session_bookings", [
+                {"booking_id": str(uuid.uuid4()), "session_id": session_id, "child_id": child_ids[-1],
+                 "guardian_id": guardian_id, "qr_code": uuid.uuid4().hex, "otp_code": f"{i:06d}",
+                 "status": "booked"}
+                for session_id in session_ids
+            ])
+    return {"teacher_id": teacher_id, "session_ids": session_ids, "child_ids": child_ids}
+
+
+def queue(snapshot: dict, child_ids: list[str], children: int) -> list[dict]:
+    """The kiosk's offline queue, in the order it recorded it."""
+    start = datetime.utcnow() - timedelta(hours=1)
+    events = []
+    for i, booking in enumerate(snapshot["bookings"]):
+        events.append({"key": uuid.uuid4().hex, "type": "check_in", "child_id": booking["childId"],
+                       "method": "QR", "code": booking["qrCode"],
+                       "at": (start + timedelta(seconds=5 * i)).isoformat()})
+    for i, child_id in enumerate(child_ids[children:]):
+        events.append({"key": uuid.uuid4().hex, "type": "check_in", "child_id": child_id, "method": "PARENT_ID",
+                       "at": (start + timedelta(minutes=20, seconds=i)).isoformat()})
+    for child_id in child_ids[:5]:
+        events.append({"key": uuid.uuid4().hex, "type": "check_out", "child_id": child_id,
+                       "at": (start + timedelta(minutes=50)).isoformat()})
+    events.append({"key": uuid.uuid4().hex, "type": "check_in", "child_id": child_ids[5], "method": "QR",
+                   "code": "not-the-code", "at": (start + timedelta(minutes=30)).isoformat()})
+    events.append({"key": uuid.uuid4().hex, "type": "check_in", "child_id": str(uuid.uuid4()),
+                   "at": (start + timedelta(minutes=30)).isoformat()})
+    return events
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--children", type=int, default=120, help="children booked for the session")
+    parser.add_argument("--latency-ms", type=float, default=5, help="simulated network time per PostgREST call")
+    parser.add_argument("--without-rpc", action="store_true", help="run as if migration 008 was not applied")
+    args = parser.parse_args()
+
+    os.environ["CODE_STORE_BACKEND"] = "memory"
+    os.environ["NOTIFICATION_WORKERS"] = "0"
+    os.environ["NOTIFICATION_DRAIN_SECONDS"] = "0"
+    client = StandInClient(latency_ms=args.latency_ms)
+    world = seed(client, args.children)
+    if not args.without_rpc:
+        client.register_rpc("apply_offline_sync", apply_offline_sync)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    http = create_app().test_client()
+    offline_session, online_session = world["session_ids"]
+    print(f"{args.children} bookings + {WALK_INS} walk-ins, {args.latency_ms:g} ms per PostgREST call")
+
+    client.reset_counters()
+    res = http.get(f"/api/sync/sessions/{offline_session}/snapshot")
+    assert res.status_code == 200, res.get_json()
+    snapshot = res.get_json()["data"]
+    print(f"snapshot: {len(snapshot['children'])} children, {len(snapshot['bookings'])} bookings, "
+          f"{len(res.data)} bytes, {client.round_trips} PostgREST calls")
+
+    events = queue(snapshot, world["child_ids"], args.children)
+    # Checked in on another tablet while the kiosk was offline
+    online = http.post("/api/checkin/manual", json={"child_id": world["child_ids"][6],
+                                                   "teacher_id": world["teacher_id"]})
+    assert online.status_code == 201, online.get_json()
+
+    body = {"teacher_id": world["teacher_id"], "events": events}
+    for label in ("upload", "retry"):
+        client.reset_counters()
+        started = time.perf_counter()
+        res = http.post(f"/api/sync/sessions/{offline_session}/upload", json=body)
+        elapsed = (time.perf_counter() - started) * 1000
+        assert res.status_code == 200, res.get_json()
+        out = res.get_json()
+        print(f"{label:>8}: {len(events)} events in {elapsed:.0f} ms, {client.round_trips} PostgREST calls, "
+              f"applied {out['applied']}, duplicates {out['duplicates']}, rejected {out['rejected']}, "
+              f"replayed {out['replayed']}")
+    errors = sorted({r["error"] for r in out["data"] if r.get("error")})
+    print(f"          errors: {'; '.join(errors)}")
+
+    active = http.get("/api/checkin/active").get_json()["data"]
+    offline_active = [r for r in active if r["sessionId"] == offline_session]
+    # Less the five checked out, and the child checked in online (no session)
+    expected = args.children + WALK_INS - 5 - 1
+    print(f"checked in after sync: {len(offline_active)} (expected {expected})")
+
+    # The same check-ins sent one at a time while online
+    res = http.get(f"/api/sync/sessions/{online_session}/snapshot")
+    bookings = res.get_json()["data"]["bookings"]
+    client.reset_counters()
+    started = time.perf_counter()
+    for booking in bookings:
+        scan = http.post("/api/checkin/scan-qr", json={"qr_code": booking["qrCode"], "session_id": online_session,
+                                                      "teacher_id": world["teacher_id"]})
+        assert scan.status_code in (201, 400), scan.get_json()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"  online: {len(bookings)} scan-qr requests in {elapsed:.0f} ms, {client.round_trips} PostgREST calls")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,105 @@
+"""
+Benchmark: eligible-children polling with the roster cache.
+
+Seeds a session for one group with a few hundred children, then polls
+GET /api/sessions/<id>/eligible-children the way teacher tablets do, with
+the roster cache disabled (ROSTER_CACHE_TTL=0) and enabled. Every
+PostgREST call sleeps --latency-ms. Afterwards a child and then the session
+are moved to another group, checking that the next poll reflects each
+change.
+
+Run from the backend directory:
+    python -m benchmarks.bench_roster_cache
+"""
+
+import argparse
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+POLLS = 100
+
+_CALLS = re.compile(r'desc="(\d+) PostgREST calls"')
+
+
+def seed(client: StandInClient, children: int) -> dict:
+    church_id = str(uuid.uuid4())
+    groups = [{"group_id": str(uuid.uuid4()), "church_id": church_id, "name": name}
+              for name in ("Saints", "Disciples")]
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("groups", groups)
+    session_id = str(uuid.uuid4())
+    client.seed("sessions", [{
+        "session_id": session_id, "church_id": church_id, "group_id": groups[0]["group_id"],
+        "title": "Sunday School", "session_date": datetime.utcnow().date().isoformat(),
+    }])
+    child_ids = []
+    for i in range(children):
+        guardian_id = str(uuid.uuid4())
+        child_ids.append(str(uuid.uuid4()))
+        client.seed("guardians", [{"guardian_id": guardian_id, "church_id": church_id,
+                                   "parent_id": f"RS{i + 1:03d}", "name": f"Parent {i + 1}"}])
+        client.seed("children", [{
+            "child_id": child_ids[-1], "church_id": church_id, "parent_id": guardian_id,
+            "group_id": groups[0]["group_id"], "name": f"Child {i + 1}",
+            "registration_id": f"RS{i + 1:03d}/01",
+        }])
+    return {"session_id": session_id, "child_ids": child_ids, "other_group": groups[1]["group_id"]}
+
+
+def poll(http, session_id: str, polls: int) -> tuple[float, float, int]:
+    trips = 0
+    size = 0
+    started = time.perf_counter()
+    for _ in range(polls):
+        res = http.get(f"/api/sessions/{session_id}/eligible-children")
+        assert res.status_code == 200, res.get_json()
+        size = len(res.get_json()["data"])
+        trips += int(_CALLS.search(res.headers["Server-Timing"]).group(1))
+    return trips / polls, (time.perf_counter() - started) * 1000 / polls, size
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--children", type=int, default=200, help="children in the session's group")
+    parser.add_argument("--latency-ms", type=float, default=5, help="simulated network time per PostgREST call")
+    args = parser.parse_args()
+
+    os.environ["CODE_STORE_BACKEND"] = "memory"
+    os.environ["QUERY_TRACE"] = "true"
+    os.environ["QUERY_TRACE_HEADER"] = "true"
+    os.environ["QUERY_ROUND_TRIP_BUDGET"] = "0"
+    client = StandInClient(latency_ms=args.latency_ms)
+    world = seed(client, args.children)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+    from utils import roster_cache
+
+    http = create_app().test_client()
+    session_id = world["session_id"]
+    print(f"{args.children} children, {args.latency_ms:g} ms per PostgREST call, {POLLS} polls")
+    print(f"{'cache':>8} {'trips/poll':>11} {'ms/poll':>8}")
+    for label, ttl in (("off", 0), ("on", 600)):
+        roster_cache._cache = roster_cache.RosterCache(ttl=ttl)
+        trips, ms, _ = poll(http, session_id, POLLS)
+        print(f"{label:>8} {trips:>11.2f} {ms:>8.2f}")
+
+    moved = http.put(f"/api/children/{world['child_ids'][0]}", json={"groupId": world["other_group"]})
+    assert moved.status_code == 200, moved.get_json()
+    _, _, size = poll(http, session_id, 1)
+    print(f"after moving a child out of the group: {size} children (expected {args.children - 1})")
+
+    updated = http.put(f"/api/sessions/{session_id}", json={"groupId": world["other_group"]})
+    assert updated.status_code == 200, updated.get_json()
+    _, _, size = poll(http, session_id, 1)
+    print(f"after moving the session to the other group: {size} children (expected 1)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,215 @@
+"""
+Load test: the Sunday check-in rush.
+
+Seeds a realistic morning - the default church plus two others sharing the
+database, four age groups with a teacher each, a few hundred families and
+today's Sunday School session with most children pre-booked - then replays
+the rush from a pool of threads against the Flask app:
+
+- parents arrive and teachers scan their QR codes (POST /api/checkin/scan-qr)
+- walk-ins without a booking are checked in by hand (POST /api/checkin/manual)
+- classroom dashboards poll GET /api/checkin/active
+- the welcome desk polls GET /api/sessions/<id>/bookings
+
+Every PostgREST call sleeps --latency-ms to stand in for the network, so
+round trips show up in latency the way they do in production. Round trips
+per request are read from the Server-Timing header added by
+utils/query_trace.py.
+
+The run fails (exit code 1) when an endpoint makes more round trips per
+request than ROUND_TRIP_BUDGETS allows or any request errors, so it can
+gate a deploy.
+
+Run from the backend directory:
+    python -m benchmarks.bench_sunday_rush
+    python -m benchmarks.bench_sunday_rush --children 600 --threads 16 --latency-ms 20
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+GROUP_NAMES = ["Little Angels", "Saints", "Disciples", "Trendsetters"]
+
+# Highest average PostgREST calls per request before the run fails
+ROUND_TRIP_BUDGETS = {
+    "scan-qr": 6,
+    "manual": 7,
+    "active": 2,
+    "bookings": 2,
+}
+
+_CALLS = re.compile(r'desc="(\d+) PostgREST calls"')
+
+
+def seed(client: StandInClient, children: int, booked_share: float, rng: random.Random) -> dict:
+    church_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    # Other congregations on the same project; their rows must be filtered out
+    for name in ("Ruach North", "Ruach City"):
+        other_id = str(uuid.uuid4())
+        client.seed("churches", [{"church_id": other_id, "name": name}])
+        client.seed("children", [
+            {"child_id": str(uuid.uuid4()), "church_id": other_id, "name": f"{name} Child {i}"}
+            for i in range(children // 4)
+        ])
+
+    teachers, groups = [], []
+    for name in GROUP_NAMES:
+        teacher_id = str(uuid.uuid4())
+        group_id = str(uuid.uuid4())
+        teachers.append(teacher_id)
+        client.seed("users", [{
+            "user_id": teacher_id, "church_id": church_id, "role": "Teacher",
+            "name": f"{name} Teacher", "email": f"{name.lower().replace(' ', '.')}@example.com",
+        }])
+        groups.append({"group_id": group_id, "church_id": church_id, "name": name, "teacher_id": teacher_id})
+    client.seed("groups", groups)
+
+    session_id = str(uuid.uuid4())
+    client.seed("sessions", [{
+        "session_id": session_id, "church_id": church_id, "title": "Sunday School",
+        "session_date": datetime.utcnow().date().isoformat(), "start_time": "10:00",
+    }])
+
+    scans, walk_ins = [], []
+    for i in range(children):
+        guardian_id = str(uuid.uuid4())
+        child_id = str(uuid.uuid4())
+        group = groups[i % len(groups)]
+        client.seed("guardians", [{
+            "guardian_id": guardian_id, "church_id": church_id, "name": f"Parent {i + 1}",
+            "email": f"parent{i + 1}@example.com", "phone": f"+25470000{i:04d}",
+        }])
+        client.seed("children", [{
+            "child_id": child_id, "church_id": church_id, "parent_id": guardian_id,
+            "group_id": group["group_id"], "name": f"Child {i + 1}",
+            "registration_id": f"RS{i + 1:05d}", "status": "active",
+        }])
+        teacher_id = group["teacher_id"]
+        if rng.random() < booked_share:
+            qr_code = uuid.uuid4().hex
+            client.seed("session_bookings", [{
+                "booking_id": str(uuid.uuid4()), "session_id": session_id, "child_id": child_id,
+                "guardian_id": guardian_id, "qr_code": qr_code, "otp_code": f"{i:06d}",
+                "status": "booked", "booked_at": datetime.utcnow().isoformat(),
+            }])
+            scans.append({"qr_code": qr_code, "session_id": session_id, "teacher_id": teacher_id})
+        else:
+            walk_ins.append({"child_id": child_id, "session_id": session_id, "teacher_id": teacher_id})
+
+    return {"session_id": session_id, "scans": scans, "walk_ins": walk_ins}
+
+
+def script(world: dict, poll_every: int, rng: random.Random) -> list[tuple[str, str, str, dict]]:
+    """Arrivals in random order with dashboard and desk polls mixed in."""
+    arrivals = [("scan-qr", "POST", "/api/checkin/scan-qr", body) for body in world["scans"]]
+    arrivals += [("manual", "POST", "/api/checkin/manual", body) for body in world["walk_ins"]]
+    rng.shuffle(arrivals)
+
+    steps = []
+    for i, arrival in enumerate(arrivals, start=1):
+        steps.append(arrival)
+        if i % poll_every == 0:
+            steps.append(("active", "GET", "/api/checkin/active", None))
+            steps.append(("bookings", "GET", f"/api/sessions/{world['session_id']}/bookings", None))
+    return steps
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def replay(app, steps: list, threads: int) -> tuple[dict, float]:
+    results: dict[str, list[tuple[float, int, bool]]] = {name: [] for name in ROUND_TRIP_BUDGETS}
+    local = threading.local()
+    lock = threading.Lock()
+
+    def run_step(step):
+        name, method, path, body = step
+        http = getattr(local, "http", None)
+        if http is None:
+            http = local.http = app.test_client()
+        started = time.perf_counter()
+        res = http.open(path, method=method, json=body)
+        elapsed = time.perf_counter() - started
+        match = _CALLS.search(res.headers.get("Server-Timing", ""))
+        ok = res.status_code < 300
+        with lock:
+            results[name].append((elapsed, int(match.group(1)) if match else 0, ok))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(run_step, steps))
+    return results, time.perf_counter() - started
+
+
+def report(results: dict, wall: float) -> bool:
+    passed = True
+    total = sum(len(rows) for rows in results.values())
+    print(f"{total} requests in {wall:.2f} s ({total / wall:.0f} req/s)")
+    print(f"{'endpoint':>9} {'n':>5} {'err':>4} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} "
+          f"{'req/s':>6} {'trips':>6} {'budget':>7}")
+    for name, rows in results.items():
+        if not rows:
+            continue
+        latencies = [row[0] * 1000 for row in rows]
+        trips = sum(row[1] for row in rows) / len(rows)
+        errors = sum(1 for row in rows if not row[2])
+        budget = ROUND_TRIP_BUDGETS[name]
+        flag = "" if trips <= budget and not errors else "  FAIL"
+        passed = passed and not flag
+        print(f"{name:>9} {len(rows):>5} {errors:>4} {percentile(latencies, 0.5):>7.1f} "
+              f"{percentile(latencies, 0.95):>7.1f} {percentile(latencies, 0.99):>7.1f} "
+              f"{len(rows) / wall:>6.0f} {trips:>6.2f} {budget:>7}{flag}")
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--children", type=int, default=300, help="children at the default church")
+    parser.add_argument("--booked", type=float, default=0.8, help="share of children pre-booked (QR)")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--latency-ms", type=float, default=5, help="simulated network time per PostgREST call")
+    parser.add_argument("--poll-every", type=int, default=10, help="arrivals between dashboard/desk polls")
+    parser.add_argument("--seed", type=int, default=955, help="random seed for a repeatable rush")
+    args = parser.parse_args()
+
+    # Notifications are queued but not delivered: measure what the teacher waits for
+    os.environ["NOTIFICATION_WORKERS"] = "0"
+    os.environ["NOTIFICATION_DRAIN_SECONDS"] = "0"
+    os.environ["QUERY_TRACE"] = "true"
+    os.environ["QUERY_TRACE_HEADER"] = "true"
+    os.environ["QUERY_ROUND_TRIP_BUDGET"] = "0"
+
+    rng = random.Random(args.seed)
+    client = StandInClient(latency_ms=args.latency_ms)
+    world = seed(client, args.children, args.booked, rng)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    app = create_app()
+    steps = script(world, args.poll_every, rng)
+    print(f"{args.children} children ({len(world['scans'])} booked, {len(world['walk_ins'])} walk-ins), "
+          f"{args.threads} threads, {args.latency_ms:g} ms per PostgREST call")
+    results, wall = replay(app, steps, args.threads)
+    return 0 if report(results, wall) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
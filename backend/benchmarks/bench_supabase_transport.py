@@ -0,0 +1,156 @@
+"""
+Micro-benchmark: Supabase HTTP transport against a local PostgREST stand-in.
+
+Starts a small HTTP/1.1 server on 127.0.0.1 that answers PostgREST-style
+requests (/rest/v1/<table>) after a fixed service time. New connections
+pay a simulated TLS handshake (HANDSHAKE_MS), as they would against a
+hosted Supabase project. The real supabase-py client is pointed at it with:
+
+- no keep-alive: every request opens a new connection
+- pooled: the transport from utils/http_transport.py
+
+Both run the same mix of selects and inserts from THREADS threads.
+The last two runs make 1 in 10 GETs fail with 503: with transport retries
+off, only supabase-py's own retry (1 s, 2 s, ... sleeps) recovers them; with
+them on, reads are retried after a few milliseconds of jittered backoff.
+
+Run from the backend directory:
+    python -m benchmarks.bench_supabase_transport
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from supabase import ClientOptions, create_client
+
+from utils.http_transport import (
+    InstrumentedTransport,
+    LatencyHistogram,
+    TransportSettings,
+    build_http_client,
+    get_latency_histogram,
+)
+
+HANDSHAKE_MS = 15
+SERVICE_MS = 2
+THREADS = 4
+REQUESTS_PER_THREAD = 100
+# Any non-empty key works against the stand-in
+API_KEY = "stand-in-key"
+
+
+class PostgrestStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment (no Nagle / delayed-ACK stalls)
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    fail_every = 0
+    counter = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        time.sleep(HANDSHAKE_MS / 1000)
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: list) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        time.sleep(SERVICE_MS / 1000)
+        with self.lock:
+            PostgrestStandIn.counter += 1
+            fail = self.fail_every and PostgrestStandIn.counter % self.fail_every == 0
+        if fail:
+            self._reply(503, [])
+        else:
+            self._reply(200, [{"child_id": "c1", "name": "Child 1"}])
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(SERVICE_MS / 1000)
+        self._reply(201, [body] if isinstance(body, dict) else body)
+
+
+def workload(client, results: list) -> None:
+    for i in range(REQUESTS_PER_THREAD):
+        try:
+            if i % 4 == 3:
+                client.table("check_in_records").insert({"child_id": "c1"}).execute()
+            else:
+                client.table("children").select("child_id, name").eq("child_id", "c1").execute()
+            results.append(True)
+        except Exception:
+            results.append(False)
+
+
+def run_case(url: str, http_client: httpx.Client) -> tuple[float, int, int]:
+    client = create_client(url, API_KEY, options=ClientOptions(httpx_client=http_client))
+    results: list[bool] = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        for _ in range(THREADS):
+            pool.submit(workload, client, results)
+    elapsed = time.perf_counter() - started
+    http_client.close()
+    return elapsed, results.count(True), results.count(False)
+
+
+def no_keepalive_client() -> httpx.Client:
+    limits = httpx.Limits(max_keepalive_connections=0)
+    transport = InstrumentedTransport(httpx.HTTPTransport(limits=limits), LatencyHistogram(), read_retries=0)
+    return httpx.Client(transport=transport, timeout=30)
+
+
+def pooled_client(read_retries: int) -> httpx.Client:
+    settings = TransportSettings()
+    settings.pool_size = THREADS
+    settings.http2 = False  # the stand-in speaks HTTP/1.1 only
+    settings.read_retries = read_retries
+    settings.retry_backoff = 0.005
+    return build_http_client(settings)
+
+
+def run() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PostgrestStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    total = THREADS * REQUESTS_PER_THREAD
+
+    print(f"{THREADS} threads x {REQUESTS_PER_THREAD} requests, {HANDSHAKE_MS} ms handshake, {SERVICE_MS} ms service time")
+    print(f"{'case':>22} {'total ms':>9} {'req/s':>7} {'ok':>5} {'failed':>7}")
+    cases = [
+        ("no keep-alive", lambda: no_keepalive_client(), 0),
+        ("pooled", lambda: pooled_client(0), 0),
+        ("503s, library retry", lambda: pooled_client(0), 10),
+        ("503s, transport retry", lambda: pooled_client(2), 10),
+    ]
+    for label, make_client, fail_every in cases:
+        PostgrestStandIn.fail_every = fail_every
+        PostgrestStandIn.counter = 0
+        get_latency_histogram().reset()
+        elapsed, ok, failed = run_case(url, make_client())
+        print(f"{label:>22} {elapsed * 1000:>9.1f} {total / elapsed:>7.0f} {ok:>5} {failed:>7}")
+
+    print()
+    print("Latency histogram for the last run (per table/op):")
+    for row in get_latency_histogram().snapshot():
+        print(f"  {row['table']:>18} {row['op']:>7} n={row['count']:<4} p50<={row['p50Ms']}ms "
+              f"p95<={row['p95Ms']}ms max={row['maxMs']}ms errors={row['errors']}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,72 @@
+"""
+Check: dashboard stats functions return the same numbers as the old queries.
+
+Calls each dashboard endpoint twice against a real Postgres - once through
+the migration 004 functions (one RPC) and once through the per-counter
+queries - and reports any field that differs.
+
+Point SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY at a local stack
+(`supabase start`) with the schema, migrations 001-004 and the
+database/INSERT_PARENTS_CHILDREN.sql fixture loaded, then run from the
+backend directory:
+    python -m benchmarks.check_dashboard_stats
+"""
+
+import sys
+
+from supabase_client import get_supabase, get_default_church_id
+from utils import dashboard_stats
+
+FUNCTIONS = ["admin_dashboard_stats", "teacher_dashboard_stats", "group_dashboard_stats"]
+
+
+def _get(http, path: str, legacy: bool) -> dict:
+    dashboard_stats._missing_functions.clear()
+    if legacy:
+        dashboard_stats._missing_functions.update(FUNCTIONS)
+    res = http.get(path)
+    assert res.status_code == 200, (path, res.status_code, res.get_json())
+    return res.get_json()["data"]
+
+
+def run() -> int:
+    client = get_supabase()
+    church_id = get_default_church_id()
+    if client is None or church_id is None:
+        print("❌ Supabase not configured - set SUPABASE_URL and a key for a local stack")
+        return 1
+
+    from app import create_app
+
+    http = create_app().test_client()
+    paths = ["/api/analytics/admin"]
+
+    teachers = client.table("users").select("user_id").eq("church_id", church_id).execute().data or []
+    for teacher in teachers:
+        paths.append(f"/api/teachers/dashboard?teacher_id={teacher['user_id']}")
+        paths.append(f"/api/analytics/teacher?teacher_id={teacher['user_id']}")
+
+    groups = client.table("groups").select("group_id").eq("church_id", church_id).execute().data or []
+    for group in groups:
+        paths.append(f"/api/groups/{group['group_id']}/stats")
+
+    mismatches = 0
+    for path in paths:
+        legacy = _get(http, path, legacy=True)
+        rpc = _get(http, path, legacy=False)
+        for key in sorted(set(legacy) | set(rpc)):
+            left, right = legacy.get(key), rpc.get(key)
+            if isinstance(left, list) and isinstance(right, list):
+                # Row order is not part of the contract for groups
+                left = sorted(left, key=str) if key == "groups" else left
+                right = sorted(right, key=str) if key == "groups" else right
+            if left != right:
+                mismatches += 1
+                print(f"❌ {path} {key}: queries={legacy.get(key)!r} rpc={rpc.get(key)!r}")
+
+    print(f"{'✅' if not mismatches else '❌'} {len(paths)} endpoints checked, {mismatches} mismatched fields")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,113 @@
+"""
+Check: report exports download through the URLs the frontend builds.
+
+Seeds a term of attendance summaries and check-in records, then requests
+GET /api/reports/export for each format and report type in the shape
+reportsApi.export() sends (`/reports/export?format=csv&period=...`) and in
+the doubled shape older frontends sent (`?format=csv?format=csv&...`).
+Each download must be a 200 with the right file type, every seeded row and
+no "export incomplete" marker.
+
+Run from the backend directory:
+    python -m benchmarks.check_report_exports
+"""
+
+import csv
+import io
+import sys
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+
+import supabase_client
+from benchmarks.stand_in import StandInClient
+
+WEEKS = 30
+
+MIMETYPES = {
+    "csv": "text/csv",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def seed(client: StandInClient) -> dict:
+    church_id = str(uuid.uuid4())
+    group_id = str(uuid.uuid4())
+    child_id = str(uuid.uuid4())
+    client.seed("churches", [{"church_id": church_id, "name": "Ruach South Assembly"}])
+    client.seed("groups", [{"group_id": group_id, "church_id": church_id, "name": "Saints"}])
+    client.seed("children", [{"child_id": child_id, "church_id": church_id, "group_id": group_id,
+                              "name": "Child 1", "registration_id": "RS001/01"}])
+    today = datetime.utcnow()
+    client.seed("attendance_summary", [
+        {"summary_id": str(uuid.uuid4()), "church_id": church_id, "group_id": group_id,
+         "date": (today - timedelta(days=7 * week)).date().isoformat(), "present_count": 10, "absent_count": 2}
+        for week in range(WEEKS)
+    ])
+    client.seed("check_in_records", [
+        {"record_id": str(uuid.uuid4()), "church_id": church_id, "child_id": child_id, "method": "QR",
+         "timestamp_in": (today - timedelta(days=7 * week)).isoformat()}
+        for week in range(WEEKS)
+    ])
+    return {"attendance": WEEKS, "checkins": WEEKS}
+
+
+def urls(format_type: str, report_type: str) -> dict[str, str]:
+    # src/config/api.ts: REPORTS.EXPORT(format) = /reports/export?format=<format>
+    export = f"/api/reports/export?format={format_type}"
+    params = f"period=month&type={report_type}"
+    return {
+        "frontend": f"{export}&{params}",
+        "legacy frontend": f"{export}?format={format_type}&{params}",
+    }
+
+
+def read_export(format_type: str, body: bytes) -> tuple[int, bool]:
+    """(data rows, whether the file is marked incomplete)."""
+    if format_type == "csv":
+        rows = list(csv.reader(io.StringIO(body.decode("utf-8-sig"))))[1:]
+        incomplete = bool(rows) and bool(rows[-1]) and rows[-1][0].startswith("# export incomplete")
+        return len(rows) - incomplete, incomplete
+    with zipfile.ZipFile(io.BytesIO(body)) as book:
+        incomplete = "xl/worksheets/sheet2.xml" in book.namelist()
+        sheet = book.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    return sheet.count("<row ") - 1, incomplete
+
+
+def run() -> int:
+    client = StandInClient()
+    expected = seed(client)
+    supabase_client._client = client
+    supabase_client.invalidate_default_church_id()
+    from app import create_app  # imported late so startup uses the stand-in
+
+    http = create_app().test_client()
+    failed = False
+    print(f"{'format':>7} {'type':>11} {'url':>16} {'status':>7} {'rows':>5}  result")
+    for format_type in MIMETYPES:
+        for report_type, count in expected.items():
+            for label, url in urls(format_type, report_type).items():
+                res = http.get(url)
+                rows, incomplete = read_export(format_type, res.data) if res.status_code == 200 else (0, False)
+                problems = []
+                if res.status_code != 200:
+                    problems.append((res.get_json() or {}).get("error", "no body"))
+                elif res.mimetype != MIMETYPES[format_type]:
+                    problems.append(f"served as {res.mimetype}")
+                elif incomplete:
+                    problems.append("marked incomplete")
+                elif rows != count:
+                    problems.append(f"expected {count} rows")
+                failed = failed or bool(problems)
+                print(f"{format_type:>7} {report_type:>11} {label:>16} {res.status_code:>7} {rows:>5}  "
+                      f"{'ok' if not problems else '; '.join(problems)}")
+
+    if failed:
+        print("❌ an export URL the frontend sends did not download the whole report")
+        return 1
+    print("✅ every export URL shape downloaded the whole report")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
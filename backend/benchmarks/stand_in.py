@@ -0,0 +1,16 @@
+"""
+In-memory stand-in for the Supabase client used by the benchmarks.
+
+The implementation lives in utils/fake_supabase.py (also selectable for the
+whole app with SUPABASE_BACKEND=fake). It counts every `.execute()` as one
+round trip, so a benchmark can assert how many HTTP calls an endpoint would
+make against the real database.
+"""
+
+from utils.fake_supabase import (  # noqa: F401 - re-exported for the benchmarks
+    FOREIGN_KEYS,
+    PRIMARY_KEYS,
+    FakeQuery as StandInQuery,
+    FakeResponse as StandInResponse,
+    FakeSupabaseClient as StandInClient,
+)
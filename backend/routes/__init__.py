@@ -20,6 +20,8 @@ from .teens import teens_bp
 from .sessions import sessions_bp
 from .session_bookings import session_bookings_bp
 from .reports import reports_bp
+from .sync import sync_bp
+from .debug import debug_bp
 
 
 def register_blueprints(app):
@@ -42,5 +44,7 @@ def register_blueprints(app):
     app.register_blueprint(sessions_bp, url_prefix="/api/sessions")
     app.register_blueprint(session_bookings_bp, url_prefix="/api")
     app.register_blueprint(reports_bp, url_prefix="/api/reports")
+    app.register_blueprint(sync_bp, url_prefix="/api/sync")
+    app.register_blueprint(debug_bp, url_prefix="/api/debug")
 
 
@@ -5,9 +5,15 @@ from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.dashboard_stats import admin_dashboard_stats, teacher_dashboard_stats
+from utils.attendance_rollup import child_daily_attendance, daily_from_checkins
+from utils.fanout import parallel_queries
 
 analytics_bp = Blueprint("analytics", __name__)
 
+# Raw check-in rows returned alongside child analytics
+RECENT_CHECKINS_LIMIT = 10
+
 
 @analytics_bp.get("/group/<group_name>")
 def group_analytics(group_name: str):
@@ -78,6 +84,18 @@ def teacher_analytics():
     if church_id is None:
         return jsonify({"error": "No church configured"}), 500
 
+    # One RPC round trip when migration 004 is applied
+    stats = teacher_dashboard_stats(church_id, teacher_id)
+    if stats is not None:
+        return jsonify({
+            "data": {
+                "teacherId": teacher_id,
+                "groupsCount": len(stats["groups"]),
+                "groups": stats["groups"],
+                "checkInsToday": stats["checkins_today"],
+            }
+        })
+
     try:
         # Get groups assigned to teacher
         groups_res = (
@@ -123,24 +141,29 @@ def admin_analytics():
     if church_id is None:
         return jsonify({"error": "No church configured"}), 500
 
+    # One RPC round trip when migration 004 is applied
+    stats = admin_dashboard_stats(church_id)
+    if stats is not None:
+        return jsonify({
+            "data": {
+                "totalChildren": stats["total_children"],
+                "checkedInToday": stats["checked_in_today"],
+            }
+        })
+
     try:
-        # Count children (no status column in schema)
-        children_res = (
+        # Count children (no status column in schema) and active check-ins
+        # today, concurrently
+        today = datetime.utcnow().date().isoformat()
+        children_res, checkins_res = parallel_queries(
             client.table("children")
             .select("child_id", count="exact")
-            .eq("church_id", church_id)
-            .execute()
-        )
-
-        # Count active check-ins today
-        today = datetime.utcnow().date().isoformat()
-        checkins_res = (
+            .eq("church_id", church_id),
             client.table("check_in_records")
             .select("record_id", count="exact")
             .eq("church_id", church_id)
             .gte("timestamp_in", today)
-            .is_("timestamp_out", "null")
-            .execute()
+            .is_("timestamp_out", "null"),
         )
 
         return jsonify({
@@ -166,26 +189,45 @@ def child_analytics(child_id: str):
         return jsonify({"error": "No church configured"}), 500
 
     try:
-        # Get check-in records for last 30 days
         thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
-        checkins_res = (
-            client.table("check_in_records")
-            .select("*")
-            .eq("child_id", child_id)
-            .eq("church_id", church_id)
-            .gte("timestamp_in", thirty_days_ago)
-            .execute()
-        )
-
-        attendance_count = len(checkins_res.data or [])
-        attendance_rate = (attendance_count / 30) * 100 if checkins_res.data else 0
 
+        # Count from the trigger-maintained rollup (migration 005)
+        daily = child_daily_attendance(church_id, child_id, thirty_days_ago)
+        if daily is not None:
+            recent_res = (
+                client.table("check_in_records")
+                .select("*")
+                .eq("child_id", child_id)
+                .eq("church_id", church_id)
+                .gte("timestamp_in", thirty_days_ago)
+                .order("timestamp_in", desc=True)
+                .limit(RECENT_CHECKINS_LIMIT)
+                .execute()
+            )
+            recent = recent_res.data or []
+        else:
+            # Fallback: the same rows from raw check-in records for last 30 days
+            checkins_res = (
+                client.table("check_in_records")
+                .select("*")
+                .eq("child_id", child_id)
+                .eq("church_id", church_id)
+                .gte("timestamp_in", thirty_days_ago)
+                .order("timestamp_in", desc=True)
+                .execute()
+            )
+            records = checkins_res.data or []
+            daily = daily_from_checkins(records)
+            recent = records[:RECENT_CHECKINS_LIMIT]
+
+        attendance_count = sum(row.get("checkins_count") or 0 for row in daily)
         return jsonify({
             "data": {
                 "childId": child_id,
                 "attendanceCount": attendance_count,
-                "attendanceRate": round(attendance_rate, 2),
-                "recentCheckIns": checkins_res.data or [],
+                "attendanceRate": round((attendance_count / 30) * 100, 2),
+                "dailyAttendance": daily,
+                "recentCheckIns": recent,
             }
         })
     except Exception as exc:  # pragma: no cover
@@ -5,6 +5,7 @@ from datetime import datetime, date
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.pagination import get_page_args, fetch_page
 
 attendance_bp = Blueprint("attendance", __name__)
 
@@ -16,6 +17,11 @@ def list_attendance():
     group = request.args.get("group")
     attendance_date = request.args.get("date") or request.args.get("date")
 
+    try:
+        limit, after = get_page_args(default_limit=100)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
     client = get_supabase()
     if client is None:
         return jsonify({"error": "Supabase not configured"}), 500
@@ -105,9 +111,9 @@ def list_attendance():
                 # Filter by multiple child IDs (for group filter)
                 query = query.in_("child_id", child_ids)
 
-            res = query.order("timestamp_in", desc=True).limit(100).execute()
+            rows, next_cursor = fetch_page(query, "timestamp_in", "record_id", limit, after)
             records = []
-            for row in res.data or []:
+            for row in rows:
                 child = row.get("children")
                 guardian = row.get("guardians")
                 records.append({
@@ -121,7 +127,7 @@ def list_attendance():
                     "timestampOut": row.get("timestamp_out"),
                     "method": row.get("method"),
                 })
-            return jsonify({"data": records})
+            return jsonify({"data": records, "next_cursor": next_cursor})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error listing attendance: {exc}")
         return jsonify({"error": "Failed to list attendance"}), 500
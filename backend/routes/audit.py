@@ -3,6 +3,7 @@
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.pagination import get_page_args, fetch_page
 
 audit_bp = Blueprint("audit", __name__)
 
@@ -12,7 +13,11 @@ def list_audit_logs():
     """List audit logs with optional filters."""
     user_id = request.args.get("user_id") or request.args.get("userId")
     action = request.args.get("action")
-    limit = int(request.args.get("limit", 100))
+
+    try:
+        limit, after = get_page_args(default_limit=100)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
     client = get_supabase()
     if client is None:
@@ -33,9 +38,9 @@ def list_audit_logs():
         if action:
             query = query.eq("action_performed", action)
 
-        res = query.order("timestamp", desc=True).limit(limit).execute()
+        rows, next_cursor = fetch_page(query, "timestamp", "log_id", limit, after)
         logs = []
-        for row in res.data or []:
+        for row in rows:
             user = row.get("users")
             logs.append({
                 "id": row["log_id"],
@@ -50,7 +55,7 @@ def list_audit_logs():
                 "details": row.get("details", {}),
                 "timestamp": row.get("timestamp"),
             })
-        return jsonify({"data": logs})
+        return jsonify({"data": logs, "next_cursor": next_cursor})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error listing audit logs: {exc}")
         return jsonify({"error": "Failed to list audit logs"}), 500
@@ -4,16 +4,18 @@ import secrets
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.tokens import SCOPE_ACCESS, SCOPE_MFA, TokenError, is_signed_token, issue_token, revoke_token, verify_token
 
 auth_bp = Blueprint("auth", __name__)
 
-# In-memory user store for now.
+# Dev logins when no database is configured (users without a users row are
+# never kept here: they would stay signed in after being deleted or renamed)
 users_db: dict[str, dict] = {}
 mfa_codes: dict[str, dict] = {}
 
 
-def _issue_token(email: str) -> str:
-    return f"token_{email}_{datetime.now().timestamp()}"
+def _issue_token(user: dict, scope: str = SCOPE_ACCESS) -> str:
+    return issue_token(user, church_id=get_default_church_id(), scope=scope)
 
 
 @auth_bp.post("/login")
@@ -33,8 +35,6 @@ def login():
     if password != "password123":
         return jsonify({"error": "Invalid credentials"}), 401
 
-    token = _issue_token(email)
-
     # Try to get user from Supabase first to get actual role
     user = None
     client = get_supabase()
@@ -44,7 +44,7 @@ def login():
             if church_id:
                 res = (
                     client.table("users")
-                    .select("user_id, email, role, name, profile_updated, password_set")
+                    .select("user_id, email, role, name, profile_updated, password_set, is_active")
                     .eq("church_id", church_id)
                     .eq("email", email)
                     .limit(1)
@@ -52,6 +52,9 @@ def login():
                 )
                 if res.data:
                     db_user = res.data[0]
+                    if db_user.get("is_active") is False:
+                        # Signed tokens are trusted until expiry, so never issue one
+                        return jsonify({"error": "Account suspended"}), 403
                     user = {
                         "id": db_user["user_id"],
                         "email": db_user.get("email", email),
@@ -75,7 +78,11 @@ def login():
                 "profile_updated": True,
             },
         )
-    users_db[email] = user
+    if client is None:
+        users_db[email] = user
+
+    # Short-lived token that is only good for /verify-mfa
+    token = _issue_token(user, scope=SCOPE_MFA)
 
     # 6-digit MFA code
     otp_code = "".join(str(secrets.randbelow(10)) for _ in range(6))
@@ -83,6 +90,7 @@ def login():
         "code": otp_code,
         "expires_at": datetime.utcnow() + timedelta(minutes=15),  # Increased from 10 to 15 minutes
         "user_email": email,
+        "user": user,
     }
 
     return jsonify(
@@ -117,6 +125,13 @@ def verify_mfa():
         print(f"⚠️ MFA verification failed: Token not found in mfa_codes. Available tokens: {list(mfa_codes.keys())[:3]}")
         return jsonify({"error": "MFA session expired or invalid. Please login again."}), 401
 
+    try:
+        verify_token(token, scope=SCOPE_MFA)  # Revoked if suspended since login
+    except TokenError as exc:
+        del mfa_codes[token]
+        print(f"⚠️ MFA verification failed: {exc}")
+        return jsonify({"error": "MFA session expired or invalid. Please login again."}), 401
+
     entry = mfa_codes[token]
     if datetime.utcnow() > entry["expires_at"]:
         del mfa_codes[token]
@@ -128,9 +143,9 @@ def verify_mfa():
         return jsonify({"error": "Invalid verification code. Please check and try again."}), 401
 
     email = entry["user_email"]
-    user = users_db.get(email)
+    user = entry.get("user")
     
-    # If user not in memory, try to get from Supabase
+    # If the login did not keep the user, try to get from Supabase
     if not user:
         client = get_supabase()
         if client:
@@ -157,20 +172,19 @@ def verify_mfa():
                             "profile_updated": db_user.get("profile_updated", False),
                             "password_set": db_user.get("password_set", False),
                         }
-                        users_db[email] = user
             except Exception as exc:
                 print(f"⚠️ Error fetching user from Supabase: {exc}")
     
     if not user:
         return jsonify({"error": "User session expired. Please login again."}), 401
 
-    # Successful – we can reuse token as final auth token.
+    # Successful – swap the MFA token for a signed session token.
     del mfa_codes[token]
 
     return jsonify(
         {
             "data": {
-                "token": token,
+                "token": _issue_token(user),
                 "user": user,
             }
         }
@@ -179,7 +193,14 @@ def verify_mfa():
 
 @auth_bp.post("/logout")
 def logout():
-    """Stateless logout – frontend just drops the token."""
+    """Logout – the frontend drops the token and a signed token is revoked."""
+    auth_header = request.headers.get("Authorization", "")
+    token = auth_header[7:].strip() if auth_header.startswith("Bearer ") else ""
+    if is_signed_token(token):
+        try:
+            revoke_token(verify_token(token))
+        except TokenError:
+            pass  # Already expired, revoked or never valid
     return jsonify({"data": {"success": True}})
 
 
@@ -232,8 +253,9 @@ def set_password():
             "profile_updated": False,
         }
     
-    token = _issue_token(email)
-    users_db[email] = user
+    if client is None:
+        users_db[email] = user
+    token = _issue_token(user, scope=SCOPE_MFA)
 
     # Generate MFA code
     otp_code = "".join(str(secrets.randbelow(10)) for _ in range(6))
@@ -241,6 +263,7 @@ def set_password():
         "code": otp_code,
         "expires_at": datetime.utcnow() + timedelta(minutes=15),  # Increased from 10 to 15 minutes
         "user_email": email,
+        "user": user,
     }
 
     return jsonify({
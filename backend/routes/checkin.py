@@ -4,22 +4,32 @@ Handles QR code generation, scanning, manual check-in, and OTP verification.
 """
 
 from datetime import datetime, timedelta
+import json
 import secrets
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
 from utils.qr_codes import generate_qr_code, generate_otp_code, validate_qr_code
 from utils.notifications import notify_check_in
+from utils.notification_queue import dispatch_notification
+from utils.atomic_checkin import check_in_child
+from utils.batch_loader import get_batch_loader
+from utils.code_store import get_code_store
+from utils.delta_sync import changed_after, get_since_arg, is_untracked, new_cursor, tombstones_query
+from utils.fanout import parallel_queries
+from utils.idempotency import idempotent
+from utils.live_status import get_status_broker, publish_status, stream_events
 
 checkin_bp = Blueprint("checkin", __name__)
 
-# In-memory store for QR codes and OTPs (temporary, expires)
-qr_codes_db: dict[str, dict] = {}  # {qr_code: {child_id, expires_at, guardian_id, data}}
-otp_codes_db: dict[str, dict] = {}  # {otp_code: {child_id, expires_at, guardian_id}}
+# Shared expiring stores for QR codes and OTPs (see utils/code_store.py)
+qr_codes_db = get_code_store("checkin_qr")  # {qr_code: {child_id, expires_at, guardian_id, data}}
+otp_codes_db = get_code_store("checkin_otp")  # {otp_code: {child_id, expires_at, guardian_id}}
 
 
 @checkin_bp.post("/generate-qr")
+@idempotent
 def generate_qr():
     """
     Generate QR code for pre-check-in - Phase 3A.1 from USER_CASE_FLOW.md
@@ -84,6 +94,7 @@ def generate_qr():
 
 
 @checkin_bp.post("/scan-qr")
+@idempotent
 def scan_qr():
     """
     Scan and verify QR code for check-in - Phase 3B.2 from USER_CASE_FLOW.md
@@ -138,14 +149,13 @@ def scan_qr():
             print(f"⚠️ Error looking up booking: {exc}")
             return jsonify({"error": "Failed to verify booking"}), 500
     else:
-        # Legacy: Validate QR code using in-memory store
+        # Legacy: Validate QR code using the shared code store
         is_valid, error_msg = validate_qr_code(qr_code, qr_codes_db)
-        if not is_valid:
-            if qr_code in qr_codes_db:
-                del qr_codes_db[qr_code]
+        qr_data = qr_codes_db.get(qr_code)
+        if not is_valid or qr_data is None:
+            qr_codes_db.pop(qr_code, None)
             return jsonify({"error": error_msg or "Invalid or expired QR code"}), 401
 
-        qr_data = qr_codes_db[qr_code]
         child_id = qr_data["child_id"]
         guardian_id = qr_data.get("guardian_id")
 
@@ -157,6 +167,7 @@ def scan_qr():
 
 
 @checkin_bp.post("/manual")
+@idempotent
 def manual_checkin():
     """
     Manual check-in by teacher - Phase 3B.3 from USER_CASE_FLOW.md
@@ -290,7 +301,238 @@ def manual_checkin():
     )
 
 
+@checkin_bp.post("/bulk")
+@idempotent
+def bulk_checkin():
+    """
+    Check in a whole session roster at once - Phase 3B.3 from USER_CASE_FLOW.md
+    Validates every child with set-based queries, inserts all check-in records
+    in one statement and returns a result per child.
+
+    Body: {session_id, child_ids: [...], teacher_id}
+    """
+    data = request.get_json() or {}
+    session_id = data.get("session_id") or data.get("sessionId")
+    teacher_id = data.get("teacher_id") or data.get("teacherId")
+    child_ids = data.get("child_ids") or data.get("childIds") or []
+
+    if not session_id:
+        return jsonify({"error": "session_id is required"}), 400
+    if not teacher_id:
+        return jsonify({"error": "teacher_id is required", "message": "Please provide a valid teacher/user ID"}), 400
+    if not isinstance(child_ids, list) or not child_ids:
+        return jsonify({"error": "child_ids must be a non-empty list"}), 400
+
+    import re
+    uuid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+    for label, value in (("session_id", session_id), ("teacher_id", teacher_id)):
+        if not uuid_pattern.match(str(value)):
+            return jsonify({
+                "error": f"Invalid {label} format",
+                "message": f"{label} must be a valid UUID format. Received: {value}"
+            }), 400
+
+    client = get_supabase()
+    if client is None:
+        return jsonify({"error": "Supabase not configured"}), 500
+
+    church_id = get_default_church_id()
+    if church_id is None:
+        return jsonify({"error": "No church configured"}), 500
+
+    # Per-child outcome, in request order; duplicates and bad ids fail up front
+    results: dict[str, dict] = {}
+    pending: list[str] = []
+    for child_id in child_ids:
+        child_id = str(child_id)
+        if child_id in results:
+            continue
+        if not uuid_pattern.match(child_id):
+            results[child_id] = {"childId": child_id, "status": "failed", "error": "Invalid child_id format"}
+        else:
+            results[child_id] = {"childId": child_id}
+            pending.append(child_id)
+
+    try:
+        session_res = (
+            client.table("sessions")
+            .select("session_id")
+            .eq("session_id", session_id)
+            .eq("church_id", church_id)
+            .limit(1)
+            .execute()
+        )
+        if not session_res.data:
+            return jsonify({"error": "Session not found"}), 404
+
+        user_res = (
+            client.table("users")
+            .select("user_id")
+            .eq("user_id", teacher_id)
+            .eq("church_id", church_id)
+            .limit(1)
+            .execute()
+        )
+        if not user_res.data:
+            return jsonify({
+                "error": "Teacher/User not found",
+                "message": f"User ID {teacher_id} does not exist in the users table. Please ensure the user is registered."
+            }), 404
+
+        children = {}
+        bookings = {}
+        active = set()
+        if pending:
+            children_res = (
+                client.table("children")
+                .select("child_id, name, parent_id, group_id")
+                .eq("church_id", church_id)
+                .in_("child_id", pending)
+                .execute()
+            )
+            children = {row["child_id"]: row for row in children_res.data or []}
+
+            bookings_res = (
+                client.table("session_bookings")
+                .select("booking_id, child_id, guardian_id, status")
+                .eq("session_id", session_id)
+                .in_("child_id", pending)
+                .execute()
+            )
+            # Cancelled bookings are kept: (session_id, child_id) is unique, so
+            # they are checked in again by the update below, not re-inserted
+            bookings = {row["child_id"]: row for row in bookings_res.data or []}
+
+            active_res = (
+                client.table("check_in_records")
+                .select("child_id")
+                .eq("church_id", church_id)
+                .in_("child_id", pending)
+                .is_("timestamp_out", "null")
+                .execute()
+            )
+            active = {row["child_id"] for row in active_res.data or []}
+
+        to_check_in = []
+        for child_id in pending:
+            if child_id not in children:
+                results[child_id].update({"status": "failed", "error": "Child not found"})
+            elif child_id in active:
+                results[child_id].update({"status": "skipped", "error": "Child is already checked in"})
+            else:
+                to_check_in.append(child_id)
+
+        # Create missing bookings in one multi-row insert
+        new_bookings = []
+        for child_id in to_check_in:
+            if child_id not in bookings:
+                new_bookings.append({
+                    "session_id": session_id,
+                    "child_id": child_id,
+                    "guardian_id": children[child_id].get("parent_id"),
+                    "qr_code": secrets.token_urlsafe(32),
+                    "otp_code": generate_otp_code(),
+                    "status": "booked",
+                })
+        if new_bookings:
+            try:
+                new_bookings_res = client.table("session_bookings").insert(new_bookings).execute()
+                for row in new_bookings_res.data or []:
+                    bookings[row["child_id"]] = row
+            except Exception as e:
+                print(f"⚠️ Error creating bookings: {e}")
+                # Continue without booking_id - check-in will still work
+
+        now = datetime.utcnow().isoformat()
+        record_rows = []
+        for child_id in to_check_in:
+            booking = bookings.get(child_id) or {}
+            guardian_id = booking.get("guardian_id") or children[child_id].get("parent_id")
+            row = {
+                "church_id": church_id,
+                "child_id": child_id,
+                "teacher_id": teacher_id,
+                "method": "PARENT_ID",
+                "timestamp_in": now,
+                "session_id": session_id,
+            }
+            if guardian_id:
+                row["guardian_id"] = guardian_id
+            if booking.get("booking_id"):
+                row["booking_id"] = booking["booking_id"]
+            record_rows.append(row)
+
+        records = {}
+        if record_rows:
+            try:
+                insert_res = client.table("check_in_records").insert(record_rows).execute()
+                records = {row["child_id"]: row for row in insert_res.data or []}
+            except Exception as insert_error:
+                print(f"⚠️ Error inserting bulk check-in records: {insert_error}")
+                for child_id in to_check_in:
+                    results[child_id].update({"status": "failed", "error": "Failed to create check-in record"})
+                to_check_in = []
+
+        # Mark every booking checked in with one statement
+        booking_ids = [records[c]["booking_id"] for c in to_check_in if records.get(c, {}).get("booking_id")]
+        if booking_ids:
+            try:
+                client.table("session_bookings").update({
+                    "status": "checked_in",
+                    "checked_in_at": now,
+                }).in_("booking_id", booking_ids).execute()
+            except Exception as e:
+                print(f"⚠️ Error updating booking status: {e}")
+                # Continue - check-in records are already created
+
+        for child_id in to_check_in:
+            record = records.get(child_id)
+            if not record:
+                results[child_id].update({"status": "failed", "error": "Failed to create check-in record"})
+                continue
+            child = children[child_id]
+            results[child_id].update({
+                "status": "checked_in",
+                "recordId": record.get("record_id"),
+                "childName": child.get("name"),
+                "timestampIn": record.get("timestamp_in"),
+                "bookingId": record.get("booking_id"),
+            })
+            # Send notification to parent in the background (Phase 3B.4)
+            dispatch_notification(
+                notify_check_in,
+                child_id=child_id,
+                guardian_id=record.get("guardian_id"),
+                child_name=child.get("name"),
+            )
+            publish_status(
+                church_id, "checked_in", child_id,
+                recordId=record.get("record_id"),
+                childName=child.get("name"),
+                groupId=child.get("group_id"),
+                sessionId=session_id,
+                teacherId=teacher_id,
+                method="PARENT_ID",
+                timestampIn=record.get("timestamp_in"),
+            )
+
+        data_out = list(results.values())
+        return jsonify({
+            "data": data_out,
+            "sessionId": session_id,
+            "checkedIn": sum(1 for r in data_out if r.get("status") == "checked_in"),
+            "skipped": sum(1 for r in data_out if r.get("status") == "skipped"),
+            "failed": sum(1 for r in data_out if r.get("status") == "failed"),
+        })
+    except Exception as exc:  # pragma: no cover
+        print(f"⚠️ Error in bulk check-in: {exc}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Failed to check in children", "message": str(exc)}), 500
+
+
 @checkin_bp.post("/verify-otp")
+@idempotent
 def verify_otp():
     """
     Verify OTP code for check-in - Alternative to QR code.
@@ -368,18 +610,16 @@ def verify_otp():
                 traceback.print_exc()
                 return jsonify({"error": "Failed to verify child"}), 500
         else:
-            # Legacy: Check in-memory OTP store
-            if otp_code not in otp_codes_db:
+            # Legacy: Consume OTP from the shared code store (one-time use)
+            otp_data = otp_codes_db.pop(otp_code, None)
+            if otp_data is None:
                 return jsonify({"error": "Invalid or expired OTP code. Please provide child_id or use a valid OTP."}), 401
 
-            otp_data = otp_codes_db[otp_code]
             if datetime.utcnow() > otp_data["expires_at"]:
-                del otp_codes_db[otp_code]
                 return jsonify({"error": "OTP code expired"}), 401
 
             child_id = otp_data["child_id"]
             guardian_id = otp_data.get("guardian_id")
-            del otp_codes_db[otp_code]
 
     if not child_id:
         return jsonify({"error": "Could not determine child_id from OTP"}), 400
@@ -391,11 +631,37 @@ def verify_otp():
     )
 
 
+def _active_checkin(record: dict, loader) -> dict:
+    """Shape of one row of GET /api/checkin/active."""
+    child = record.get("children")
+    guardian = record.get("guardians")
+    group_id = child.get("group_id") if child else None
+    return {
+        "recordId": record.get("record_id"),
+        "childId": record.get("child_id"),
+        "childName": child.get("name") if child else "Unknown",
+        "registrationId": child.get("registration_id") if child else None,
+        "groupId": group_id,
+        "groupName": loader.get("groups", "group_id", group_id, {}).get("name"),
+        "guardianId": record.get("guardian_id"),
+        "guardianName": guardian.get("name") if guardian else None,
+        "parentId": guardian.get("parent_id") if guardian else None,
+        "teacherId": record.get("teacher_id"),
+        "timestampIn": record.get("timestamp_in"),
+        "method": record.get("method"),
+        "sessionId": record.get("session_id"),
+    }
+
+
 @checkin_bp.get("/active")
 def list_active_checkins():
     """
     Get all currently checked-in children (not checked out yet).
     Returns list of children with their check-in details.
+
+    With ?since=<cursor> (the cursor of an earlier response) only the
+    check-ins made or changed since are returned, and `removed` lists the
+    record ids that left the list (see utils/delta_sync.py).
     """
     client = get_supabase()
     if client is None:
@@ -406,60 +672,63 @@ def list_active_checkins():
         return jsonify({"error": "No church configured"}), 500
 
     try:
+        since = get_since_arg()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    try:
+        cursor = new_cursor()
         # Get all active check-in records (timestamp_out is null) for today
-        today = datetime.utcnow().date().isoformat()
-        res = (
-            client.table("check_in_records")
-            .select("*, children(child_id, name, registration_id, group_id), guardians(guardian_id, name, parent_id)")
-            .eq("church_id", church_id)
-            .gte("timestamp_in", today)
-            .is_("timestamp_out", "null")
-            .order("timestamp_in", desc=False)
-            .execute()
-        )
+        today = datetime.utcnow().date()
+        if since is not None and since.date() < today:
+            # Yesterday's check-ins have dropped off the list since
+            since = None
+
+        def records_query():
+            return (
+                client.table("check_in_records")
+                .select("*, children(child_id, name, registration_id, group_id), guardians(guardian_id, name, parent_id)")
+                .eq("church_id", church_id)
+                .gte("timestamp_in", today.isoformat())
+            )
+
+        records, removed = [], []
+        if since is not None:
+            changed_res, tombstones_res = parallel_queries(
+                records_query().gte("updated_at", changed_after(since)).order("timestamp_in", desc=False),
+                tombstones_query(client, "check_in_records", since, church_id=church_id),
+                return_exceptions=True,
+            )
+            failed = next((r for r in (changed_res, tombstones_res) if isinstance(r, Exception)), None)
+            if failed is None:
+                for record in changed_res.data or []:
+                    if record.get("timestamp_out"):
+                        removed.append(record.get("record_id"))
+                    else:
+                        records.append(record)
+                removed.extend(row.get("row_id") for row in tombstones_res.data or [])
+            elif is_untracked(failed):
+                since = None
+            else:
+                raise failed
+
+        if since is None:
+            res = records_query().is_("timestamp_out", "null").order("timestamp_in", desc=False).execute()
+            records = res.data or []
 
-        # Format the response
-        active_checkins = []
-        for record in res.data:
+        # Resolve group names with one query instead of one per record
+        loader = get_batch_loader()
+        for record in records:
             child = record.get("children")
-            guardian = record.get("guardians")
-            child_id = record.get("child_id")
-            group_id = child.get("group_id") if child else None
-            
-            # Get group name if group_id exists
-            group_name = None
-            if group_id:
-                try:
-                    group_res = (
-                        client.table("groups")
-                        .select("name")
-                        .eq("group_id", group_id)
-                        .eq("church_id", church_id)
-                        .limit(1)
-                        .execute()
-                    )
-                    if group_res.data:
-                        group_name = group_res.data[0].get("name")
-                except Exception as e:
-                    print(f"⚠️ Error fetching group name: {e}")
-            
-            active_checkins.append({
-                "recordId": record.get("record_id"),
-                "childId": child_id,
-                "childName": child.get("name") if child else "Unknown",
-                "registrationId": child.get("registration_id") if child else None,
-                "groupId": group_id,
-                "groupName": group_name,
-                "guardianId": record.get("guardian_id"),
-                "guardianName": guardian.get("name") if guardian else None,
-                "parentId": guardian.get("parent_id") if guardian else None,
-                "teacherId": record.get("teacher_id"),
-                "timestampIn": record.get("timestamp_in"),
-                "method": record.get("method"),
-                "sessionId": record.get("session_id"),
-            })
+            loader.want("groups", "group_id", child.get("group_id") if child else None, columns="name")
+        loader.fill(church_id=church_id)
 
-        return jsonify({"data": active_checkins})
+        return jsonify({
+            "data": [_active_checkin(record, loader) for record in records],
+            "removed": removed,
+            "cursor": cursor,
+            "full": since is None,
+        })
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error getting active check-ins: {exc}")
         import traceback
@@ -482,39 +751,91 @@ def checkin_status(child_id: str):
         return jsonify({"error": "No church configured"}), 500
 
     try:
-        # Get most recent check-in record for today
-        today = datetime.utcnow().date().isoformat()
-        res = (
-            client.table("check_in_records")
-            .select("*")
-            .eq("child_id", child_id)
-            .eq("church_id", church_id)
-            .gte("timestamp_in", today)
-            .order("timestamp_in", desc=True)
-            .limit(1)
-            .execute()
-        )
-
-        if not res.data:
-            return jsonify({"data": {"status": "not_checked_in", "checkedIn": False}})
-
-        record = res.data[0]
-        has_checkout = record.get("timestamp_out") is not None
-
-        return jsonify({
-            "data": {
-                "status": "checked_out" if has_checkout else "checked_in",
-                "checkedIn": not has_checkout,
-                "checkedOut": has_checkout,
-                "timestampIn": record.get("timestamp_in"),
-                "timestampOut": record.get("timestamp_out"),
-            }
-        })
+        return jsonify({"data": _child_status(client, church_id, child_id)})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error getting check-in status: {exc}")
         return jsonify({"error": "Failed to get check-in status"}), 500
 
 
+def _child_status(client, church_id: str, child_id: str) -> dict:
+    """Status of the child's most recent check-in today."""
+    today = datetime.utcnow().date().isoformat()
+    res = (
+        client.table("check_in_records")
+        .select("*")
+        .eq("child_id", child_id)
+        .eq("church_id", church_id)
+        .gte("timestamp_in", today)
+        .order("timestamp_in", desc=True)
+        .limit(1)
+        .execute()
+    )
+
+    if not res.data:
+        return {"status": "not_checked_in", "checkedIn": False}
+
+    record = res.data[0]
+    has_checkout = record.get("timestamp_out") is not None
+    return {
+        "status": "checked_out" if has_checkout else "checked_in",
+        "checkedIn": not has_checkout,
+        "checkedOut": has_checkout,
+        "timestampIn": record.get("timestamp_in"),
+        "timestampOut": record.get("timestamp_out"),
+    }
+
+
+@checkin_bp.get("/stream")
+def stream_checkin_status():
+    """
+    Live check-in status as Server-Sent Events - Phase 4 from USER_CASE_FLOW.md
+    Streams checked_in, pickup_ready and checked_out events for one child
+    (child_id), one session (session_id) or the whole church, instead of
+    polling /status/<child_id> or /active. A child stream starts with the
+    child's current status. See utils/live_status.py.
+    """
+    child_id = request.args.get("child_id") or request.args.get("childId")
+    session_id = request.args.get("session_id") or request.args.get("sessionId")
+
+    client = get_supabase()
+    if client is None:
+        return jsonify({"error": "Supabase not configured"}), 500
+
+    church_id = get_default_church_id()
+    if church_id is None:
+        return jsonify({"error": "No church configured"}), 500
+
+    broker = get_status_broker()
+    if not broker.open_stream():
+        # Streams are capped per worker; past the cap clients keep polling
+        return jsonify({"error": "Too many live streams, poll instead"}), 503, {"Retry-After": "30"}
+
+    initial = None
+    if child_id:
+        try:
+            initial = json.dumps(_child_status(client, church_id, child_id))
+        except Exception as exc:  # pragma: no cover
+            broker.close_stream()
+            print(f"⚠️ Error getting check-in status: {exc}")
+            return jsonify({"error": "Failed to get check-in status"}), 500
+
+    response = Response(
+        stream_events(
+            broker,
+            church_id,
+            child_id=child_id,
+            session_id=session_id,
+            last_event_id=request.headers.get("Last-Event-ID"),
+            initial=initial,
+        ),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let proxies buffer events
+    response.call_on_close(broker.close_stream)
+    return response
+
+
 def _create_checkin_record(
     child_id: str,
     guardian_id: str | None,
@@ -527,6 +848,9 @@ def _create_checkin_record(
 ):
     """Helper to create check-in record in Supabase - Phase 3B.4 from USER_CASE_FLOW.md.
     Now supports linking to sessions and bookings.
+
+    Written by the check_in_child() function (migration 007) in one RPC call
+    and one transaction; without it, by one query per step.
     """
     client = get_supabase()
     if client is None:
@@ -541,125 +865,53 @@ def _create_checkin_record(
         return jsonify({"error": "teacher_id is required"}), 400
 
     try:
-        # Verify child exists
-        child_res = (
-            client.table("children")
-            .select("child_id, name, group_id")
-            .eq("child_id", child_id)
-            .eq("church_id", church_id)
-            .execute()
-        )
-        if not child_res.data:
-            return jsonify({"error": "Child not found"}), 404
-        child = child_res.data[0]
-
-        # Verify teacher/user exists in users table (required for foreign key)
-        try:
-            user_res = (
-                client.table("users")
-                .select("user_id, role")
-                .eq("user_id", teacher_id)
-                .eq("church_id", church_id)
-                .limit(1)
-                .execute()
-            )
-            if not user_res.data:
-                # User doesn't exist - this might be an admin checking in
-                # Try to find any user with admin or teacher role to use as fallback
-                fallback_user_res = (
-                    client.table("users")
-                    .select("user_id")
-                    .eq("church_id", church_id)
-                    .in_("role", ["Admin", "Teacher", "admin", "teacher"])
-                    .limit(1)
-                    .execute()
-                )
-                if fallback_user_res.data:
-                    teacher_id = fallback_user_res.data[0]["user_id"]
-                    print(f"⚠️ User {teacher_id} not found, using fallback teacher: {teacher_id}")
-                else:
-                    return jsonify({
-                        "error": "Teacher/User not found",
-                        "message": f"User ID {teacher_id} does not exist in the users table. Please ensure the user is registered."
-                    }), 404
-        except Exception as user_check_error:
-            print(f"⚠️ Error checking user existence: {user_check_error}")
-            import traceback
-            traceback.print_exc()
-            # Continue anyway - might work if user exists
-
-        # Create check-in record
-        record_data = {
-            "church_id": church_id,
-            "child_id": child_id,
-            "teacher_id": teacher_id,  # Required field
-            "method": method,
-            "timestamp_in": datetime.utcnow().isoformat(),
+        fields = {
+            "guardian_id": guardian_id,
+            "qr_code": qr_code,
+            "otp_code": otp_code,
+            "session_id": session_id,
+            "booking_id": booking_id,
         }
-        if guardian_id:
-            record_data["guardian_id"] = guardian_id
-        if qr_code:
-            record_data["qr_code"] = qr_code
-        if otp_code:
-            record_data["otp_code"] = otp_code
-        if session_id:
-            record_data["session_id"] = session_id
-        if booking_id:
-            record_data["booking_id"] = booking_id
-
         try:
-            res = client.table("check_in_records").insert(record_data).execute()
-            if not res.data:
-                return jsonify({"error": "Failed to create check-in record", "message": "Database insert returned no data"}), 500
-            record = res.data[0]
-        except Exception as insert_error:
-            print(f"⚠️ Error inserting check-in record: {insert_error}")
+            written = check_in_child(client, church_id, child_id, teacher_id, method, **fields)
+            if written is None:
+                written = _write_checkin_queries(client, church_id, child_id, teacher_id, method, **fields)
+        except Exception as write_error:
+            print(f"⚠️ Error inserting check-in record: {write_error}")
             import traceback
             traceback.print_exc()
-            error_msg = str(insert_error)
-            # Check for specific database errors
-            if "foreign key" in error_msg.lower() or "violates foreign key" in error_msg.lower():
-                if "teacher_id" in error_msg.lower() or "user_id" in error_msg.lower():
-                    return jsonify({
-                        "error": "Database constraint violation",
-                        "message": f"Teacher/User ID {teacher_id} does not exist in the users table. Please ensure the user is registered in the system.",
-                        "details": error_msg
-                    }), 400
-                elif "child_id" in error_msg.lower():
-                    return jsonify({
-                        "error": "Database constraint violation",
-                        "message": f"Child ID {child_id} does not exist in the children table.",
-                        "details": error_msg
-                    }), 400
-            # Check for UUID format errors
-            if "invalid input syntax for type uuid" in error_msg.lower() or "22P02" in error_msg:
-                return jsonify({
-                    "error": "Invalid UUID format",
-                    "message": "One or more IDs provided are not in valid UUID format. Please check child_id and teacher_id.",
-                    "details": error_msg
-                }), 400
-            return jsonify({
-                "error": "Failed to create check-in record",
-                "message": error_msg
-            }), 500
-
-        # Update booking status if booking_id exists
-        if booking_id:
-            try:
-                client.table("session_bookings").update({
-                    "status": "checked_in",
-                    "checked_in_at": datetime.utcnow().isoformat(),
-                }).eq("booking_id", booking_id).execute()
-            except Exception as e:
-                print(f"⚠️ Error updating booking status: {e}")
-                # Continue - check-in record is already created
+            return _checkin_write_error(write_error, child_id, teacher_id)
 
-        # Send notification to parent (Phase 3B.4)
-        notify_check_in(
+        if written.get("error") == "child_not_found":
+            return jsonify({"error": "Child not found"}), 404
+        if written.get("error") == "teacher_not_found":
+            return jsonify({
+                "error": "Teacher/User not found",
+                "message": f"User ID {teacher_id} does not exist in the users table. Please ensure the user is registered."
+            }), 404
+        record = written["record"]
+        child = written["child"]
+        if written["teacher_id"] != teacher_id:
+            print(f"⚠️ User {teacher_id} not found, using fallback teacher: {written['teacher_id']}")
+            teacher_id = written["teacher_id"]
+
+        # Send notification to parent in the background (Phase 3B.4)
+        dispatch_notification(
+            notify_check_in,
             child_id=child_id,
             guardian_id=guardian_id,
             child_name=child.get("name"),
         )
+        publish_status(
+            church_id, "checked_in", child_id,
+            recordId=record["record_id"],
+            childName=child.get("name"),
+            groupId=child.get("group_id"),
+            sessionId=session_id,
+            teacherId=teacher_id,
+            method=method,
+            timestampIn=record.get("timestamp_in"),
+        )
 
         return jsonify({
             "data": {
@@ -690,3 +942,129 @@ def _create_checkin_record(
             "message": error_msg
         }), 500
 
+
+def _write_checkin_queries(
+    client,
+    church_id: str,
+    child_id: str,
+    teacher_id: str,
+    method: str,
+    guardian_id: str | None = None,
+    qr_code: str | None = None,
+    otp_code: str | None = None,
+    session_id: str | None = None,
+    booking_id: str | None = None,
+) -> dict:
+    """check_in_child() one query at a time, for databases without migration 007.
+
+    Returns the same shape as the function: {"record", "child", "teacher_id"}
+    or {"error": ...}. Insert errors raise.
+    """
+    # Verify child exists
+    child_res = (
+        client.table("children")
+        .select("child_id, name, group_id")
+        .eq("child_id", child_id)
+        .eq("church_id", church_id)
+        .execute()
+    )
+    if not child_res.data:
+        return {"error": "child_not_found"}
+    child = child_res.data[0]
+
+    # Verify teacher/user exists in users table (required for foreign key)
+    try:
+        user_res = (
+            client.table("users")
+            .select("user_id, role")
+            .eq("user_id", teacher_id)
+            .eq("church_id", church_id)
+            .limit(1)
+            .execute()
+        )
+        if not user_res.data:
+            # User doesn't exist - this might be an admin checking in
+            # Try to find any user with admin or teacher role to use as fallback
+            fallback_user_res = (
+                client.table("users")
+                .select("user_id")
+                .eq("church_id", church_id)
+                .in_("role", ["Admin", "Teacher", "admin", "teacher"])
+                .limit(1)
+                .execute()
+            )
+            if not fallback_user_res.data:
+                return {"error": "teacher_not_found"}
+            teacher_id = fallback_user_res.data[0]["user_id"]
+    except Exception as user_check_error:
+        print(f"⚠️ Error checking user existence: {user_check_error}")
+        import traceback
+        traceback.print_exc()
+        # Continue anyway - might work if user exists
+
+    # Create check-in record
+    record_data = {
+        "church_id": church_id,
+        "child_id": child_id,
+        "teacher_id": teacher_id,  # Required field
+        "method": method,
+        "timestamp_in": datetime.utcnow().isoformat(),
+    }
+    if guardian_id:
+        record_data["guardian_id"] = guardian_id
+    if qr_code:
+        record_data["qr_code"] = qr_code
+    if otp_code:
+        record_data["otp_code"] = otp_code
+    if session_id:
+        record_data["session_id"] = session_id
+    if booking_id:
+        record_data["booking_id"] = booking_id
+
+    res = client.table("check_in_records").insert(record_data).execute()
+    if not res.data:
+        raise RuntimeError("Database insert returned no data")
+    record = res.data[0]
+
+    # Update booking status if booking_id exists
+    if booking_id:
+        try:
+            client.table("session_bookings").update({
+                "status": "checked_in",
+                "checked_in_at": datetime.utcnow().isoformat(),
+            }).eq("booking_id", booking_id).execute()
+        except Exception as e:
+            print(f"⚠️ Error updating booking status: {e}")
+            # Continue - check-in record is already created
+
+    return {"record": record, "child": child, "teacher_id": teacher_id}
+
+
+def _checkin_write_error(exc: Exception, child_id: str, teacher_id: str):
+    """Response for a failed check-in write."""
+    error_msg = str(exc)
+    # Check for specific database errors
+    if "foreign key" in error_msg.lower() or "violates foreign key" in error_msg.lower():
+        if "teacher_id" in error_msg.lower() or "user_id" in error_msg.lower():
+            return jsonify({
+                "error": "Database constraint violation",
+                "message": f"Teacher/User ID {teacher_id} does not exist in the users table. Please ensure the user is registered in the system.",
+                "details": error_msg
+            }), 400
+        elif "child_id" in error_msg.lower():
+            return jsonify({
+                "error": "Database constraint violation",
+                "message": f"Child ID {child_id} does not exist in the children table.",
+                "details": error_msg
+            }), 400
+    # Check for UUID format errors
+    if "invalid input syntax for type uuid" in error_msg.lower() or "22P02" in error_msg:
+        return jsonify({
+            "error": "Invalid UUID format",
+            "message": "One or more IDs provided are not in valid UUID format. Please check child_id and teacher_id.",
+            "details": error_msg
+        }), 400
+    return jsonify({
+        "error": "Failed to create check-in record",
+        "message": error_msg
+    }), 500
@@ -11,14 +11,19 @@ from flask import Blueprint, jsonify, request
 from supabase_client import get_supabase, get_default_church_id
 from utils.qr_codes import generate_qr_code, generate_otp_code, validate_qr_code
 from utils.notifications import notify_pickup_ready, notify_checkout_complete
+from utils.notification_queue import dispatch_notification
+from utils.code_store import get_code_store
+from utils.idempotency import idempotent
+from utils.live_status import publish_status
 
 checkout_bp = Blueprint("checkout", __name__)
 
-# In-memory store for pickup codes (temporary)
-pickup_codes_db: dict[str, dict] = {}  # {pickup_code: {child_id, guardian_id, expires_at}}
+# Shared expiring store for pickup codes (see utils/code_store.py)
+pickup_codes_db = get_code_store("pickup")  # {pickup_code: {child_id, guardian_id, expires_at}}
 
 
 @checkout_bp.post("/notify/<child_id>")
+@idempotent
 def send_pickup_notification(child_id: str):
     """
     Send pickup notification to parent - Phase 6A.2 from USER_CASE_FLOW.md
@@ -96,14 +101,23 @@ def send_pickup_notification(child_id: str):
             "expires_at": expires_at,
         }
 
-        # Send notification to parent (Phase 6A.2)
-        notify_pickup_ready(
+        # Send notification to parent in the background (Phase 6A.2)
+        dispatch_notification(
+            notify_pickup_ready,
             child_id=child_id,
             guardian_id=guardian_id,
             child_name=child.get("name"),
             pickup_qr=pickup_qr,
             pickup_otp=pickup_otp,
         )
+        # Pickup codes are never published, only that the child is ready
+        publish_status(
+            church_id, "pickup_ready", child_id,
+            recordId=checkin_record.get("record_id"),
+            childName=child.get("name"),
+            sessionId=checkin_record.get("session_id"),
+            expiresAt=expires_at.isoformat(),
+        )
 
         return jsonify({
             "data": {
@@ -122,6 +136,7 @@ def send_pickup_notification(child_id: str):
 
 
 @checkout_bp.post("/verify")
+@idempotent
 def verify_pickup():
     """
     Verify pickup identity (QR or OTP) - Phase 6A.3 from USER_CASE_FLOW.md
@@ -136,13 +151,11 @@ def verify_pickup():
 
     # Validate pickup code using utility
     is_valid, error_msg = validate_qr_code(pickup_code, pickup_codes_db)
-    if not is_valid:
-        if pickup_code in pickup_codes_db:
-            del pickup_codes_db[pickup_code]
+    code_data = pickup_codes_db.get(pickup_code)
+    if not is_valid or code_data is None:
+        pickup_codes_db.pop(pickup_code, None)
         return jsonify({"error": error_msg or "Invalid or expired pickup code"}), 401
 
-    code_data = pickup_codes_db[pickup_code]
-
     verified_child_id = code_data["child_id"]
     if child_id and child_id != verified_child_id:
         return jsonify({"error": "Pickup code does not match child"}), 400
@@ -196,6 +209,7 @@ def verify_pickup():
 
 
 @checkout_bp.post("/pickup-code/<child_id>")
+@idempotent
 def generate_pickup_code(child_id: str):
     """
     Generate pickup code for a child - Alternative endpoint.
@@ -204,6 +218,7 @@ def generate_pickup_code(child_id: str):
 
 
 @checkout_bp.post("/release/<child_id>")
+@idempotent
 def release_child(child_id: str):
     """
     Complete check-out and release child - Phase 6A.4 from USER_CASE_FLOW.md
@@ -289,21 +304,18 @@ def release_child(child_id: str):
             except Exception as e:
                 print(f"⚠️ Error updating booking status: {e}")
 
-        # Send confirmation notification (Phase 6A.4)
-        # Get child name for notification
-        child_res = (
-            client.table("children")
-            .select("name")
-            .eq("child_id", child_id)
-            .eq("church_id", church_id)
-            .execute()
-        )
-        child_name = child_res.data[0].get("name") if child_res.data else None
-        
-        notify_checkout_complete(
+        # Send confirmation notification in the background (Phase 6A.4)
+        dispatch_notification(
+            _notify_checkout_complete,
             child_id=child_id,
             guardian_id=guardian_id,
-            child_name=child_name,
+            church_id=church_id,
+        )
+        publish_status(
+            church_id, "checked_out", child_id,
+            recordId=record_id,
+            sessionId=session_id,
+            timestampOut=update_res.data[0].get("timestamp_out"),
         )
 
         return jsonify({
@@ -333,3 +345,150 @@ def release_child(child_id: str):
             "message": error_msg
         }), 500
 
+
+@checkout_bp.post("/release")
+@idempotent
+def release_children():
+    """
+    Release several children at once - Phase 6A.4 from USER_CASE_FLOW.md
+    End-of-session dismissal: closes every open check-in for a session (or a
+    list of children) with one update and reports a result per child.
+
+    Body: {session_id} or {child_ids: [...]}
+    """
+    data = request.get_json() or {}
+    session_id = data.get("session_id") or data.get("sessionId")
+    child_ids = data.get("child_ids") or data.get("childIds")
+
+    if not session_id and not child_ids:
+        return jsonify({"error": "session_id or child_ids is required"}), 400
+    if child_ids is not None and not isinstance(child_ids, list):
+        return jsonify({"error": "child_ids must be a list"}), 400
+
+    client = get_supabase()
+    if client is None:
+        return jsonify({"error": "Supabase not configured"}), 500
+
+    church_id = get_default_church_id()
+    if church_id is None:
+        return jsonify({"error": "No church configured"}), 500
+
+    try:
+        # Find every open check-in for today in one query
+        today = datetime.utcnow().date().isoformat()
+        query = (
+            client.table("check_in_records")
+            .select("record_id, child_id, guardian_id, booking_id, session_id, children(name)")
+            .eq("church_id", church_id)
+            .gte("timestamp_in", today)
+            .is_("timestamp_out", "null")
+        )
+        if session_id:
+            query = query.eq("session_id", session_id)
+        if child_ids:
+            query = query.in_("child_id", [str(c) for c in child_ids])
+        open_res = query.execute()
+
+        open_records = open_res.data or []
+        results: dict[str, dict] = {}
+        for child_id in child_ids or []:
+            results.setdefault(str(child_id), {
+                "childId": str(child_id),
+                "status": "failed",
+                "error": "Child is not checked in",
+            })
+
+        released_ids = set()
+        timestamp_out = datetime.utcnow().isoformat()
+        if open_records:
+            # Close them all with a single update; rows released concurrently are skipped
+            update_res = (
+                client.table("check_in_records")
+                .update({"timestamp_out": timestamp_out})
+                .in_("record_id", [r["record_id"] for r in open_records])
+                .is_("timestamp_out", "null")
+                .execute()
+            )
+            released_ids = {row["record_id"] for row in update_res.data or []}
+
+            booking_ids = [r["booking_id"] for r in open_records if r.get("booking_id") and r["record_id"] in released_ids]
+            if booking_ids:
+                try:
+                    client.table("session_bookings").update({
+                        "status": "checked_out",
+                        "checked_out_at": timestamp_out,
+                    }).in_("booking_id", booking_ids).execute()
+                except Exception as e:
+                    print(f"⚠️ Error updating booking status: {e}")
+
+        for record in open_records:
+            child_id = record["child_id"]
+            if results.get(child_id, {}).get("status") == "checked_out":
+                continue  # Extra open record for the same child
+            child_name = (record.get("children") or {}).get("name")
+            if record["record_id"] not in released_ids:
+                results[child_id] = {
+                    "childId": child_id,
+                    "childName": child_name,
+                    "status": "failed",
+                    "error": "Failed to update check-out record",
+                }
+                continue
+
+            results[child_id] = {
+                "childId": child_id,
+                "childName": child_name,
+                "recordId": record["record_id"],
+                "timestampOut": timestamp_out,
+                "status": "checked_out",
+                "sessionId": record.get("session_id"),
+                "bookingId": record.get("booking_id"),
+            }
+            # Send confirmation notification in the background (Phase 6A.4)
+            dispatch_notification(
+                notify_checkout_complete,
+                child_id=child_id,
+                guardian_id=record.get("guardian_id"),
+                child_name=child_name,
+            )
+            publish_status(
+                church_id, "checked_out", child_id,
+                recordId=record["record_id"],
+                childName=child_name,
+                sessionId=record.get("session_id"),
+                timestampOut=timestamp_out,
+            )
+
+        data_out = list(results.values())
+        return jsonify({
+            "data": data_out,
+            "sessionId": session_id,
+            "released": sum(1 for r in data_out if r["status"] == "checked_out"),
+            "failed": sum(1 for r in data_out if r["status"] == "failed"),
+        })
+    except Exception as exc:  # pragma: no cover
+        print(f"⚠️ Error releasing children: {exc}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Failed to release children", "message": str(exc)}), 500
+
+
+def _notify_checkout_complete(child_id: str, guardian_id: str | None, church_id: str):
+    """Look up the child's name and send the checkout notification (runs off the request)."""
+    client = get_supabase()
+    child_name = None
+    if client is not None:
+        child_res = (
+            client.table("children")
+            .select("name")
+            .eq("child_id", child_id)
+            .eq("church_id", church_id)
+            .execute()
+        )
+        child_name = child_res.data[0].get("name") if child_res.data else None
+
+    return notify_checkout_complete(
+        child_id=child_id,
+        guardian_id=guardian_id,
+        child_name=child_name,
+    )
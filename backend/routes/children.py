@@ -5,6 +5,7 @@ from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
 from utils.notifications import notify_child_approved, notify_child_rejected
+from utils.roster_cache import invalidate_rosters
 
 children_bp = Blueprint("children", __name__)
 
@@ -361,6 +362,7 @@ def create_child():
         created = client.table("children").insert(payload).execute()
         if not created.data:
             return jsonify({"error": "Failed to create child"}), 500
+        invalidate_rosters(church_id)
 
         row = created.data[0]
         
@@ -507,6 +509,7 @@ def update_child(child_id: str):
         )
         if not res.data:
             return jsonify({"error": "Child not found"}), 404
+        invalidate_rosters(church_id)
 
         # Return the updated child via get_child to keep consistent shape
         return get_child(child_id)
@@ -533,6 +536,7 @@ def delete_child(child_id: str):
             .eq("church_id", church_id)
             .execute()
         )
+        invalidate_rosters(church_id)
         if res.data is None:
             # supabase-py may return None for delete; treat as success
             return jsonify({"data": {"success": True}})
@@ -614,6 +618,7 @@ def approve_child(child_id: str):
         )
         if not res.data:
             return jsonify({"error": "Child not found"}), 404
+        invalidate_rosters(church_id)
         
         # Send approval notification
         if child_before.data:
@@ -657,6 +662,7 @@ def reject_child(child_id: str):
         
         # Delete the child record (rejection = deletion)
         client.table("children").delete().eq("child_id", child_id).eq("church_id", church_id).execute()
+        invalidate_rosters(church_id)
         
         # Send rejection notification
         if child_before.data:
@@ -0,0 +1,31 @@
+"""Debug Routes - Request tracing for operators (super admins only)"""
+
+from flask import Blueprint, jsonify, request
+
+from utils.auth import require_role
+from utils.query_trace import route_stats
+
+debug_bp = Blueprint("debug", __name__)
+
+
+@debug_bp.get("/slow-routes")
+def slow_routes():
+    """
+    Routes ordered by average latency, with PostgREST round trips per request
+    and the queries made by each route's slowest request.
+
+    Query params: limit (default 20), reset=true to clear after reading.
+    """
+    _, error, status = require_role(["super_admin"])
+    if error:
+        return error, status
+
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    data = route_stats.top(limit)
+    if request.args.get("reset", "").lower() == "true":
+        route_stats.reset()
+    return jsonify({"data": data})
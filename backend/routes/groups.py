@@ -6,6 +6,9 @@ Needed for auto-assignment by age in Phase 1.
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.dashboard_stats import group_dashboard_stats
+from utils.fanout import parallel_queries
+from utils.roster_cache import invalidate_rosters
 
 groups_bp = Blueprint("groups", __name__)
 
@@ -176,6 +179,7 @@ def update_group(group_id: str):
         )
         if not res.data:
             return jsonify({"error": "Group not found"}), 404
+        invalidate_rosters(church_id)
         return get_group(group_id)
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error updating group: {exc}")
@@ -201,6 +205,7 @@ def delete_group(group_id: str):
             .eq("church_id", church_id)
             .execute()
         )
+        invalidate_rosters(church_id)
         return jsonify({"data": {"success": True}})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error deleting group: {exc}")
@@ -218,41 +223,42 @@ def group_stats(group_id: str):
     if church_id is None:
         return jsonify({"error": "No church configured"}), 500
 
+    # One RPC round trip when migration 004 is applied
+    stats = group_dashboard_stats(church_id, group_id)
+    if stats is not None:
+        return jsonify({
+            "data": {
+                "groupId": group_id,
+                "groupName": stats["group"].get("name"),
+                "childrenCount": stats["children_count"],
+                "recentAttendance": stats["recent_attendance"],
+            }
+        })
+
     try:
-        # Get group info
-        group_res = (
+        # Group info, active children count and recent attendance summary
+        # are independent, so they are fetched concurrently
+        group_res, children_res, attendance_res = parallel_queries(
             client.table("groups")
             .select("*")
             .eq("group_id", group_id)
-            .eq("church_id", church_id)
-            .execute()
-        )
-        if not group_res.data:
-            return jsonify({"error": "Group not found"}), 404
-
-        # Count children in group
-        children_res = (
+            .eq("church_id", church_id),
             client.table("children")
             .select("child_id", count="exact")
             .eq("group_id", group_id)
             .eq("church_id", church_id)
-            .eq("status", "active")
-            .execute()
-        )
-        children_count = children_res.count if hasattr(children_res, "count") else len(children_res.data or [])
-
-        # Get recent attendance summary
-        from datetime import date
-        today = date.today().isoformat()
-        attendance_res = (
+            .eq("status", "active"),
             client.table("attendance_summary")
             .select("*")
             .eq("group_id", group_id)
             .eq("church_id", church_id)
             .order("date", desc=True)
-            .limit(7)
-            .execute()
+            .limit(7),
         )
+        if not group_res.data:
+            return jsonify({"error": "Group not found"}), 404
+
+        children_count = children_res.count if hasattr(children_res, "count") else len(children_res.data or [])
 
         return jsonify({
             "data": {
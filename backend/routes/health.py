@@ -7,7 +7,7 @@ health_bp = Blueprint("health", __name__, url_prefix="/api")
 @health_bp.get("/health")
 def health():
     """Simple health check endpoint used by render and local dev."""
-    from supabase_client import get_supabase, get_default_church_id
+    from supabase_client import get_supabase, get_default_church_id, get_church_id_cache_stats
     
     status = {
         "status": "ok",
@@ -26,6 +26,23 @@ def health():
     else:
         status["supabase"] = "not_configured"
         status["status"] = "degraded"
+
+    status["church_id_cache"] = get_church_id_cache_stats()
+
+    from utils.notification_queue import get_notification_queue
+    status["notification_queue"] = get_notification_queue().stats()
+
+    from utils.principal_cache import get_principal_cache
+    status["principal_cache"] = get_principal_cache().stats()
+
+    from utils.roster_cache import get_roster_cache
+    status["roster_cache"] = get_roster_cache().stats()
+
+    from utils.live_status import get_status_broker
+    status["live_status"] = get_status_broker().stats()
+
+    from utils.http_transport import get_transport_stats
+    status["supabase_transport"] = get_transport_stats()
     
     return jsonify(status)
 
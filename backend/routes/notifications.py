@@ -5,6 +5,7 @@ from datetime import datetime
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id, get_supabase_error_response, get_supabase_error_response
+from utils.pagination import get_page_args, fetch_page
 
 notifications_bp = Blueprint("notifications", __name__)
 
@@ -17,6 +18,11 @@ def list_notifications():
     user_id = request.args.get("user_id") or request.args.get("userId")  # Support user_id lookup
     unread_only = request.args.get("unread_only", "false").lower() == "true"
 
+    try:
+        limit, after = get_page_args(default_limit=50)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
     client = get_supabase()
     if client is None:
         error_response, status_code = get_supabase_error_response()
@@ -152,9 +158,9 @@ def list_notifications():
         if not guardian_id and not child_id and not user_id:
             return jsonify({"data": []})
 
-        res = query.order("created_at", desc=True).limit(50).execute()
+        rows, next_cursor = fetch_page(query, "created_at", "notification_id", limit, after)
         notifications = []
-        for row in res.data or []:
+        for row in rows:
             notifications.append({
                 "id": row["notification_id"],
                 "type": row.get("type", ""),
@@ -167,7 +173,7 @@ def list_notifications():
                 "createdAt": row.get("created_at"),
                 "sentAt": row.get("sent_at"),
             })
-        return jsonify({"data": notifications})
+        return jsonify({"data": notifications, "next_cursor": next_cursor})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error listing notifications: {exc}")
         return jsonify({"error": "Failed to list notifications"}), 500
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id, get_supabase_error_response
+from utils.fanout import parallel_queries
+from utils.roster_cache import invalidate_rosters
 
 # Note: Removed postgrest.desc import - using Python sorting instead
 
@@ -329,54 +331,70 @@ def get_parent_details(parent_id: str):
         return jsonify({"error": "No church configured"}), 500
 
     try:
-        # Try to find by guardian_id (UUID) first, then by parent_id (RS073)
-        res = (
-            client.table("guardians")
-            .select("*")
-            .eq("church_id", church_id)
-            .eq("guardian_id", parent_id)
-            .limit(1)
-            .execute()
-        )
-        
-        # If not found by UUID, try by parent_id (RS073)
-        if not res.data:
-            res = (
+        def guardian_query(column: str, value: str):
+            return (
                 client.table("guardians")
                 .select("*")
                 .eq("church_id", church_id)
-                .eq("parent_id", parent_id.upper())
+                .eq(column, value)
                 .limit(1)
-                .execute()
             )
 
+        def children_query(guardian_id: str, columns: str = "*, groups(name, group_id)"):
+            return (
+                client.table("children")
+                .select(columns)
+                .eq("parent_id", guardian_id)
+                .eq("church_id", church_id)
+            )
+
+        def checkins_query(guardian_id: str):
+            # Only records for this parent's children (inner join on the child's
+            # parent), so they don't wait for the children list
+            return (
+                client.table("check_in_records")
+                .select("*, children!inner(name, registration_id, parent_id), users(name)")
+                .eq("church_id", church_id)
+                .eq("children.parent_id", guardian_id)
+                .limit(100)  # Get more records to sort and take top 10
+            )
+
+        # Children and check-ins are keyed by guardian_id, so for a UUID the
+        # guardian, children and check-ins are fetched concurrently; a Parent ID
+        # (RS073) is resolved to its guardian first
+        import re
+        uuid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+        if uuid_pattern.match(parent_id):
+            res, children_res, checkin_res = parallel_queries(
+                guardian_query("guardian_id", parent_id),
+                children_query(parent_id),
+                checkins_query(parent_id),
+                return_exceptions=True,
+            )
+            if isinstance(res, Exception):
+                raise res
+        else:
+            res = guardian_query("parent_id", parent_id.upper()).execute()
+            children_res = checkin_res = None
+
         if not res.data:
             return jsonify({"error": "Parent not found"}), 404
 
         g = res.data[0]
         guardian_id = g["guardian_id"]
 
-        # Get all children for this parent
-        # Try with groups join, but fallback to without if it fails
-        try:
-            children_res = (
-                client.table("children")
-                .select("*, groups(name, group_id)")
-                .eq("parent_id", guardian_id)
-                .eq("church_id", church_id)
-                .execute()
-            )
-        except Exception as group_error:
-            print(f"⚠️ Warning: Could not fetch children with groups join: {group_error}")
-            # Fallback: fetch without groups join
-            children_res = (
-                client.table("children")
-                .select("*")
-                .eq("parent_id", guardian_id)
-                .eq("church_id", church_id)
-                .execute()
+        if children_res is None:
+            children_res, checkin_res = parallel_queries(
+                children_query(guardian_id),
+                checkins_query(guardian_id),
+                return_exceptions=True,
             )
 
+        # Fallback: fetch children without the groups join if it failed
+        if isinstance(children_res, Exception):
+            print(f"⚠️ Warning: Could not fetch children with groups join: {children_res}")
+            children_res = children_query(guardian_id, "*").execute()
+
         children = []
         for child in children_res.data or []:
             group = child.get("groups")
@@ -399,6 +417,8 @@ def get_parent_details(parent_id: str):
         # Try with joins, but handle gracefully if they fail
         recent_checkins = []
         try:
+            if isinstance(checkin_res, Exception):
+                raise checkin_res
             # Get all child IDs for this parent/guardian to ensure we only get their children's records
             child_ids = [c["id"] for c in children]
             
@@ -406,17 +426,6 @@ def get_parent_details(parent_id: str):
                 # No children, so no check-in records
                 recent_checkins = []
             else:
-                # Fetch check-in records ONLY for this parent's children
-                # This ensures we don't mix up data from different parents
-                checkin_res = (
-                    client.table("check_in_records")
-                    .select("*, children(name, registration_id, parent_id), users(name)")
-                    .eq("church_id", church_id)
-                    .in_("child_id", child_ids)  # Only get records for this parent's children
-                    .limit(100)  # Get more records to sort and take top 10
-                    .execute()
-                )
-                
                 # Filter and sort by timestamp_in descending
                 all_records = []
                 for record in checkin_res.data or []:
@@ -636,6 +645,7 @@ def update_parent(parent_id: str):
         if not updated.data:
             return jsonify({"error": "Failed to update parent"}), 500
 
+        invalidate_rosters(church_id)
         g = updated.data[0]
         parent = {
             "id": g["guardian_id"],
@@ -800,6 +810,7 @@ def delete_parent(parent_id: str):
         client.table("guardians").delete().eq("guardian_id", parent_id).eq(
             "church_id", church_id
         ).execute()
+        invalidate_rosters(church_id)
         return jsonify({"data": {"success": True}})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error deleting parent from Supabase: {exc}")
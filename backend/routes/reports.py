@@ -1,8 +1,13 @@
 """Reports Routes - For generating attendance and other reports"""
 
-from flask import Blueprint, jsonify, request
+from datetime import datetime, timedelta
+from itertools import chain
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.exports import ExportIncomplete, stream_csv, stream_xlsx
+from utils.pagination import iter_keyset
 
 reports_bp = Blueprint("reports", __name__)
 
@@ -59,8 +64,30 @@ def get_attendance_report():
 
 @reports_bp.get("/export")
 def export_report():
-    """Export report in specified format (CSV/Excel)."""
-    format_type = request.args.get("format", "csv")  # csv or excel
+    """
+    Export report in specified format (CSV/Excel) as a streamed download.
+
+    Query params:
+        format: csv (default) | excel | xlsx
+        type: attendance (attendance_summary, default) | checkins (check_in_records)
+        from / to: Optional YYYY-MM-DD bounds (inclusive)
+
+    Rows are read EXPORT_PAGE_SIZE at a time with keyset pagination and
+    written out as they arrive, so memory stays flat for any history length.
+    The first page is read before the response starts, so a failing query
+    is a 500; a page failing later ends the file with an "export
+    incomplete" marker (utils/exports.py).
+    """
+    # Older frontends send "?format=csv?format=csv&...": keep what precedes the second "?"
+    format_type = request.args.get("format", "csv").split("?", 1)[0].lower()  # csv or excel
+    report_type = request.args.get("type", "attendance").lower()
+    date_from = request.args.get("from")
+    date_to = request.args.get("to")
+
+    if format_type not in ("csv", "excel", "xlsx"):
+        return jsonify({"error": "format must be csv or excel"}), 400
+    if report_type not in EXPORTS:
+        return jsonify({"error": f"type must be one of: {', '.join(EXPORTS)}"}), 400
 
     client = get_supabase()
     if client is None:
@@ -70,36 +97,107 @@ def export_report():
     if church_id is None:
         return jsonify({"error": "No church configured"}), 500
 
-    try:
-        # Get attendance data
-        res = (
-            client.table("attendance_summary")
-            .select("*, groups(name)")
+    export = EXPORTS[report_type]
+    sort_column = export["sort"]
+
+    def build_query():
+        query = (
+            client.table(export["table"])
+            .select(export["columns"])
             .eq("church_id", church_id)
-            .order("date", desc=True)
-            .limit(1000)
-            .execute()
         )
-
-        # For now, return JSON (in production, generate CSV/Excel)
-        # Frontend can handle the conversion
-        reports = []
-        for row in res.data or []:
-            group_data = row.get("groups")
-            reports.append({
-                "date": row.get("date"),
-                "group": group_data.get("name") if group_data else None,
-                "present": row.get("present_count", 0),
-                "absent": row.get("absent_count", 0),
-            })
-
-        if format_type == "csv":
-            # Return as JSON, frontend can convert to CSV
-            return jsonify({"data": reports, "format": "csv"})
-        else:
-            # Return as JSON, frontend can convert to Excel
-            return jsonify({"data": reports, "format": "excel"})
+        if date_from:
+            query = query.gte(sort_column, date_from)
+        if date_to:
+            # Inclusive end date; timestamps on that day sort before the next day
+            query = query.lt(sort_column, _next_day(date_to)) if export["timestamp"] else query.lte(sort_column, date_to)
+        return query
+
+    pages = iter_keyset(build_query, sort_column, export["id"], page_size=EXPORT_PAGE_SIZE)
+    try:
+        first_page = next(pages, [])
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error exporting report: {exc}")
         return jsonify({"error": "Failed to export report"}), 500
 
+    def rows():
+        try:
+            for page in chain([first_page], pages):
+                for row in page:
+                    yield export["row"](row)
+        except Exception as exc:  # pragma: no cover
+            # Headers are already sent; mark the file as cut short
+            print(f"⚠️ Error exporting report: {exc}")
+            raise ExportIncomplete("a page of rows could not be read, download the report again") from exc
+
+    stamp = datetime.utcnow().strftime("%Y%m%d")
+    if format_type == "csv":
+        body = stream_csv(export["headers"], rows())
+        mimetype = "text/csv"
+        filename = f"{report_type}_report_{stamp}.csv"
+    else:
+        body = stream_xlsx(export["headers"], rows(), sheet_name=report_type.title())
+        mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        filename = f"{report_type}_report_{stamp}.xlsx"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no",  # don't let proxies buffer the whole file
+        },
+    )
+
+
+def _next_day(value: str) -> str:
+    try:
+        return (datetime.strptime(value[:10], "%Y-%m-%d") + timedelta(days=1)).date().isoformat()
+    except ValueError:
+        return value
+
+
+def _name(embedded) -> str | None:
+    return embedded.get("name") if isinstance(embedded, dict) else None
+
+
+# Export definitions: source table, keyset columns and row formatting
+EXPORT_PAGE_SIZE = 1000
+
+EXPORTS = {
+    "attendance": {
+        "table": "attendance_summary",
+        "columns": "summary_id, date, present_count, absent_count, groups(name)",
+        "sort": "date",
+        "id": "summary_id",
+        "timestamp": False,
+        "headers": ["Date", "Group", "Present", "Absent"],
+        "row": lambda r: [
+            r.get("date"),
+            _name(r.get("groups")),
+            r.get("present_count") or 0,
+            r.get("absent_count") or 0,
+        ],
+    },
+    "checkins": {
+        "table": "check_in_records",
+        "columns": (
+            "record_id, timestamp_in, timestamp_out, method, session_id, "
+            "children(name, registration_id), guardians(name), users(name)"
+        ),
+        "sort": "timestamp_in",
+        "id": "record_id",
+        "timestamp": True,
+        "headers": ["Check-In", "Check-Out", "Child", "Registration ID", "Guardian", "Teacher", "Method", "Session ID"],
+        "row": lambda r: [
+            r.get("timestamp_in"),
+            r.get("timestamp_out"),
+            _name(r.get("children")),
+            (r.get("children") or {}).get("registration_id"),
+            _name(r.get("guardians")),
+            _name(r.get("users")),
+            r.get("method"),
+            r.get("session_id"),
+        ],
+    },
+}
@@ -8,13 +8,54 @@ from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
 from utils.qr_codes import generate_qr_code, generate_otp_code
+from utils.batch_loader import get_batch_loader
+from utils.delta_sync import changed_after, get_since_arg, is_untracked, new_cursor, tombstones_query
+from utils.fanout import parallel_queries
+from utils.idempotency import idempotent
 
 session_bookings_bp = Blueprint("session_bookings", __name__)
 
 
+def _session_booking(row: dict, loader) -> dict:
+    """Shape of one row of GET /api/sessions/<id>/bookings."""
+    child = row.get("children")
+    guardian = row.get("guardians")
+    group_name = None
+    if child and child.get("group_id"):
+        group_name = loader.get("groups", "group_id", child.get("group_id"), {}).get("name")
+
+    return {
+        "id": row["booking_id"],
+        "session_id": row.get("session_id"),
+        "child_id": row.get("child_id"),
+        "child_name": child.get("name") if child else None,
+        "registration_id": child.get("registration_id") if child else None,
+        "date_of_birth": child.get("date_of_birth") if child else None,
+        "gender": child.get("gender") if child else None,
+        "group_id": child.get("group_id") if child else None,
+        "group_name": group_name,
+        "guardian_id": row.get("guardian_id"),
+        "guardian_name": guardian.get("name") if guardian else None,
+        "guardian_email": guardian.get("email") if guardian else None,
+        "guardian_phone": guardian.get("phone") if guardian else None,
+        "status": row.get("status", "booked"),
+        "qr_code": row.get("qr_code"),
+        "otp_code": row.get("otp_code"),
+        "booked_at": row.get("booked_at"),
+        "checked_in_at": row.get("checked_in_at"),
+        "checked_out_at": row.get("checked_out_at"),
+    }
+
+
 @session_bookings_bp.get("/sessions/<session_id>/bookings")
 def list_session_bookings(session_id: str):
-    """List all bookings for a specific session."""
+    """
+    List all bookings for a specific session.
+
+    With ?since=<cursor> only bookings made or changed since are returned
+    (cancelled and checked-out ones included, with their new status), and
+    `removed` lists deleted booking ids (see utils/delta_sync.py).
+    """
     client = get_supabase()
     if client is None:
         return jsonify({"error": "Supabase not configured"}), 500
@@ -24,76 +65,59 @@ def list_session_bookings(session_id: str):
         return jsonify({"error": "No church configured"}), 500
 
     try:
-        res = (
-            client.table("session_bookings")
-            .select("*, children(name, registration_id, group_id, date_of_birth, gender), guardians(name, email, phone)")
-            .eq("session_id", session_id)
-            .order("booked_at", desc=True)
-            .execute()
-        )
-        
-        bookings = []
-        group_ids = set()
-        child_group_map = {}
-        
-        # Collect group IDs to fetch separately
-        for row in res.data or []:
-            child = row.get("children")
-            if child and child.get("group_id"):
-                group_ids.add(child.get("group_id"))
-                child_group_map[row.get("child_id")] = child.get("group_id")
-        
+        since = get_since_arg()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    try:
+        cursor = new_cursor()
+
+        def bookings_query():
+            return (
+                client.table("session_bookings")
+                .select("*, children(name, registration_id, group_id, date_of_birth, gender), guardians(name, email, phone)")
+                .eq("session_id", session_id)
+            )
+
+        rows, removed = [], []
+        if since is not None:
+            changed_res, tombstones_res = parallel_queries(
+                bookings_query().gte("updated_at", changed_after(since)).order("booked_at", desc=True),
+                tombstones_query(client, "session_bookings", since, session_id=session_id),
+                return_exceptions=True,
+            )
+            failed = next((r for r in (changed_res, tombstones_res) if isinstance(r, Exception)), None)
+            if failed is None:
+                rows = changed_res.data or []
+                removed = [row.get("row_id") for row in tombstones_res.data or []]
+            elif is_untracked(failed):
+                since = None
+            else:
+                raise failed
+
+        if since is None:
+            rows = bookings_query().order("booked_at", desc=True).execute().data or []
+
         # Fetch groups in bulk
-        groups_map = {}
-        if group_ids:
-            try:
-                groups_res = (
-                    client.table("groups")
-                    .select("group_id, name")
-                    .in_("group_id", list(group_ids))
-                    .execute()
-                )
-                for group in groups_res.data or []:
-                    groups_map[group["group_id"]] = group.get("name")
-            except Exception as e:
-                print(f"⚠️ Warning: Could not fetch groups: {e}")
-        
-        for row in res.data or []:
+        loader = get_batch_loader()
+        for row in rows:
             child = row.get("children")
-            guardian = row.get("guardians")
-            group_name = None
-            if child and child.get("group_id"):
-                group_name = groups_map.get(child.get("group_id"))
-            
-            bookings.append({
-                "id": row["booking_id"],
-                "session_id": row.get("session_id"),
-                "child_id": row.get("child_id"),
-                "child_name": child.get("name") if child else None,
-                "registration_id": child.get("registration_id") if child else None,
-                "date_of_birth": child.get("date_of_birth") if child else None,
-                "gender": child.get("gender") if child else None,
-                "group_id": child.get("group_id") if child else None,
-                "group_name": group_name,
-                "guardian_id": row.get("guardian_id"),
-                "guardian_name": guardian.get("name") if guardian else None,
-                "guardian_email": guardian.get("email") if guardian else None,
-                "guardian_phone": guardian.get("phone") if guardian else None,
-                "status": row.get("status", "booked"),
-                "qr_code": row.get("qr_code"),
-                "otp_code": row.get("otp_code"),
-                "booked_at": row.get("booked_at"),
-                "checked_in_at": row.get("checked_in_at"),
-                "checked_out_at": row.get("checked_out_at"),
-            })
-        
-        return jsonify({"data": bookings})
+            loader.want("groups", "group_id", child.get("group_id") if child else None, columns="name")
+        loader.fill()
+
+        return jsonify({
+            "data": [_session_booking(row, loader) for row in rows],
+            "removed": removed,
+            "cursor": cursor,
+            "full": since is None,
+        })
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error listing session bookings: {exc}")
         return jsonify({"error": "Failed to list bookings"}), 500
 
 
 @session_bookings_bp.post("/sessions/<session_id>/book")
+@idempotent
 def book_session(session_id: str):
     """Book one or more children for a session."""
     data = request.get_json() or {}
@@ -256,6 +280,7 @@ def get_booking(booking_id: str):
 
 
 @session_bookings_bp.delete("/bookings/<booking_id>")
+@idempotent
 def cancel_booking(booking_id: str):
     """Cancel a booking."""
     client = get_supabase()
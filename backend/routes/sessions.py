@@ -1,10 +1,14 @@
 """Sessions Routes - For managing ministry sessions/events"""
 
 from datetime import datetime
+from typing import Optional
 
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.batch_loader import get_batch_loader
+from utils.pagination import get_page_args, fetch_ordered_page
+from utils.roster_cache import get_roster_cache, invalidate_rosters
 
 sessions_bp = Blueprint("sessions", __name__)
 
@@ -17,6 +21,11 @@ def list_sessions():
     year = request.args.get("year")
     month = request.args.get("month")
 
+    try:
+        limit, after = get_page_args(default_limit=100, keys=3)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
     client = get_supabase()
     if client is None:
         return jsonify({"error": "Supabase not configured"}), 500
@@ -63,33 +72,30 @@ def list_sessions():
             except ValueError:
                 return jsonify({"error": "Invalid year parameter"}), 400
 
-        res = query.order("session_date", desc=True).order("start_time", desc=False).limit(100).execute()
+        # Newest date first, then by start time (sessions without one last)
+        rows, next_cursor = fetch_ordered_page(
+            query,
+            [("session_date", True), ("start_time", False), ("session_id", False)],
+            limit,
+            after,
+            nullable=("start_time",),
+        )
+        
+        # Resolve teacher and creator names with one users query for the page
+        loader = get_batch_loader()
+        for row in rows:
+            loader.want("users", "user_id", row.get("teacher_id"), row.get("created_by"), columns="name")
+        loader.fill()
         
         sessions = []
-        for row in res.data or []:
+        for row in rows:
             group = row.get("groups")
             teacher_id = row.get("teacher_id")
             created_by_id = row.get("created_by")
-            
-            # Get teacher name if teacher_id exists
-            teacher_name = None
-            if teacher_id:
-                try:
-                    teacher_res = client.table("users").select("name").eq("user_id", teacher_id).execute()
-                    if teacher_res.data:
-                        teacher_name = teacher_res.data[0].get("name")
-                except:
-                    pass
-            
-            # Get creator name if created_by exists
-            created_by_name = None
-            if created_by_id:
-                try:
-                    creator_res = client.table("users").select("name").eq("user_id", created_by_id).execute()
-                    if creator_res.data:
-                        created_by_name = creator_res.data[0].get("name")
-                except:
-                    pass
+            teacher = loader.get("users", "user_id", teacher_id, {})
+            creator = loader.get("users", "user_id", created_by_id, {})
+            teacher_name = teacher.get("name")
+            created_by_name = creator.get("name")
             
             sessions.append({
                 "id": row["session_id"],
@@ -115,7 +121,7 @@ def list_sessions():
                 "created_at": row.get("created_at"),
             })
         
-        return jsonify({"data": sessions})
+        return jsonify({"data": sessions, "next_cursor": next_cursor})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error listing sessions: {exc}")
         return jsonify({"error": "Failed to list sessions"}), 500
@@ -209,14 +215,9 @@ def get_session(session_id: str):
         created_by_id = row.get("created_by")
         
         # Get teacher name separately
-        teacher_name = None
-        if teacher_id:
-            try:
-                teacher_res = client.table("users").select("name").eq("user_id", teacher_id).execute()
-                if teacher_res.data:
-                    teacher_name = teacher_res.data[0].get("name")
-            except:
-                pass
+        loader = get_batch_loader()
+        loader.want("users", "user_id", teacher_id, columns="name").fill()
+        teacher_name = loader.get("users", "user_id", teacher_id, {}).get("name")
         
         return jsonify({
             "data": {
@@ -297,6 +298,7 @@ def update_session(session_id: str):
         if not res.data:
             return jsonify({"error": "Session not found"}), 404
         
+        invalidate_rosters(church_id)
         return get_session(session_id)
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error updating session: {exc}")
@@ -322,6 +324,7 @@ def delete_session(session_id: str):
             .eq("church_id", church_id)
             .execute()
         )
+        invalidate_rosters(church_id)
         return jsonify({"data": {"success": True}})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error deleting session: {exc}")
@@ -404,6 +407,88 @@ def end_session(session_id: str):
         return jsonify({"error": "Failed to end session"}), 500
 
 
+def _eligible_children(client, church_id: str, session_id: str) -> Optional[list]:
+    """
+    Children eligible for the session (its group, and gender if restricted),
+    or None when the session does not exist. Rosters are served from memory
+    until a child, group, parent or the session changes (see
+    utils/roster_cache.py).
+    """
+    cache = get_roster_cache()
+    version = cache.version(church_id) if cache.ttl > 0 else ""
+
+    session = cache.get_session(church_id, session_id, version)
+    if session is None:
+        # Get session details
+        session_res = (
+            client.table("sessions")
+            .select("group_id, gender_restriction")
+            .eq("session_id", session_id)
+            .eq("church_id", church_id)
+            .execute()
+        )
+
+        if not session_res.data:
+            return None
+
+        session = session_res.data[0]
+        cache.set_session(church_id, session_id, version, session)
+
+    group_id = session.get("group_id")
+    gender_restriction = session.get("gender_restriction")
+
+    if not group_id:
+        return []
+
+    children = cache.get_roster(church_id, group_id, gender_restriction, version)
+    if children is not None:
+        return children
+
+    # Build query for children in the group
+    # Fetch children first, then get groups and guardians separately to avoid relationship ambiguity
+    query = (
+        client.table("children")
+        .select("child_id, registration_id, name, date_of_birth, gender, group_id, parent_id")
+        .eq("church_id", church_id)
+        .eq("group_id", group_id)
+    )
+
+    # Apply gender restriction if specified
+    if gender_restriction:
+        query = query.eq("gender", gender_restriction)
+
+    res = query.execute()
+
+    # Fetch groups and guardians in bulk
+    loader = get_batch_loader()
+    for row in res.data or []:
+        loader.want("groups", "group_id", row.get("group_id"), columns="name")
+        loader.want("guardians", "guardian_id", row.get("parent_id"), columns="name, parent_id")
+    loader.fill()
+
+    children = []
+    for row in res.data or []:
+        parent_id = row.get("parent_id")
+        group_id = row.get("group_id")
+        guardian_info = loader.get("guardians", "guardian_id", parent_id)
+
+        children.append({
+            "id": row["child_id"],
+            "registration_id": row.get("registration_id"),
+            "name": row.get("name"),
+            "date_of_birth": row.get("date_of_birth"),
+            "gender": row.get("gender"),
+            "group_id": group_id,
+            "group_name": loader.get("groups", "group_id", group_id, {}).get("name"),
+            "parent_id": parent_id,
+            "guardian_name": guardian_info.get("name") if guardian_info else None,
+            "parent_registration_id": guardian_info.get("parent_id") if guardian_info else None,
+        })
+
+    cache.set_roster(church_id, session["group_id"], gender_restriction, version, children)
+    return children
+
+
 @sessions_bp.get("/<session_id>/eligible-children")
 def get_eligible_children(session_id: str):
     """Auto-fetch children eligible for session based on group and gender restriction."""
@@ -416,101 +501,9 @@ def get_eligible_children(session_id: str):
         return jsonify({"error": "No church configured"}), 500
 
     try:
-        # Get session details
-        session_res = (
-            client.table("sessions")
-            .select("group_id, gender_restriction")
-            .eq("session_id", session_id)
-            .eq("church_id", church_id)
-            .execute()
-        )
-        
-        if not session_res.data:
+        children = _eligible_children(client, church_id, session_id)
+        if children is None:
             return jsonify({"error": "Session not found"}), 404
-        
-        session = session_res.data[0]
-        group_id = session.get("group_id")
-        gender_restriction = session.get("gender_restriction")
-        
-        if not group_id:
-            return jsonify({"data": []})
-        
-        # Build query for children in the group
-        # Fetch children first, then get groups and guardians separately to avoid relationship ambiguity
-        query = (
-            client.table("children")
-            .select("child_id, registration_id, name, date_of_birth, gender, group_id, parent_id")
-            .eq("church_id", church_id)
-            .eq("group_id", group_id)
-        )
-        
-        # Apply gender restriction if specified
-        if gender_restriction:
-            query = query.eq("gender", gender_restriction)
-        
-        res = query.execute()
-        
-        # Collect IDs for bulk fetching
-        group_ids = set()
-        guardian_ids = set()
-        for row in res.data or []:
-            if row.get("group_id"):
-                group_ids.add(row.get("group_id"))
-            if row.get("parent_id"):
-                guardian_ids.add(row.get("parent_id"))
-        
-        # Fetch groups in bulk
-        groups_map = {}
-        if group_ids:
-            try:
-                groups_res = (
-                    client.table("groups")
-                    .select("group_id, name")
-                    .in_("group_id", list(group_ids))
-                    .execute()
-                )
-                for group in groups_res.data or []:
-                    groups_map[group["group_id"]] = group.get("name")
-            except Exception as e:
-                print(f"⚠️ Warning: Could not fetch groups: {e}")
-        
-        # Fetch guardians in bulk
-        guardians_map = {}
-        if guardian_ids:
-            try:
-                guardians_res = (
-                    client.table("guardians")
-                    .select("guardian_id, name, parent_id")
-                    .in_("guardian_id", list(guardian_ids))
-                    .execute()
-                )
-                for guardian in guardians_res.data or []:
-                    guardians_map[guardian["guardian_id"]] = {
-                        "name": guardian.get("name"),
-                        "parent_id": guardian.get("parent_id"),
-                    }
-            except Exception as e:
-                print(f"⚠️ Warning: Could not fetch guardians: {e}")
-        
-        children = []
-        for row in res.data or []:
-            parent_id = row.get("parent_id")
-            group_id = row.get("group_id")
-            guardian_info = guardians_map.get(parent_id) if parent_id else None
-            
-            children.append({
-                "id": row["child_id"],
-                "registration_id": row.get("registration_id"),
-                "name": row.get("name"),
-                "date_of_birth": row.get("date_of_birth"),
-                "gender": row.get("gender"),
-                "group_id": group_id,
-                "group_name": groups_map.get(group_id) if group_id else None,
-                "parent_id": parent_id,
-                "guardian_name": guardian_info.get("name") if guardian_info else None,
-                "parent_registration_id": guardian_info.get("parent_id") if guardian_info else None,
-            })
-        
         return jsonify({"data": children})
     except Exception as exc:  # pragma: no cover
         import traceback
@@ -0,0 +1,632 @@
+"""
+Offline Sync Routes - Kiosk snapshot and batch upload of queued check-ins
+Phase 3B and 6A from USER_CASE_FLOW.md
+
+Church Wi-Fi drops during services, so check-in kiosks work from a local
+copy of the session and queue what they do while offline:
+
+- GET  /api/sync/sessions/<id>/snapshot  the session, its eligible roster,
+  bookings (with QR/OTP codes, so scans verify offline) and who is checked in
+- POST /api/sync/sessions/<id>/upload    the queued check-ins and check-outs
+
+Upload body:
+    {"teacher_id": "...", "events": [
+        {"key": "<unique per event>", "type": "check_in" | "check_out",
+         "child_id": "...", "at": "<ISO time on the kiosk>",
+         "method": "QR" | "OTP" | "PARENT_ID" | "manual", "code": "<QR or OTP>"}
+    ]}
+
+A batch is resolved in one pass: the session, teacher, children, bookings
+and the children's check-ins since the earliest event are read with
+concurrent set-based queries, the events are replayed per child in kiosk
+time order against that state, and the outcome is written set-based: one
+insert each for new bookings and records, then one apply_offline_sync()
+call (migration 008, utils/offline_writes.py) that closes the check-outs
+and moves the bookings, each row with its own kiosk time, guarded on the
+state read. Without the migration those guarded updates are sent one per
+distinct kiosk time instead. A record released online, or a booking
+cancelled, between the read and the write is left as it is. Each event
+comes back as
+- applied    written
+- duplicate  already done, e.g. the child was checked in (or released)
+  online meanwhile
+- rejected   with an error (unknown child, wrong code, stale event, ...)
+
+Results are kept under the event key in the shared code store
+(utils/code_store.py), so an upload retried after a timeout replays them
+instead of writing again. Responses carry a cursor for
+GET /api/checkin/active?since= (utils/delta_sync.py).
+
+Environment:
+    OFFLINE_SYNC_MAX_EVENTS     Events per upload (default: 500)
+    OFFLINE_SYNC_MAX_AGE_HOURS  Older events are rejected as stale (default: 24)
+    OFFLINE_SYNC_KEY_TTL_HOURS  How long event results are replayed (default: 48)
+"""
+
+import os
+import re
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import Blueprint, jsonify, request
+
+from routes.sessions import _eligible_children
+from supabase_client import get_supabase, get_default_church_id
+from utils.code_store import get_code_store
+from utils.delta_sync import new_cursor
+from utils.fanout import parallel_queries
+from utils.idempotency import idempotent
+from utils.live_status import publish_status
+from utils.offline_writes import apply_offline_sync
+from utils.notification_queue import dispatch_notification
+from utils.notifications import notify_check_in, notify_checkout_complete
+from utils.qr_codes import generate_otp_code
+
+sync_bp = Blueprint("sync", __name__)
+
+# Results of uploaded events, by church and event key
+sync_events_db = get_code_store("offline_sync")  # {church_id:key: {result, expires_at}}
+
+EVENT_TYPES = ("check_in", "check_out")
+METHODS = ("QR", "OTP", "PARENT_ID", "manual")
+
+# Booking statuses an offline event may move a booking from
+BOOKING_TRANSITIONS = {
+    "checked_in": ["booked", "checked_in", "checked_out"],
+    "checked_out": ["booked", "checked_in"],
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """ISO timestamp from a kiosk or the database as naive UTC, or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@sync_bp.get("/sessions/<session_id>/snapshot")
+def session_snapshot(session_id: str):
+    """
+    Everything a kiosk needs to check a session in and out offline.
+    Pair the cursor with GET /api/checkin/active?since= to catch up later.
+    """
+    client = get_supabase()
+    if client is None:
+        return jsonify({"error": "Supabase not configured"}), 500
+
+    church_id = get_default_church_id()
+    if church_id is None:
+        return jsonify({"error": "No church configured"}), 500
+
+    try:
+        cursor = new_cursor()
+        today = datetime.utcnow().date().isoformat()
+        session_res, bookings_res, records_res = parallel_queries(
+            client.table("sessions")
+            .select("session_id, title, session_date, start_time, end_time, status, group_id")
+            .eq("session_id", session_id)
+            .eq("church_id", church_id)
+            .limit(1),
+            client.table("session_bookings")
+            .select("booking_id, child_id, guardian_id, qr_code, otp_code, status, children(name, registration_id)")
+            .eq("session_id", session_id)
+            .neq("status", "cancelled"),
+            client.table("check_in_records")
+            .select("record_id, child_id, timestamp_in")
+            .eq("church_id", church_id)
+            .eq("session_id", session_id)
+            .gte("timestamp_in", today)
+            .is_("timestamp_out", "null"),
+        )
+        if not session_res.data:
+            return jsonify({"error": "Session not found"}), 404
+        session = session_res.data[0]
+
+        # Served from the roster cache on every kiosk after the first
+        roster = _eligible_children(client, church_id, session_id) or []
+
+        bookings = []
+        for row in bookings_res.data or []:
+            child = row.get("children") or {}
+            bookings.append({
+                "bookingId": row.get("booking_id"),
+                "childId": row.get("child_id"),
+                "childName": child.get("name"),
+                "registrationId": child.get("registration_id"),
+                "guardianId": row.get("guardian_id"),
+                "status": row.get("status"),
+                "qrCode": row.get("qr_code"),
+                "otpCode": row.get("otp_code"),
+            })
+
+        return jsonify({
+            "data": {
+                "session": {
+                    "sessionId": session.get("session_id"),
+                    "title": session.get("title"),
+                    "date": session.get("session_date"),
+                    "startTime": str(session.get("start_time")) if session.get("start_time") else None,
+                    "endTime": str(session.get("end_time")) if session.get("end_time") else None,
+                    "status": session.get("status"),
+                    "groupId": session.get("group_id"),
+                },
+                "children": [
+                    {
+                        "childId": child.get("id"),
+                        "name": child.get("name"),
+                        "registrationId": child.get("registration_id"),
+                        "guardianId": child.get("parent_id"),
+                        "guardianName": child.get("guardian_name"),
+                        "parentId": child.get("parent_registration_id"),
+                    }
+                    for child in roster
+                ],
+                "bookings": bookings,
+                "checkedIn": [
+                    {
+                        "recordId": row.get("record_id"),
+                        "childId": row.get("child_id"),
+                        "timestampIn": row.get("timestamp_in"),
+                    }
+                    for row in records_res.data or []
+                ],
+            },
+            "cursor": cursor,
+            "generatedAt": datetime.utcnow().isoformat(),
+        })
+    except Exception as exc:  # pragma: no cover
+        print(f"⚠️ Error building session snapshot: {exc}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Failed to build session snapshot"}), 500
+
+
+@sync_bp.post("/sessions/<session_id>/upload")
+@idempotent
+def upload_events(session_id: str):
+    """
+    Apply check-ins and check-outs queued by a kiosk while it was offline.
+    Returns a result per event, in request order.
+    """
+    data = request.get_json() or {}
+    teacher_id = data.get("teacher_id") or data.get("teacherId")
+    events = data.get("events")
+
+    if not teacher_id:
+        return jsonify({"error": "teacher_id is required", "message": "Please provide a valid teacher/user ID"}), 400
+    if not isinstance(events, list) or not events:
+        return jsonify({"error": "events must be a non-empty list"}), 400
+    max_events = int(_env_float("OFFLINE_SYNC_MAX_EVENTS", 500))
+    if len(events) > max_events:
+        return jsonify({"error": f"At most {max_events} events per upload"}), 400
+
+    uuid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+    for label, value in (("session_id", session_id), ("teacher_id", teacher_id)):
+        if not uuid_pattern.match(str(value)):
+            return jsonify({
+                "error": f"Invalid {label} format",
+                "message": f"{label} must be a valid UUID format. Received: {value}"
+            }), 400
+
+    client = get_supabase()
+    if client is None:
+        return jsonify({"error": "Supabase not configured"}), 500
+
+    church_id = get_default_church_id()
+    if church_id is None:
+        return jsonify({"error": "No church configured"}), 500
+
+    cursor = new_cursor()
+    now = datetime.utcnow()
+    oldest = now - timedelta(hours=_env_float("OFFLINE_SYNC_MAX_AGE_HOURS", 24))
+    expires_at = now + timedelta(hours=_env_float("OFFLINE_SYNC_KEY_TTL_HOURS", 48))
+
+    # Validate every event and replay the ones already applied
+    results: list[dict] = []
+    pending: list[dict] = []
+    seen_keys = set()
+    for event in events:
+        event = event if isinstance(event, dict) else {}
+        key = str(event.get("key") or "")
+        child_id = str(event.get("child_id") or event.get("childId") or "")
+        method = event.get("method") or "PARENT_ID"
+        at = _parse_time(event.get("at"))
+        result = {"key": key or None, "type": event.get("type"), "childId": child_id or None}
+        results.append(result)
+
+        error = None
+        if not key or len(key) > 128:
+            error = "key is required (at most 128 characters)"
+        elif key in seen_keys:
+            error = "Duplicate key in this upload"
+        elif result["type"] not in EVENT_TYPES:
+            error = "type must be check_in or check_out"
+        elif not uuid_pattern.match(child_id):
+            error = "Invalid child_id format"
+        elif at is None:
+            error = "at must be an ISO timestamp"
+        elif at < oldest:
+            error = "Event is too old to apply"
+        elif method not in METHODS:
+            error = f"method must be one of {', '.join(METHODS)}"
+        seen_keys.add(key)
+        if error:
+            result.update({"status": "rejected", "error": error})
+            continue
+
+        stored = sync_events_db.get(f"{church_id}:{key}")
+        if stored is not None and now < stored["expires_at"]:
+            result.update(stored["result"])
+            result["replayed"] = True
+            continue
+
+        pending.append({
+            "result": result,
+            "key": key,
+            "type": result["type"],
+            "child_id": child_id,
+            # Kiosk clocks run fast too; nothing is recorded in the future
+            "at": min(at, now),
+            "method": method,
+            "code": str(event.get("code") or ""),
+        })
+
+    try:
+        applied: list[tuple[str, dict, dict]] = []
+        failed_rows = set()
+        closed_online = set()
+        children: dict = {}
+        if pending:
+            child_ids = sorted({event["child_id"] for event in pending})
+            since = min(event["at"] for event in pending).date().isoformat()
+            session_res, user_res, children_res, bookings_res, records_res = parallel_queries(
+                client.table("sessions")
+                .select("session_id")
+                .eq("session_id", session_id)
+                .eq("church_id", church_id)
+                .limit(1),
+                client.table("users")
+                .select("user_id")
+                .eq("user_id", teacher_id)
+                .eq("church_id", church_id)
+                .limit(1),
+                client.table("children")
+                .select("child_id, name, parent_id, group_id")
+                .eq("church_id", church_id)
+                .in_("child_id", child_ids),
+                client.table("session_bookings")
+                .select("*")
+                .eq("session_id", session_id)
+                .in_("child_id", child_ids),
+                client.table("check_in_records")
+                .select("*")
+                .eq("church_id", church_id)
+                .in_("child_id", child_ids)
+                .gte("timestamp_in", since),
+            )
+            if not session_res.data:
+                return jsonify({"error": "Session not found"}), 404
+            if not user_res.data:
+                return jsonify({
+                    "error": "Teacher/User not found",
+                    "message": f"User ID {teacher_id} does not exist in the users table. Please ensure the user is registered."
+                }), 404
+
+            children = {row["child_id"]: row for row in children_res.data or []}
+            # Cancelled bookings are kept so they are not inserted again:
+            # (session_id, child_id) is unique
+            bookings = {row["child_id"]: row for row in bookings_res.data or []}
+            history: dict[str, list[dict]] = {}
+            for row in sorted(records_res.data or [], key=lambda r: _parse_time(r.get("timestamp_in")) or datetime.min):
+                history.setdefault(row["child_id"], []).append(row)
+
+            applied, failed_rows, closed_online = _resolve_and_write(
+                client, church_id, session_id, teacher_id, pending, children, bookings, history,
+            )
+
+        unsaved = set()
+        for kind, event, row in applied:
+            result = event["result"]
+            if row["record_id"] in failed_rows:
+                # Not remembered, so the kiosk's next upload applies it
+                unsaved.add(event["key"])
+                result.update({"status": "rejected", "error": "Failed to save, upload the event again"})
+                result.pop("recordId", None)
+                continue
+            if row["record_id"] in closed_online:
+                # Released online between the read and the write
+                result.update({"status": "duplicate", "error": "Child is already checked out"})
+                result.pop("timestampOut", None)
+                continue
+            child = children.get(event["child_id"]) or {}
+            if kind == "checked_in":
+                # Send notification to parent in the background (Phase 3B.4)
+                dispatch_notification(
+                    notify_check_in,
+                    child_id=event["child_id"],
+                    guardian_id=row.get("guardian_id"),
+                    child_name=child.get("name"),
+                )
+                publish_status(
+                    church_id, "checked_in", event["child_id"],
+                    recordId=row["record_id"],
+                    childName=child.get("name"),
+                    groupId=child.get("group_id"),
+                    sessionId=session_id,
+                    teacherId=teacher_id,
+                    method=event["method"],
+                    timestampIn=result.get("timestampIn"),
+                )
+            else:
+                dispatch_notification(
+                    notify_checkout_complete,
+                    child_id=event["child_id"],
+                    guardian_id=row.get("guardian_id"),
+                    child_name=child.get("name"),
+                )
+                publish_status(
+                    church_id, "checked_out", event["child_id"],
+                    recordId=row["record_id"],
+                    childName=child.get("name"),
+                    sessionId=row.get("session_id"),
+                    timestampOut=result.get("timestampOut"),
+                )
+
+        for event in pending:
+            if event["key"] in unsaved:
+                continue
+            try:
+                sync_events_db[f"{church_id}:{event['key']}"] = {
+                    "result": dict(event["result"]),
+                    "expires_at": expires_at,
+                }
+            except Exception as exc:  # pragma: no cover - replay is best effort
+                print(f"⚠️ Error storing offline sync result: {exc}")
+
+        return jsonify({
+            "data": results,
+            "sessionId": session_id,
+            "applied": sum(1 for r in results if r.get("status") == "applied" and not r.get("replayed")),
+            "duplicates": sum(1 for r in results if r.get("status") == "duplicate" and not r.get("replayed")),
+            "rejected": sum(1 for r in results if r.get("status") == "rejected" and not r.get("replayed")),
+            "replayed": sum(1 for r in results if r.get("replayed")),
+            "cursor": cursor,
+        })
+    except Exception as exc:  # pragma: no cover
+        print(f"⚠️ Error applying offline sync upload: {exc}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Failed to apply offline events", "message": str(exc)}), 500
+
+
+def _resolve_and_write(
+    client,
+    church_id: str,
+    session_id: str,
+    teacher_id: str,
+    pending: list[dict],
+    children: dict,
+    bookings: dict,
+    history: dict,
+) -> tuple[list[tuple[str, dict, dict]], set, set]:
+    """
+    Replay the events in kiosk time order against the state read for the
+    batch, then write the outcome set-based.
+
+    Returns:
+        (applied, failed_rows, closed_online): ("checked_in" | "checked_out",
+        event, record) per applied event, the record ids whose write failed,
+        and the records a check-out found already closed (or deleted)
+    """
+    new_bookings: dict[str, dict] = {}
+    new_records: dict[str, dict] = {}
+    closed: dict[str, dict] = {}
+    booking_changes: dict[str, dict] = {}
+    applied: list[tuple[str, dict, dict]] = []
+
+    def timestamp_out(row: dict) -> Optional[datetime]:
+        return _parse_time(row.get("timestamp_out"))
+
+    for event in sorted(pending, key=lambda e: e["at"]):
+        result = event["result"]
+        child_id = event["child_id"]
+        at = event["at"]
+        child = children.get(child_id)
+        if child is None:
+            result.update({"status": "rejected", "error": "Child not found"})
+            continue
+        records = history.setdefault(child_id, [])
+        booking = bookings.get(child_id)
+        cancelled = booking is not None and booking.get("status") == "cancelled"
+
+        if event["type"] == "check_in":
+            if event["method"] in ("QR", "OTP"):
+                expected = None if cancelled else (booking or {}).get("qr_code" if event["method"] == "QR" else "otp_code")
+                if not expected or event["code"] != expected:
+                    result.update({"status": "rejected", "error": f"Invalid {event['method']} code for this session"})
+                    continue
+
+            # Checked in at that time or later (online or by an earlier event)
+            current = next((r for r in reversed(records) if timestamp_out(r) is None or timestamp_out(r) >= at), None)
+            if current is not None:
+                result.update({
+                    "status": "duplicate",
+                    "error": "Child is already checked in",
+                    "recordId": current["record_id"],
+                })
+                continue
+
+            guardian_id = (booking or {}).get("guardian_id") or child.get("parent_id")
+            if cancelled:
+                # Cancelled online: the child is recorded but the booking stays cancelled
+                booking = None
+            elif booking is None:
+                booking = bookings[child_id] = new_bookings[child_id] = {
+                    "booking_id": str(uuid.uuid4()),
+                    "session_id": session_id,
+                    "child_id": child_id,
+                    "guardian_id": guardian_id,
+                    "qr_code": secrets.token_urlsafe(32),
+                    "otp_code": generate_otp_code(),
+                    "status": "booked",
+                }
+            row = {
+                "record_id": str(uuid.uuid4()),
+                "church_id": church_id,
+                "child_id": child_id,
+                "teacher_id": teacher_id,
+                "method": event["method"],
+                "timestamp_in": at.isoformat(),
+                "session_id": session_id,
+            }
+            if booking is not None:
+                row["booking_id"] = booking["booking_id"]
+            if guardian_id:
+                row["guardian_id"] = guardian_id
+            if event["method"] == "QR":
+                row["qr_code"] = event["code"]
+            elif event["method"] == "OTP":
+                row["otp_code"] = event["code"]
+            records.append(row)
+            new_records[row["record_id"]] = row
+            if booking is not None:
+                booking_changes[booking["booking_id"]] = {"status": "checked_in", "checked_in_at": row["timestamp_in"]}
+            result.update({"status": "applied", "recordId": row["record_id"], "timestampIn": row["timestamp_in"]})
+            applied.append(("checked_in", event, row))
+            continue
+
+        open_row = next((r for r in reversed(records) if r.get("timestamp_out") is None), None)
+        if open_row is not None and (_parse_time(open_row.get("timestamp_in")) or at) <= at:
+            open_row["timestamp_out"] = at.isoformat()
+            if open_row["record_id"] not in new_records:
+                closed[open_row["record_id"]] = open_row
+            if booking is not None and open_row.get("booking_id") == booking["booking_id"]:
+                booking_changes[booking["booking_id"]] = {
+                    "status": "checked_out",
+                    "checked_out_at": open_row["timestamp_out"],
+                }
+            result.update({"status": "applied", "recordId": open_row["record_id"], "timestampOut": open_row["timestamp_out"]})
+            applied.append(("checked_out", event, open_row))
+            continue
+
+        earlier = [r for r in records if timestamp_out(r) is not None and (_parse_time(r.get("timestamp_in")) or at) <= at]
+        if earlier:
+            result.update({
+                "status": "duplicate",
+                "error": "Child is already checked out",
+                "recordId": earlier[-1]["record_id"],
+            })
+        elif open_row is not None:
+            result.update({"status": "rejected", "error": "Child was checked in again after this check-out"})
+        else:
+            result.update({"status": "rejected", "error": "Child is not checked in"})
+
+    failed_rows = set()
+    new_booking_ids = {b["booking_id"] for b in new_bookings.values()}
+
+    # New bookings carry their final status, so they are written once
+    if new_bookings:
+        rows = [dict(b, **booking_changes.pop(b["booking_id"], {})) for b in new_bookings.values()]
+        try:
+            client.table("session_bookings").insert(rows).execute()
+        except Exception as e:
+            print(f"⚠️ Error creating bookings: {e}")
+            # Continue without booking_id - check-ins will still work
+            for row in new_records.values():
+                if any(row["booking_id"] == b["booking_id"] for b in rows):
+                    row.pop("booking_id")
+
+    if new_records:
+        try:
+            client.table("check_in_records").insert(list(new_records.values())).execute()
+        except Exception as insert_error:
+            print(f"⚠️ Error inserting offline check-in records: {insert_error}")
+            failed_rows.update(new_records)
+
+    # Closes and booking changes only set the changed columns, guarded on the
+    # state they expect, so rows changed online since the read are kept
+    closes = [{"record_id": record_id, "timestamp_out": row["timestamp_out"]} for record_id, row in closed.items()]
+    updates = [
+        dict(changes, booking_id=booking_id)
+        for booking_id, changes in booking_changes.items()
+        if booking_id not in new_booking_ids
+    ]
+    closed_online = set()
+    if not closes and not updates:
+        return applied, failed_rows, closed_online
+
+    try:
+        written = apply_offline_sync(client, church_id, closes, updates)
+    except Exception as e:
+        print(f"⚠️ Error writing offline check-outs and bookings: {e}")
+        failed_rows.update(closed)
+        return applied, failed_rows, closed_online
+    if written is None:
+        failed_closes, written = _write_per_timestamp(client, closes, updates)
+        failed_rows.update(failed_closes)
+    closed_online.update(set(closed) - failed_rows - set(written.get("closed") or []))
+
+    return applied, failed_rows, closed_online
+
+
+def _write_per_timestamp(client, closes: list[dict], updates: list[dict]) -> tuple[set, dict]:
+    """
+    apply_offline_sync() as guarded updates, one per distinct kiosk time,
+    for databases without migration 008.
+
+    Returns:
+        (failed record ids, {"closed": [record ids updated]})
+    """
+    close_groups: dict[str, list[str]] = {}
+    for close in closes:
+        close_groups.setdefault(close["timestamp_out"], []).append(close["record_id"])
+    booking_groups: dict[tuple, list[str]] = {}
+    for update in updates:
+        changes = {k: v for k, v in update.items() if k != "booking_id"}
+        booking_groups.setdefault(tuple(sorted(changes.items())), []).append(update["booking_id"])
+
+    outcomes = parallel_queries(
+        *(
+            client.table("check_in_records")
+            .update({"timestamp_out": at})
+            .in_("record_id", ids)
+            .is_("timestamp_out", "null")
+            for at, ids in close_groups.items()
+        ),
+        *(
+            client.table("session_bookings")
+            .update(dict(changes))
+            .in_("booking_id", ids)
+            .in_("status", BOOKING_TRANSITIONS[dict(changes)["status"]])
+            for changes, ids in booking_groups.items()
+        ),
+        return_exceptions=True,
+    )
+
+    failed, updated = set(), []
+    for ids, res in zip(close_groups.values(), outcomes[:len(close_groups)]):
+        if isinstance(res, Exception):
+            print(f"⚠️ Error closing offline check-out records: {res}")
+            failed.update(ids)
+        else:
+            updated.extend(row["record_id"] for row in res.data or [])
+    for res in outcomes[len(close_groups):]:
+        if isinstance(res, Exception):
+            print(f"⚠️ Error updating booking status: {res}")
+            # Continue - check-in records are already written
+    return failed, {"closed": updated}
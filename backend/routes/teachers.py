@@ -8,6 +8,8 @@ from datetime import datetime
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.dashboard_stats import teacher_dashboard_stats
+from utils.fanout import parallel_queries
 
 teachers_bp = Blueprint("teachers", __name__)
 
@@ -210,39 +212,42 @@ def teacher_dashboard():
     if church_id is None:
         return jsonify({"error": "No church configured"}), 500
 
+    # One RPC round trip when migration 004 is applied
+    stats = teacher_dashboard_stats(church_id, teacher_id)
+    if stats is not None:
+        return jsonify({
+            "data": {
+                "teacherId": teacher_id,
+                "groups": stats["groups"],
+                "groupsCount": len(stats["groups"]),
+                "checkInsToday": stats["checkins_today"],
+                "activeCheckIns": stats["active_checkins"],
+            }
+        })
+
     try:
-        # Get groups
-        groups_res = (
+        today = datetime.utcnow().date().isoformat()
+        # Groups, today's check-ins and active check-ins (not checked out)
+        # are independent, so they are fetched concurrently
+        groups_res, checkins_res, active_checkins_res = parallel_queries(
             client.table("groups")
             .select("group_id, name")
             .eq("church_id", church_id)
-            .eq("teacher_id", teacher_id)
-            .execute()
-        )
-        groups = groups_res.data or []
-
-        # Get today's check-ins
-        today = datetime.utcnow().date().isoformat()
-        checkins_res = (
+            .eq("teacher_id", teacher_id),
             client.table("check_in_records")
             .select("record_id", count="exact")
             .eq("church_id", church_id)
             .eq("teacher_id", teacher_id)
-            .gte("timestamp_in", today)
-            .execute()
-        )
-        checkins_today = checkins_res.count if hasattr(checkins_res, "count") else len(checkins_res.data or [])
-
-        # Get active check-ins (not checked out)
-        active_checkins_res = (
+            .gte("timestamp_in", today),
             client.table("check_in_records")
             .select("record_id", count="exact")
             .eq("church_id", church_id)
             .eq("teacher_id", teacher_id)
             .gte("timestamp_in", today)
-            .is_("timestamp_out", "null")
-            .execute()
+            .is_("timestamp_out", "null"),
         )
+        groups = groups_res.data or []
+        checkins_today = checkins_res.count if hasattr(checkins_res, "count") else len(checkins_res.data or [])
         active_checkins = active_checkins_res.count if hasattr(active_checkins_res, "count") else len(active_checkins_res.data or [])
 
         return jsonify({
@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
+from utils.attendance_rollup import count_child_checkins
+from utils.fanout import parallel_queries
 
 teens_bp = Blueprint("teens", __name__)
 
@@ -209,19 +211,21 @@ def get_teen_stats():
         
         child_id = user_res.data[0]["linked_child_id"]
 
-        # Get attendance for last 30 days
+        # Get attendance for last 30 days from the rollup (migration 005)
         thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
-        res = (
-            client.table("check_in_records")
-            .select("record_id")
-            .eq("child_id", child_id)
-            .eq("church_id", church_id)
-            .gte("timestamp_in", thirty_days_ago)
-            .execute()
-        )
-        
+        attended = count_child_checkins(church_id, child_id, thirty_days_ago)
+        if attended is None:
+            res = (
+                client.table("check_in_records")
+                .select("record_id")
+                .eq("child_id", child_id)
+                .eq("church_id", church_id)
+                .gte("timestamp_in", thirty_days_ago)
+                .execute()
+            )
+            attended = len(res.data or [])
+
         total_sessions = 30  # Assuming sessions happen regularly
-        attended = len(res.data or [])
         attendance_rate = (attended / total_sessions * 100) if total_sessions > 0 else 0
 
         return jsonify({
@@ -380,7 +384,9 @@ def submit_teen_attendance():
 
         # Send notification to parent
         from utils.notifications import notify_check_in
-        notify_check_in(
+        from utils.notification_queue import dispatch_notification
+        dispatch_notification(
+            notify_check_in,
             child_id=child_id,
             guardian_id=guardian_id,
             child_name=child.get("name"),
@@ -448,13 +454,25 @@ def teen_dashboard():
         if not child_id:
             return jsonify({"error": "Teen account not linked to a child"}), 404
 
-        # Get child profile
-        child_res = (
+        # Child profile, recent attendance (last 10) and stats (last 30 days)
+        # only need the linked child id, so they are fetched concurrently
+        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
+        child_res, attendance_res, stats_res = parallel_queries(
             client.table("children")
             .select("*, groups(name), guardians(name, email)")
             .eq("child_id", child_id)
+            .eq("church_id", church_id),
+            client.table("check_in_records")
+            .select("*, groups(name)")
+            .eq("child_id", child_id)
             .eq("church_id", church_id)
-            .execute()
+            .order("timestamp_in", desc=True)
+            .limit(10),
+            client.table("check_in_records")
+            .select("record_id")
+            .eq("child_id", child_id)
+            .eq("church_id", church_id)
+            .gte("timestamp_in", thirty_days_ago),
         )
         
         if not child_res.data:
@@ -466,17 +484,6 @@ def teen_dashboard():
         
         from routes.children import _calculate_age
         
-        # Get recent attendance (last 10)
-        attendance_res = (
-            client.table("check_in_records")
-            .select("*, groups(name)")
-            .eq("child_id", child_id)
-            .eq("church_id", church_id)
-            .order("timestamp_in", desc=True)
-            .limit(10)
-            .execute()
-        )
-        
         recent_attendance = []
         for row in attendance_res.data or []:
             att_group = row.get("groups")
@@ -489,17 +496,6 @@ def teen_dashboard():
                 "checkedOut": row.get("timestamp_out") is not None,
             })
         
-        # Get stats (last 30 days)
-        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
-        stats_res = (
-            client.table("check_in_records")
-            .select("record_id")
-            .eq("child_id", child_id)
-            .eq("church_id", church_id)
-            .gte("timestamp_in", thirty_days_ago)
-            .execute()
-        )
-        
         attended = len(stats_res.data or [])
         attendance_rate = (attended / 30 * 100) if attended > 0 else 0
 
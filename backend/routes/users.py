@@ -4,6 +4,9 @@ from flask import Blueprint, jsonify, request
 
 from supabase_client import get_supabase, get_default_church_id
 from utils.auth import require_role, is_super_admin, get_current_user
+from utils.principal_cache import invalidate_principal
+from utils.tokens import revoke_user_tokens
+from utils.pagination import get_page_args, fetch_page
 
 users_bp = Blueprint("users", __name__)
 
@@ -18,6 +21,11 @@ def list_users():
     
     role = request.args.get("role")
 
+    try:
+        limit, after = get_page_args(default_limit=100)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
     client = get_supabase()
     if client is None:
         return jsonify({"error": "Supabase not configured"}), 500
@@ -35,9 +43,9 @@ def list_users():
                 role_normalized = "SuperAdmin"
             query = query.eq("role", role_normalized)
 
-        res = query.order("created_at", desc=True).execute()
+        rows, next_cursor = fetch_page(query, "created_at", "user_id", limit, after)
         users = []
-        for row in res.data or []:
+        for row in rows:
             db_role = row.get("role", "").lower()
             # Normalize role for frontend
             if db_role == "superadmin":
@@ -51,7 +59,7 @@ def list_users():
                 "mfaEnabled": row.get("mfa_enabled", False),
                 "createdAt": row.get("created_at"),
             })
-        return jsonify({"data": users})
+        return jsonify({"data": users, "next_cursor": next_cursor})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error listing users: {exc}")
         return jsonify({"error": "Failed to list users"}), 500
@@ -249,6 +257,10 @@ def update_user(user_id: str):
         )
         if not res.data:
             return jsonify({"error": "User not found"}), 404
+        invalidate_principal(user_id=user_id, email=res.data[0].get("email"))
+        if "role" in update_data or "email" in update_data:
+            # Signed tokens carry role and email; make the user sign in again
+            revoke_user_tokens(user_id)
         return get_user(user_id)
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error updating user: {exc}")
@@ -297,6 +309,8 @@ def suspend_user(user_id: str):
         )
         if not res.data:
             return jsonify({"error": "User not found"}), 404
+        invalidate_principal(user_id=user_id, email=res.data[0].get("email"))
+        revoke_user_tokens(user_id)
         return jsonify({"data": {"success": True}})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error suspending user: {exc}")
@@ -345,6 +359,7 @@ def activate_user(user_id: str):
         )
         if not res.data:
             return jsonify({"error": "User not found"}), 404
+        invalidate_principal(user_id=user_id, email=res.data[0].get("email"))
         return jsonify({"data": {"success": True}})
     except Exception as exc:  # pragma: no cover
         print(f"⚠️ Error activating user: {exc}")
@@ -401,6 +416,10 @@ def update_profile():
             return jsonify({"error": "User not found"}), 404
         
         row = res.data[0]
+        invalidate_principal(user_id=user_id, email=row.get("email"))
+        if "email" in update_data:
+            # Signed tokens carry the email; make the user sign in again
+            revoke_user_tokens(user_id)
         return jsonify({"data": {
             "id": row["user_id"],
             "email": row.get("email", ""),
@@ -3,19 +3,37 @@ Supabase client helper for the R-KIDS backend.
 
 Reads SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY / SUPABASE_ANON_KEY
 from environment (see database/README.md for setup).
+
+SUPABASE_BACKEND=fake swaps in the in-memory backend from
+utils/fake_supabase.py for offline runs and load tests.
+
+The client talks to PostgREST through the pooled, instrumented transport
+in utils/http_transport.py (timeouts, keep-alive, read retries).
 """
 
 import os
+import threading
+import time
 from typing import Optional, Tuple
 
 from supabase import Client, create_client
 
+from utils.http_transport import build_http_client
+from utils.query_trace import wrap_client
+
 SUPABASE_URL_ENV = "SUPABASE_URL"
 SERVICE_ROLE_ENV = "SUPABASE_SERVICE_ROLE_KEY"
 ANON_KEY_ENV = "SUPABASE_ANON_KEY"
+CHURCH_ID_TTL_ENV = "CHURCH_ID_CACHE_TTL"
+BACKEND_ENV = "SUPABASE_BACKEND"
+DEFAULT_CHURCH_ID_TTL = 300  # seconds
 
 _client: Optional[Client] = None
 
+# Process-wide cache for get_default_church_id()
+_church_id_cache: dict = {"value": None, "expires_at": 0.0, "hits": 0, "misses": 0}
+_church_id_lock = threading.Lock()
+
 
 def get_supabase_error_response() -> Tuple[dict, int]:
     """
@@ -39,6 +57,14 @@ def init_supabase() -> Optional[Client]:
     """Initialise Supabase client once and reuse."""
     global _client
 
+    if os.environ.get(BACKEND_ENV, "supabase").lower() == "fake":
+        from utils.fake_supabase import FakeSupabaseClient
+
+        invalidate_default_church_id()
+        _client = FakeSupabaseClient.from_env()
+        print("✅ Using in-memory fake Supabase backend (SUPABASE_BACKEND=fake)")
+        return _client
+
     supabase_url = os.environ.get(SUPABASE_URL_ENV)
     supabase_key = os.environ.get(SERVICE_ROLE_ENV) or os.environ.get(ANON_KEY_ENV)
 
@@ -54,11 +80,14 @@ def init_supabase() -> Optional[Client]:
         )
         return None
 
+    # A new client may point at a different project
+    invalidate_default_church_id()
+
     try:
-        # Create client with explicit options to avoid proxy issues
         _client = create_client(
             supabase_url=supabase_url,
             supabase_key=supabase_key,
+            options=_client_options(),
         )
         print("✅ Supabase client initialised")
     except Exception as exc:  # pragma: no cover - defensive logging
@@ -70,15 +99,85 @@ def init_supabase() -> Optional[Client]:
     return _client
 
 
+def _client_options():
+    """Client options carrying the pooled transport (None = library defaults)."""
+    try:
+        from supabase import ClientOptions
+
+        return ClientOptions(httpx_client=build_http_client())
+    except (ImportError, TypeError) as exc:
+        # supabase-py releases before httpx_client was configurable
+        print(f"⚠️ Using default Supabase HTTP transport: {exc}")
+        return None
+
+
 def get_supabase() -> Optional[Client]:
-    """Get a Supabase client instance (initialising lazily)."""
+    """
+    Get a Supabase client instance (initialising lazily).
+
+    The client is wrapped for per-request query tracing (utils/query_trace.py).
+    """
     global _client
     if _client is None:
-        return init_supabase()
-    return _client
+        init_supabase()
+    return wrap_client(_client)
+
+
+def _church_id_ttl() -> float:
+    """TTL for the cached church id, from CHURCH_ID_CACHE_TTL (seconds, 0 disables)."""
+    try:
+        return float(os.environ.get(CHURCH_ID_TTL_ENV, DEFAULT_CHURCH_ID_TTL))
+    except ValueError:
+        return DEFAULT_CHURCH_ID_TTL
 
 
 def get_default_church_id() -> Optional[str]:
+    """
+    Get the default church id, served from an in-process TTL cache.
+
+    Almost every route calls this, often several times per request, so the
+    churches lookup only runs on a cache miss. See invalidate_default_church_id().
+    """
+    now = time.monotonic()
+    with _church_id_lock:
+        if _church_id_cache["value"] and now < _church_id_cache["expires_at"]:
+            _church_id_cache["hits"] += 1
+            return _church_id_cache["value"]
+        _church_id_cache["misses"] += 1
+
+    church_id = _fetch_default_church_id()
+
+    if church_id:
+        with _church_id_lock:
+            _church_id_cache["value"] = church_id
+            _church_id_cache["expires_at"] = time.monotonic() + _church_id_ttl()
+    return church_id
+
+
+def invalidate_default_church_id() -> None:
+    """Drop the cached church id so the next call re-reads the churches table."""
+    with _church_id_lock:
+        _church_id_cache["value"] = None
+        _church_id_cache["expires_at"] = 0.0
+
+
+def get_church_id_cache_stats() -> dict:
+    """Hit/miss counters for the church id cache (exposed on /api/health)."""
+    with _church_id_lock:
+        hits = _church_id_cache["hits"]
+        misses = _church_id_cache["misses"]
+        cached = bool(_church_id_cache["value"]) and time.monotonic() < _church_id_cache["expires_at"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hitRate": round(hits / total, 4) if total else 0.0,
+        "cached": cached,
+        "ttlSeconds": _church_id_ttl(),
+    }
+
+
+def _fetch_default_church_id() -> Optional[str]:
     """
     Get or create the default church for this deployment.
 
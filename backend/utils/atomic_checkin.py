@@ -0,0 +1,71 @@
+"""
+Atomic Check-In - One RPC call per check-in via a Postgres function
+Phase 3B.4 from USER_CASE_FLOW.md
+
+Wraps check_in_child() from database/migrations/007_atomic_checkin.sql,
+which validates the child and teacher, inserts the check-in record and
+flips the booking to checked_in in one transaction. Until the migration is
+run PostgREST answers PGRST202; the function is then skipped for the life
+of the process and routes use their query path.
+"""
+
+import threading
+from typing import Any, Optional
+
+FUNCTION = "check_in_child"
+
+# Set once PostgREST reports the function missing
+_missing = threading.Event()
+
+
+def is_available() -> bool:
+    return not _missing.is_set()
+
+
+def check_in_child(
+    client: Any,
+    church_id: str,
+    child_id: str,
+    teacher_id: str,
+    method: str,
+    guardian_id: Optional[str] = None,
+    qr_code: Optional[str] = None,
+    otp_code: Optional[str] = None,
+    session_id: Optional[str] = None,
+    booking_id: Optional[str] = None,
+) -> Optional[dict]:
+    """
+    Write a check-in with one RPC round trip.
+
+    Returns:
+        {"record", "child", "teacher_id"} or {"error": "child_not_found" |
+        "teacher_not_found"}; None if the function is not deployed.
+
+    Raises:
+        Any other database error. Nothing was written in that case.
+    """
+    if _missing.is_set() or not hasattr(client, "rpc"):
+        return None
+
+    try:
+        res = client.rpc(FUNCTION, {
+            "p_church_id": church_id,
+            "p_child_id": child_id,
+            "p_teacher_id": teacher_id,
+            "p_method": method,
+            "p_guardian_id": guardian_id,
+            "p_qr_code": qr_code,
+            "p_otp_code": otp_code,
+            "p_session_id": session_id,
+            "p_booking_id": booking_id,
+        }).execute()
+    except Exception as exc:
+        message = str(exc)
+        # PGRST202: function not found in the schema cache (migration not run)
+        if "PGRST202" in message or "Could not find the function" in message:
+            if not _missing.is_set():
+                _missing.set()
+                print(f"⚠️ {FUNCTION}() not deployed, using per-step queries (run migration 007)")
+            return None
+        raise
+    return res.data
@@ -0,0 +1,94 @@
+"""
+Attendance Rollup - Precomputed daily check-in counts
+Phase 7 from USER_CASE_FLOW.md
+
+Reads daily_attendance_rollup, which a trigger on check_in_records keeps
+up to date (database/migrations/005_daily_attendance_rollup.sql). A
+30-day window is at most 30 small rows per child instead of every raw
+check-in record.
+
+Helpers return None when the rollup table is not deployed, or the read
+fails, so routes can fall back to counting raw records
+(daily_from_checkins() builds the same rows from them). Only a missing
+table turns the rollup off for the rest of the process.
+"""
+
+from typing import Optional
+
+from supabase_client import get_supabase
+
+_rollup_missing = False
+
+
+def child_daily_attendance(church_id: str, child_id: str, since: str) -> Optional[list[dict]]:
+    """
+    Rollup rows for one child from `since` (YYYY-MM-DD) onwards, newest first.
+
+    Returns:
+        [{date, group_id, checkins_count, checkouts_count, ...}], or None if
+        the rollup is unavailable.
+    """
+    global _rollup_missing
+    if _rollup_missing:
+        return None
+
+    client = get_supabase()
+    if client is None:
+        return None
+
+    try:
+        res = (
+            client.table("daily_attendance_rollup")
+            .select("date, group_id, checkins_count, checkouts_count, first_check_in, last_check_in")
+            .eq("church_id", church_id)
+            .eq("child_id", child_id)
+            .gte("date", since)
+            .order("date", desc=True)
+            .execute()
+        )
+        return res.data or []
+    except Exception as exc:
+        # PGRST205 / 42P01: table not found (migration not run). Anything
+        # else (timeouts, permissions, 5xx) only falls back for this request
+        code = getattr(exc, "code", None) or ""
+        if code in ("PGRST205", "42P01") or (not code and ("PGRST205" in str(exc) or "42P01" in str(exc))):
+            _rollup_missing = True
+            print("⚠️ daily_attendance_rollup not deployed, counting raw check-ins (run migration 005)")
+        else:
+            print(f"⚠️ Error reading attendance rollup: {exc}")
+        return None
+
+
+def count_child_checkins(church_id: str, child_id: str, since: str) -> Optional[int]:
+    """Total check-ins for a child since `since`, or None if the rollup is unavailable."""
+    rows = child_daily_attendance(church_id, child_id, since)
+    if rows is None:
+        return None
+    return sum(row.get("checkins_count") or 0 for row in rows)
+
+
+def daily_from_checkins(records: list[dict]) -> list[dict]:
+    """
+    Rollup rows built from raw check-in records, newest first, for when the
+    rollup is unavailable. Like the trigger, a record counts on the date of
+    its timestamp_in, check-out included.
+    """
+    days: dict[str, dict] = {}
+    for record in sorted(records, key=lambda r: r.get("timestamp_in") or ""):
+        stamp = record.get("timestamp_in")
+        if not stamp:
+            continue
+        day = days.setdefault(stamp[:10], {
+            "date": stamp[:10],
+            "group_id": None,
+            "checkins_count": 0,
+            "checkouts_count": 0,
+            "first_check_in": stamp,
+            "last_check_in": stamp,
+        })
+        day["group_id"] = record.get("group_id") or day["group_id"]
+        day["checkins_count"] += 1
+        if record.get("timestamp_out"):
+            day["checkouts_count"] += 1
+        day["last_check_in"] = stamp
+    return sorted(days.values(), key=lambda day: day["date"], reverse=True)
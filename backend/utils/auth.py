@@ -1,9 +1,33 @@
 """Authentication and Authorization Utilities"""
 
+import os
+from datetime import datetime
+
 from flask import request, jsonify
 from typing import Optional, Dict, Any
 from routes.auth import users_db
 from supabase_client import get_supabase, get_default_church_id
+from utils.principal_cache import get_principal_cache
+from utils.tokens import TokenError, is_signed_token, principal_from_claims, verify_token
+
+
+def _legacy_tokens_allowed() -> bool:
+    """
+    Unsigned token_{email}_{timestamp} tokens issued before signed tokens
+    shipped can be forged by anyone who knows an email, so they are refused
+    unless TOKEN_ALLOW_LEGACY=true, and only until TOKEN_LEGACY_UNTIL
+    (YYYY-MM-DD, UTC) when that is set.
+    """
+    if os.environ.get("TOKEN_ALLOW_LEGACY", "false").lower() != "true":
+        return False
+    until = os.environ.get("TOKEN_LEGACY_UNTIL", "").strip()
+    if not until:
+        return True
+    try:
+        return datetime.utcnow().date() <= datetime.strptime(until, "%Y-%m-%d").date()
+    except ValueError:
+        print(f"⚠️ Ignoring legacy tokens: TOKEN_LEGACY_UNTIL={until!r} is not YYYY-MM-DD")
+        return False
 
 
 def get_current_user() -> Optional[Dict[str, Any]]:
@@ -11,7 +35,9 @@ def get_current_user() -> Optional[Dict[str, Any]]:
     Extract current user from Authorization token.
     Returns user dict with id, email, role, name, etc. or None if not authenticated.
     
-    Token format: token_{email}_{timestamp}
+    Signed tokens (utils/tokens.py) are verified locally with no database
+    round trip. Legacy tokens (token_{email}_{timestamp}) only resolve,
+    through the principal cache / users table, while TOKEN_ALLOW_LEGACY=true.
     """
     auth_header = request.headers.get("Authorization", "")
     if not auth_header.startswith("Bearer "):
@@ -21,6 +47,21 @@ def get_current_user() -> Optional[Dict[str, Any]]:
     if not token:
         return None
     
+    if is_signed_token(token):
+        try:
+            principal = principal_from_claims(verify_token(token))
+        except TokenError as exc:
+            print(f"⚠️ Rejected session token: {exc}")
+            return None
+        # A suspension that missed revocation still shows up in the cache
+        cached = get_principal_cache().get(principal["email"])
+        if cached is not None and cached.get("id") == principal["id"] and "is_active" in cached:
+            principal["is_active"] = cached["is_active"]
+        return principal
+    
+    if not _legacy_tokens_allowed():
+        return None
+    
     # Extract email from token (format: token_{email}_{timestamp})
     # Split by last underscore to separate timestamp
     if not token.startswith("token_"):
@@ -36,42 +77,47 @@ def get_current_user() -> Optional[Dict[str, Any]]:
     
     # Extract email (everything before last underscore)
     email = token_part[:last_underscore_idx]
+    print(f"⚠️ Legacy bearer token used for {email} ({request.method} {request.path})")
     
-    # First check in-memory store (faster)
-    if email in users_db:
-        return users_db[email]
+    # First check the principal cache (TTL-bound, invalidated on account changes)
+    cache = get_principal_cache()
+    cached = cache.get(email)
+    if cached is not None:
+        return cached
     
-    # If not in memory, fetch from Supabase
+    # If not cached, fetch from Supabase
     client = get_supabase()
-    if client:
-        try:
-            church_id = get_default_church_id()
-            if church_id:
-                res = (
-                    client.table("users")
-                    .select("user_id, email, role, name, profile_updated, is_active")
-                    .eq("church_id", church_id)
-                    .eq("email", email)
-                    .limit(1)
-                    .execute()
-                )
-                if res.data:
-                    db_user = res.data[0]
-                    user = {
-                        "id": db_user["user_id"],
-                        "email": db_user.get("email", email),
-                        "role": db_user.get("role", "").lower().replace("superadmin", "super_admin") if db_user.get("role") else "parent",
-                        "name": db_user.get("name") or email.split("@")[0].title(),
-                        "profile_updated": db_user.get("profile_updated", False),
-                        "is_active": db_user.get("is_active", True),
-                    }
-                    # Cache in memory for faster subsequent lookups
-                    users_db[email] = user
-                    return user
-        except Exception as exc:
-            print(f"⚠️ Error fetching user from token: {exc}")
-    
-    return None
+    try:
+        church_id = get_default_church_id() if client else None
+        if client is None or church_id is None:
+            # No database: dev logins only exist in the login store
+            return users_db.get(email)
+        res = (
+            client.table("users")
+            .select("user_id, email, role, name, profile_updated, is_active")
+            .eq("church_id", church_id)
+            .eq("email", email)
+            .limit(1)
+            .execute()
+        )
+    except Exception as exc:
+        print(f"⚠️ Error fetching user from token: {exc}")
+        return users_db.get(email)
+
+    # Deleted, or signed in under an email that has since changed
+    if not res.data:
+        return None
+    db_user = res.data[0]
+    user = {
+        "id": db_user["user_id"],
+        "email": db_user.get("email", email),
+        "role": db_user.get("role", "").lower().replace("superadmin", "super_admin") if db_user.get("role") else "parent",
+        "name": db_user.get("name") or email.split("@")[0].title(),
+        "profile_updated": db_user.get("profile_updated", False),
+        "is_active": db_user.get("is_active", True),
+    }
+    cache.set(email, user)
+    return user
 
 
 def require_auth():
@@ -82,6 +128,8 @@ def require_auth():
     user = get_current_user()
     if not user:
         return None, jsonify({"error": "Authentication required"}), 401
+    if user.get("is_active") is False:
+        return None, jsonify({"error": "Account suspended"}), 403
     return user, None, None
 
 
@@ -0,0 +1,126 @@
+"""
+Batch Loader - Resolve related rows with one in_() query per table.
+
+List endpoints used to look up related rows (teacher names, group names,
+guardians) once per result row. These helpers collect the ids first and
+fetch them in a single PostgREST call per table, DataLoader-style.
+"""
+
+from typing import Any, Iterable, Optional
+
+from flask import g, has_request_context
+
+from supabase_client import get_supabase
+
+
+def load_many(
+    table: str,
+    key: str,
+    ids: Iterable[Any],
+    columns: str = "*",
+    church_id: Optional[str] = None,
+) -> dict[str, dict]:
+    """
+    Fetch rows from `table` whose `key` column is in `ids` with one query.
+
+    Args:
+        table: Table name (e.g. "users")
+        key: Column to match ids against (e.g. "user_id")
+        ids: Ids to resolve; None and duplicates are ignored
+        columns: Columns to select (the key column is always included)
+        church_id: Optional church filter
+
+    Returns:
+        Dict of {id: row}. Ids with no matching row are absent.
+    """
+    unique_ids = sorted({str(i) for i in ids if i})
+    if not unique_ids:
+        return {}
+
+    client = get_supabase()
+    if client is None:
+        return {}
+
+    if columns != "*" and key not in [c.strip() for c in columns.split(",")]:
+        columns = f"{key}, {columns}"
+
+    try:
+        query = client.table(table).select(columns).in_(key, unique_ids)
+        if church_id:
+            query = query.eq("church_id", church_id)
+        res = query.execute()
+        return {str(row[key]): row for row in res.data or [] if row.get(key)}
+    except Exception as exc:
+        print(f"⚠️ Warning: Could not batch-load {table}: {exc}")
+        return {}
+
+
+class BatchLoader:
+    """
+    Request-scoped loader that collects ids per (table, key) and fills them
+    with one query each. Rows already loaded in the request are reused when
+    they were loaded with the columns asked for; otherwise they are fetched
+    again and the new columns merged in.
+
+    Usage:
+        loader = get_batch_loader()
+        for row in rows:
+            loader.want("users", "user_id", row.get("teacher_id"), columns="name")
+        loader.fill()
+        teacher = loader.get("users", "user_id", row.get("teacher_id"))
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple[str, str], set[str]] = {}
+        self._columns: dict[tuple[str, str], set[str]] = {}
+        self._loaded: dict[tuple[str, str], dict[str, dict]] = {}
+        # Columns each loaded row was fetched with ("*" covers all)
+        self._covered: dict[tuple[str, str], dict[str, set[str]]] = {}
+
+    def want(self, table: str, key: str, *ids: Any, columns: str = "*") -> "BatchLoader":
+        """Queue ids to be resolved on the next fill()."""
+        slot = (table, key)
+        requested = {c.strip() for c in columns.split(",")}
+        covered = self._covered.get(slot, {})
+        pending = self._pending.setdefault(slot, set())
+        for i in ids:
+            if not i:
+                continue
+            have = covered.get(str(i))
+            if have is None or not ("*" in have or requested <= have):
+                pending.add(str(i))
+        wanted = self._columns.setdefault(slot, set())
+        wanted.update(requested)
+        return self
+
+    def fill(self, church_id: Optional[str] = None) -> "BatchLoader":
+        """Resolve every queued id with one query per (table, key)."""
+        for slot, ids in self._pending.items():
+            if not ids:
+                continue
+            table, key = slot
+            wanted = self._columns.get(slot, {"*"})
+            columns = "*" if "*" in wanted else ", ".join(sorted(wanted))
+            rows = load_many(table, key, ids, columns=columns, church_id=church_id)
+            loaded = self._loaded.setdefault(slot, {})
+            covered = self._covered.setdefault(slot, {})
+            for id_, row in rows.items():
+                loaded[id_] = {**loaded.get(id_, {}), **row}
+                covered[id_] = covered.get(id_, set()) | set(wanted)
+            ids.clear()
+        return self
+
+    def get(self, table: str, key: str, id_: Any, default: Optional[dict] = None) -> Optional[dict]:
+        """Return a loaded row, or `default` if it was not found."""
+        if not id_:
+            return default
+        return self._loaded.get((table, key), {}).get(str(id_), default)
+
+
+def get_batch_loader() -> BatchLoader:
+    """Get the BatchLoader for the current request (a fresh one outside requests)."""
+    if not has_request_context():
+        return BatchLoader()
+    if "batch_loader" not in g:
+        g.batch_loader = BatchLoader()
+    return g.batch_loader
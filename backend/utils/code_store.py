@@ -0,0 +1,346 @@
+"""
+Code Store - Expiring storage for QR, OTP and pickup codes
+Phase 3A.1, 3B.2, 6A.2, 6A.3 from USER_CASE_FLOW.md
+
+Replaces the per-worker module-level dicts so a code generated on one
+gunicorn worker validates on another. Two backends:
+- "memory": per-process dict (single worker / local dev)
+- "sqlite": file shared by every worker on the host (default)
+
+Both give O(1) lookup by code and sweep expired entries in a background
+thread. Stores behave like a dict ({code: data}, where data["expires_at"]
+is a datetime) so existing callers and validate_qr_code() keep working.
+
+Environment:
+    CODE_STORE_BACKEND        memory | sqlite (default: sqlite)
+    CODE_STORE_PATH           SQLite file (default: <tmp>/rkids_codes.sqlite3)
+    CODE_STORE_SWEEP_SECONDS  Background sweep interval (default: 60)
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+BACKEND_ENV = "CODE_STORE_BACKEND"
+PATH_ENV = "CODE_STORE_PATH"
+SWEEP_ENV = "CODE_STORE_SWEEP_SECONDS"
+
+_stores: dict[str, "CodeStore"] = {}
+_stores_lock = threading.Lock()
+
+
+def _expiry_timestamp(data: dict) -> float:
+    """Convert data["expires_at"] (naive UTC datetime) to an epoch timestamp."""
+    expires_at = data.get("expires_at")
+    if isinstance(expires_at, datetime):
+        return (expires_at - datetime(1970, 1, 1)).total_seconds()
+    raise ValueError("Code data must include an 'expires_at' datetime")
+
+
+def _utc_now_timestamp() -> float:
+    return (datetime.utcnow() - datetime(1970, 1, 1)).total_seconds()
+
+
+class CodeStore:
+    """Base class: dict-like access plus background expiry."""
+
+    def __init__(self, namespace: str, sweep_seconds: float = 60):
+        self.namespace = namespace
+        self.sweep_seconds = sweep_seconds
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_lock = threading.Lock()
+
+    # Backend interface
+
+    def get(self, code: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def put(self, code: str, data: dict) -> None:
+        raise NotImplementedError
+
+    def pop(self, code: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def add(self, code: str, data: dict) -> bool:
+        """Store data only if the code is absent or expired. True when stored."""
+        raise NotImplementedError
+
+    def update(self, code: str, change: Callable[[Optional[dict]], dict]) -> dict:
+        """
+        Replace an entry with change(current), where current is None when the
+        code is absent or expired, as one step no other worker can interleave
+        with. Returns the stored data.
+        """
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """Remove expired entries. Returns the number removed."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    # Dict-style access
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and self.get(code) is not None
+
+    def __getitem__(self, code: str) -> dict:
+        data = self.get(code)
+        if data is None:
+            raise KeyError(code)
+        return data
+
+    def __setitem__(self, code: str, data: dict) -> None:
+        self.put(code, data)
+        self._ensure_sweeper()
+
+    def __delitem__(self, code: str) -> None:
+        self.pop(code)
+
+    # Background expiry
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is not None or self.sweep_seconds <= 0:
+            return
+        with self._sweeper_lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(
+                    target=self._sweep_loop,
+                    name=f"code-store-sweeper-{self.namespace}",
+                    daemon=True,
+                )
+                self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            time.sleep(self.sweep_seconds)
+            try:
+                self.sweep()
+            except Exception as exc:  # pragma: no cover - defensive logging
+                print(f"⚠️ Error sweeping {self.namespace} codes: {exc}")
+
+
+class MemoryCodeStore(CodeStore):
+    """Per-process store: dict for lookup, min-heap of expiries for sweeping."""
+
+    def __init__(self, namespace: str, sweep_seconds: float = 60):
+        super().__init__(namespace, sweep_seconds)
+        self._data: dict[str, dict] = {}
+        self._expiries: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def get(self, code: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(code, default)
+
+    def put(self, code: str, data: dict) -> None:
+        expires = _expiry_timestamp(data)
+        with self._lock:
+            self._data[code] = data
+            heapq.heappush(self._expiries, (expires, code))
+
+    def pop(self, code: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(code, default)
+
+    def add(self, code: str, data: dict) -> bool:
+        expires = _expiry_timestamp(data)
+        with self._lock:
+            current = self._data.get(code)
+            if current is not None and _expiry_timestamp(current) > _utc_now_timestamp():
+                return False
+            self._data[code] = data
+            heapq.heappush(self._expiries, (expires, code))
+        self._ensure_sweeper()
+        return True
+
+    def update(self, code: str, change: Callable[[Optional[dict]], dict]) -> dict:
+        with self._lock:
+            current = self._data.get(code)
+            if current is not None and _expiry_timestamp(current) <= _utc_now_timestamp():
+                current = None
+            data = change(current)
+            self._data[code] = data
+            heapq.heappush(self._expiries, (_expiry_timestamp(data), code))
+        self._ensure_sweeper()
+        return data
+
+    def sweep(self) -> int:
+        now = _utc_now_timestamp()
+        removed = 0
+        with self._lock:
+            while self._expiries and self._expiries[0][0] <= now:
+                _, code = heapq.heappop(self._expiries)
+                data = self._data.get(code)
+                # Skip heap entries superseded by a later put() of the same code
+                if data is not None and _expiry_timestamp(data) <= now:
+                    del self._data[code]
+                    removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteCodeStore(CodeStore):
+    """Store shared by all workers on the host through one SQLite file."""
+
+    def __init__(self, namespace: str, path: str, sweep_seconds: float = 60):
+        super().__init__(namespace, sweep_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS codes (
+                namespace TEXT NOT NULL,
+                code TEXT NOT NULL,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, code)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_codes_expires_at ON codes(expires_at)")
+
+    def _decode(self, raw: str, expires: float) -> dict:
+        data = json.loads(raw)
+        data["expires_at"] = datetime.utcfromtimestamp(expires)
+        return data
+
+    def get(self, code: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM codes WHERE namespace = ? AND code = ?",
+                (self.namespace, code),
+            ).fetchone()
+        return self._decode(*row) if row else default
+
+    def put(self, code: str, data: dict) -> None:
+        expires = _expiry_timestamp(data)
+        payload = {k: v for k, v in data.items() if k != "expires_at"}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO codes (namespace, code, data, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, code, json.dumps(payload, default=str), expires),
+            )
+
+    def pop(self, code: str, default: Any = None) -> Any:
+        # Select + delete in one write transaction so a one-time code can
+        # only be consumed by a single worker
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data, expires_at FROM codes WHERE namespace = ? AND code = ?",
+                    (self.namespace, code),
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "DELETE FROM codes WHERE namespace = ? AND code = ?",
+                        (self.namespace, code),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._decode(*row) if row else default
+
+    def add(self, code: str, data: dict) -> bool:
+        # Claim in one write transaction so only one worker gets the code
+        expires = _expiry_timestamp(data)
+        payload = {k: v for k, v in data.items() if k != "expires_at"}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM codes WHERE namespace = ? AND code = ? AND expires_at <= ?",
+                    (self.namespace, code, _utc_now_timestamp()),
+                )
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO codes (namespace, code, data, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, code, json.dumps(payload, default=str), expires),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._ensure_sweeper()
+        return cur.rowcount == 1
+
+    def update(self, code: str, change: Callable[[Optional[dict]], dict]) -> dict:
+        # Read and write in one write transaction so concurrent updates from
+        # other workers are applied one after another, not lost
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data, expires_at FROM codes WHERE namespace = ? AND code = ? AND expires_at > ?",
+                    (self.namespace, code, _utc_now_timestamp()),
+                ).fetchone()
+                data = change(self._decode(*row) if row else None)
+                payload = {k: v for k, v in data.items() if k != "expires_at"}
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO codes (namespace, code, data, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, code, json.dumps(payload, default=str), _expiry_timestamp(data)),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._ensure_sweeper()
+        return data
+
+    def sweep(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM codes WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, _utc_now_timestamp()),
+            )
+        return cur.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM codes WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return row[0]
+
+
+def get_code_store(namespace: str) -> CodeStore:
+    """
+    Get the shared code store for a namespace (e.g. "checkin_qr", "pickup").
+    The backend is chosen from CODE_STORE_BACKEND the first time it's requested.
+    """
+    with _stores_lock:
+        store = _stores.get(namespace)
+        if store is not None:
+            return store
+
+        backend = os.environ.get(BACKEND_ENV, "sqlite").lower()
+        try:
+            sweep_seconds = float(os.environ.get(SWEEP_ENV, 60))
+        except ValueError:
+            sweep_seconds = 60
+
+        if backend == "sqlite":
+            path = os.environ.get(PATH_ENV) or os.path.join(tempfile.gettempdir(), "rkids_codes.sqlite3")
+            try:
+                store = SQLiteCodeStore(namespace, path, sweep_seconds)
+            except sqlite3.Error as exc:
+                print(f"⚠️ Could not open code store at {path}, falling back to memory: {exc}")
+                store = MemoryCodeStore(namespace, sweep_seconds)
+        else:
+            store = MemoryCodeStore(namespace, sweep_seconds)
+
+        _stores[namespace] = store
+        return store
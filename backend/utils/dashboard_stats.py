@@ -0,0 +1,81 @@
+"""
+Dashboard Stats - Single-round-trip counters via Postgres functions
+Phase 7 from USER_CASE_FLOW.md
+
+Wraps the functions in database/migrations/004_dashboard_stats_functions.sql.
+Each helper returns the function's JSON result, or None when the function
+is not deployed (or the call fails) so routes can fall back to their
+per-counter queries.
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Optional
+
+from supabase_client import get_supabase
+
+# Functions PostgREST reported as missing; skipped until the process restarts
+_missing_functions: set[str] = set()
+_missing_lock = threading.Lock()
+
+
+def _today_start() -> str:
+    """Start of today (UTC), matching the routes' gte("timestamp_in", today) filters."""
+    return datetime.utcnow().date().isoformat()
+
+
+def call_stats_function(name: str, params: dict) -> Optional[Any]:
+    """
+    Call a dashboard stats function with one RPC round trip.
+
+    Returns:
+        The decoded JSON result, or None if unavailable.
+    """
+    if name in _missing_functions:
+        return None
+
+    client = get_supabase()
+    if client is None or not hasattr(client, "rpc"):
+        return None
+
+    try:
+        res = client.rpc(name, params).execute()
+        return res.data
+    except Exception as exc:
+        message = str(exc)
+        # PGRST202: function not found in the schema cache (migration not run)
+        if "PGRST202" in message or "Could not find the function" in message:
+            with _missing_lock:
+                _missing_functions.add(name)
+            print(f"⚠️ {name}() not deployed, using per-counter queries (run migration 004)")
+        else:
+            print(f"⚠️ Error calling {name}(): {exc}")
+        return None
+
+
+def admin_dashboard_stats(church_id: str) -> Optional[dict]:
+    """{total_children, checked_in_today} or None."""
+    return call_stats_function("admin_dashboard_stats", {
+        "p_church_id": church_id,
+        "p_since": _today_start(),
+    })
+
+
+def teacher_dashboard_stats(church_id: str, teacher_id: str) -> Optional[dict]:
+    """{groups, checkins_today, active_checkins} or None."""
+    return call_stats_function("teacher_dashboard_stats", {
+        "p_church_id": church_id,
+        "p_teacher_id": teacher_id,
+        "p_since": _today_start(),
+    })
+
+
+def group_dashboard_stats(church_id: str, group_id: str) -> Optional[dict]:
+    """
+    {group, children_count, recent_attendance}, or None if unavailable or the
+    group does not exist (the legacy path then answers the 404).
+    """
+    return call_stats_function("group_dashboard_stats", {
+        "p_church_id": church_id,
+        "p_group_id": group_id,
+    })
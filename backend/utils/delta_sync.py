@@ -0,0 +1,122 @@
+"""
+Delta Sync - `?since=<cursor>` refreshes of check-in and booking lists
+Phase 4 and 3B from USER_CASE_FLOW.md
+
+Tablets refresh GET /api/checkin/active and GET /api/sessions/<id>/bookings
+all session long. Every response carries a `cursor`; sending it back as
+`?since=<cursor>` returns only what changed after it:
+
+    {"data": [changed rows], "removed": [ids], "cursor": "...", "full": false}
+
+- data: rows inserted or updated since the cursor, in the usual shape
+- removed: ids to drop (checked out from the active list, or deleted)
+- full: true when the answer is the whole list instead (no or expired
+  cursor, or change tracking not deployed); replace the list then
+
+Changes are found through the updated_at columns and the sync_tombstones
+table from database/migrations/006_change_tracking.sql. Cursors are the
+time the request started, and the next refresh looks DELTA_SYNC_OVERLAP_SECONDS
+further back, covering transactions still in flight and clock drift
+between the API and the database. Rows in that overlap are sent twice;
+clients upsert by id, so that is harmless.
+
+Environment:
+    DELTA_SYNC_OVERLAP_SECONDS  Look-back added to every cursor (default: 10)
+    DELTA_SYNC_MAX_AGE_HOURS    Older cursors get the full list (default: 24)
+"""
+
+import base64
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import request
+
+# Set once PostgREST reports the updated_at column or sync_tombstones
+# missing; full lists are served until the process restarts
+_missing = threading.Event()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def new_cursor() -> str:
+    """Opaque cursor for the current time; take it before running the queries."""
+    raw = datetime.now(timezone.utc).isoformat()
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_since(token: str) -> datetime:
+    """Inverse of new_cursor(). Raises ValueError for malformed cursors."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        since = datetime.fromisoformat(base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii"))
+    except Exception as exc:
+        raise ValueError("Invalid since cursor") from exc
+    if since.tzinfo is None:
+        raise ValueError("Invalid since cursor")
+    return since
+
+
+def get_since_arg() -> Optional[datetime]:
+    """
+    Read `since` from the query string.
+
+    Returns:
+        The cursor time, or None for a full list (no cursor, a cursor older
+        than DELTA_SYNC_MAX_AGE_HOURS, or change tracking not deployed)
+    Raises:
+        ValueError with a client-facing message for a malformed cursor
+    """
+    token = request.args.get("since")
+    if not token:
+        return None
+    since = decode_since(token)
+    if _missing.is_set():
+        return None
+    max_age = timedelta(hours=_env_float("DELTA_SYNC_MAX_AGE_HOURS", 24))
+    if since < datetime.now(timezone.utc) - max_age:
+        return None
+    return since
+
+
+def changed_after(since: datetime) -> str:
+    """Lower bound for updated_at / deleted_at filters, including the overlap."""
+    overlap = timedelta(seconds=_env_float("DELTA_SYNC_OVERLAP_SECONDS", 10))
+    return (since - overlap).isoformat()
+
+
+def tombstones_query(client, table: str, since: datetime, church_id: Optional[str] = None,
+                     session_id: Optional[str] = None):
+    """Built (not executed) query for ids of rows of `table` deleted after since."""
+    query = (
+        client.table("sync_tombstones")
+        .select("row_id")
+        .eq("table_name", table)
+        .gte("deleted_at", changed_after(since))
+    )
+    if church_id:
+        query = query.eq("church_id", church_id)
+    if session_id:
+        query = query.eq("session_id", session_id)
+    return query
+
+
+def is_untracked(exc: BaseException) -> bool:
+    """
+    True when a delta query failed because migration 006 is not applied
+    (42703: undefined column, PGRST205 / 42P01: unknown table). Remembered,
+    so later refreshes skip straight to the full list.
+    """
+    message = str(exc)
+    if not any(code in message for code in ("42703", "PGRST205", "42P01")):
+        return False
+    if not _missing.is_set():
+        _missing.set()
+        print("⚠️ Change tracking not deployed, serving full lists for ?since= (run migration 006)")
+    return True
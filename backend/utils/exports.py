@@ -0,0 +1,194 @@
+"""
+Exports - Streaming CSV and XLSX writers for report downloads
+
+Both writers take an iterable of rows and yield the file in chunks, so a
+Flask streaming response can send years of history while only one page
+of rows (plus a small output buffer) is held in memory.
+
+The XLSX writer produces a minimal single-sheet workbook with inline
+strings, written through zipfile onto a non-seekable sink; it needs no
+third-party spreadsheet library.
+
+A row iterator that fails once the download has started raises
+ExportIncomplete. The status line is already sent by then, so the file
+says it instead: a final "# export incomplete: ..." row in a CSV, a second
+"Export incomplete" sheet in a workbook.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from typing import Any, Iterable, Iterator
+from xml.sax.saxutils import escape
+
+CHUNK_BYTES = 64 * 1024
+
+# Characters XML 1.0 does not allow, even escaped
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+INCOMPLETE_SHEET = "Export incomplete"
+
+
+class ExportIncomplete(Exception):
+    """Raised by a row iterator that failed after the download started."""
+
+
+def stream_csv(headers: list[str], rows: Iterable[list[Any]]) -> Iterator[str]:
+    """Yield a CSV file in ~64 KB chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    try:
+        for row in rows:
+            writer.writerow(["" if v is None else v for v in row])
+            if buffer.tell() >= CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    except ExportIncomplete as exc:
+        writer.writerow([f"# export incomplete: {exc}"])
+    yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """Write-only file object that collects zip output until it is drained."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell(ref: str, value: Any) -> str:
+    if value is None or value == "":
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(number: int, values: list[Any]) -> str:
+    cells = "".join(_cell(f"{_column_letter(i)}{number}", v) for i, v in enumerate(values))
+    return f'<row r="{number}">{cells}</row>'
+
+
+_SHEET_START = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    b'<sheetData>'
+)
+_SHEET_END = b"</sheetData></worksheet>"
+
+
+def _content_types(sheets: int) -> str:
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, sheets + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        f'{overrides}'
+        '</Types>'
+    )
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+def _workbook_rels(sheets: int) -> str:
+    relationships = "".join(
+        f'<Relationship Id="rId{i}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, sheets + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'{relationships}'
+        '</Relationships>'
+    )
+
+
+def _workbook(sheet_names: list[str]) -> str:
+    sheets = "".join(
+        f'<sheet name="{escape(name[:31])}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, name in enumerate(sheet_names, start=1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets>{sheets}</sheets>'
+        '</workbook>'
+    )
+
+
+def stream_xlsx(headers: list[str], rows: Iterable[list[Any]], sheet_name: str = "Report") -> Iterator[bytes]:
+    """Yield a single-sheet .xlsx workbook in ~64 KB chunks."""
+    sink = _ChunkSink()
+    error = None
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_START)
+            sheet.write(_row(1, headers).encode("utf-8"))
+            try:
+                for number, row in enumerate(rows, start=2):
+                    sheet.write(_row(number, row).encode("utf-8"))
+                    if sink.size >= CHUNK_BYTES:
+                        yield sink.drain()
+            except ExportIncomplete as exc:
+                error = str(exc)
+            sheet.write(_SHEET_END)
+
+        # Parts listing the sheets go last, once it is known whether the
+        # export finished; zip entries need not be in any order
+        sheet_names = [sheet_name]
+        if error is not None:
+            sheet_names.append(INCOMPLETE_SHEET)
+            archive.writestr(
+                "xl/worksheets/sheet2.xml",
+                _SHEET_START + (_row(1, [INCOMPLETE_SHEET]) + _row(2, [error])).encode("utf-8") + _SHEET_END,
+            )
+        archive.writestr("[Content_Types].xml", _content_types(len(sheet_names)))
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _workbook(sheet_names))
+        archive.writestr("xl/_rels/workbook.xml.rels", _workbook_rels(len(sheet_names)))
+    yield sink.drain()
@@ -0,0 +1,652 @@
+"""
+Fake Supabase - In-memory stand-in for the Supabase client
+
+Implements the part of the PostgREST query builder the routes use, so the
+whole API can run (and be load-tested) on a laptop with no Supabase
+project:
+
+- select with embedded resources: `*, groups(name)`, nested embeds,
+  `alias:table(...)` and `table!inner(...)`, with filters on embedded
+  columns (`eq("children.parent_id", ...)`)
+- count="exact", order, limit, range
+- eq/neq/gt/gte/lt/lte/in_/is_/like/ilike filters and or_() logic trees
+  (with `not.` negation)
+- insert (single or multi-row, all or nothing), update, delete, upsert
+  with on_conflict; primary keys and UNIQUE(session_id, child_id) on
+  session_bookings are enforced
+- rpc() against Python functions registered with register_rpc()
+
+Tables keep rows by primary key with hash indexes on the columns that are
+filtered or joined on (built on first use, maintained on every write), so
+`eq("child_id", ...)`, `in_(...)` and embeds are lookups instead of scans.
+Column defaults follow database/supabase_schema.sql and the migrations.
+
+Tables and functions that only exist after migrations 004/005 are not
+emulated: they fail with the same PostgREST error codes, and the routes
+use their fallbacks. The change tracking of migration 006 is: check-ins
+and bookings get updated_at, and deleting them leaves sync_tombstones rows.
+
+Select it with SUPABASE_BACKEND=fake. Every gunicorn worker holds its own
+copy of the data, so run a single worker when state must be shared.
+
+Environment:
+    SUPABASE_BACKEND          supabase | fake (default: supabase)
+    FAKE_SUPABASE_SEED        JSON file of {"table": [rows]} loaded at start
+    FAKE_SUPABASE_LATENCY_MS  Simulated network time per call (default: 0)
+"""
+
+import copy
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, Optional
+
+from postgrest.exceptions import APIError
+
+# Primary key column per table (PostgREST resolves embeds through these)
+PRIMARY_KEYS = {
+    "churches": "church_id",
+    "users": "user_id",
+    "groups": "group_id",
+    "guardians": "guardian_id",
+    "children": "child_id",
+    "child_guardians": "id",
+    "check_in_records": "record_id",
+    "attendance_summary": "summary_id",
+    "notifications": "notification_id",
+    "audit_logs": "log_id",
+    "sessions": "session_id",
+    "session_bookings": "booking_id",
+    "sync_tombstones": "tombstone_id",
+}
+
+# UNIQUE constraints besides the primary key (migration 001)
+UNIQUE_KEYS = {
+    "session_bookings": [("session_id", "child_id")],
+}
+
+# Tables whose deletes are recorded in sync_tombstones (migration 006)
+TOMBSTONED = {"check_in_records", "session_bookings"}
+
+# Foreign keys whose column name differs from the referenced primary key
+FOREIGN_KEYS = {
+    ("groups", "users"): "teacher_id",
+    ("check_in_records", "users"): "teacher_id",
+    ("children", "guardians"): "parent_id",
+    ("sessions", "users"): "teacher_id",
+    ("audit_logs", "users"): "user_id",
+}
+
+_NOW = object()
+
+# Column defaults applied on insert (timestamps filled with the current time)
+DEFAULTS = {
+    "churches": {"settings": {}, "created_at": _NOW, "updated_at": _NOW},
+    "users": {
+        "is_active": True, "mfa_enabled": False, "status": "pending_password",
+        "profile_updated": False, "password_set": False, "created_at": _NOW, "updated_at": _NOW,
+    },
+    "groups": {"created_at": _NOW, "updated_at": _NOW},
+    "guardians": {"is_primary": False, "created_at": _NOW, "updated_at": _NOW},
+    "children": {"status": "pending", "created_at": _NOW, "updated_at": _NOW},
+    "child_guardians": {"is_authorized": True, "created_at": _NOW},
+    "check_in_records": {"timestamp_in": _NOW, "created_at": _NOW, "updated_at": _NOW},
+    "attendance_summary": {
+        "present_count": 0, "absent_count": 0, "male_count": 0, "female_count": 0, "created_at": _NOW,
+    },
+    "notifications": {
+        "email_sent": False, "sms_sent": False, "read": False, "action_required": False,
+        "metadata": {}, "created_at": _NOW,
+    },
+    "audit_logs": {"details": {}, "timestamp": _NOW},
+    "sessions": {
+        "session_type": "Regular", "is_recurring": False, "status": "scheduled",
+        "created_at": _NOW, "updated_at": _NOW,
+    },
+    "session_bookings": {"status": "booked", "booked_at": _NOW, "created_at": _NOW, "updated_at": _NOW},
+    "sync_tombstones": {"deleted_at": _NOW},
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _key(value: Any) -> Optional[str]:
+    """Index/comparison key: PostgREST compares filter values as text."""
+    return None if value is None else str(value)
+
+
+def _split_columns(columns: str) -> list[str]:
+    """Split a select string on top-level commas (ignoring embeds)."""
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _like_to_regex(pattern: str, ignore_case: bool) -> re.Pattern:
+    escaped = re.escape(pattern).replace("%", ".*").replace("_", ".")
+    return re.compile(f"^{escaped}$", re.IGNORECASE if ignore_case else 0)
+
+
+def _compare(left: Any, right: Any) -> int:
+    """Compare numerically when both sides are numbers, otherwise as text."""
+    try:
+        a, b = float(left), float(right)
+    except (TypeError, ValueError):
+        a, b = str(left), str(right)
+    return (a > b) - (a < b)
+
+
+class FakeResponse:
+    """Mirrors the `.data` / `.count` shape of a postgrest APIResponse."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeTable:
+    """Rows by primary key, in insertion order, with lazily built hash indexes."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pk = PRIMARY_KEYS.get(name, f"{name}_id")
+        self.rows: dict[str, dict] = {}
+        self.indexes: dict[str, dict[Optional[str], set[str]]] = {}
+        # Insertion sequence, so index lookups come back in table order
+        self._seq: dict[str, int] = {}
+        self._next_seq = 0
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(list(self.rows.values()))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def index(self, column: str) -> dict[Optional[str], set[str]]:
+        index = self.indexes.get(column)
+        if index is None:
+            index = {}
+            for pk, row in self.rows.items():
+                index.setdefault(_key(row.get(column)), set()).add(pk)
+            self.indexes[column] = index
+        return index
+
+    def lookup(self, column: str, values: list) -> list[dict]:
+        """Rows whose column equals any of values, in insertion order."""
+        keys = {_key(v) for v in values}
+        if column == self.pk:
+            pks = [k for k in keys if k in self.rows]
+        else:
+            index = self.index(column)
+            pks = set().union(*(index.get(k, set()) for k in keys)) if keys else set()
+        return [self.rows[pk] for pk in sorted(pks, key=self._seq.__getitem__)]
+
+    def _unindex(self, pk: str, row: dict, columns) -> None:
+        for column in columns:
+            index = self.indexes.get(column)
+            if index is not None:
+                bucket = index.get(_key(row.get(column)))
+                if bucket:
+                    bucket.discard(pk)
+
+    def _reindex(self, pk: str, row: dict, columns) -> None:
+        for column in columns:
+            index = self.indexes.get(column)
+            if index is not None:
+                index.setdefault(_key(row.get(column)), set()).add(pk)
+
+    def insert(self, payload: dict, apply_defaults: bool = True) -> dict:
+        row = dict(payload)
+        if apply_defaults:
+            for column, default in DEFAULTS.get(self.name, {}).items():
+                if column not in row:
+                    row[column] = _now() if default is _NOW else copy.deepcopy(default)
+        row.setdefault(self.pk, str(uuid.uuid4()))
+        pk = str(row[self.pk])
+        if pk in self.rows:
+            raise APIError({
+                "code": "23505",
+                "message": f'duplicate key value violates unique constraint "{self.name}_pkey"',
+            })
+        for columns in UNIQUE_KEYS.get(self.name, []):
+            taken = self.lookup(columns[0], [row.get(columns[0])])
+            if any(all(_key(r.get(c)) == _key(row.get(c)) for c in columns) for r in taken):
+                raise APIError({
+                    "code": "23505",
+                    "message": f'duplicate key value violates unique constraint "{self.name}_{"_".join(columns)}_key"',
+                })
+        self.rows[pk] = row
+        self._seq[pk] = self._next_seq
+        self._next_seq += 1
+        self._reindex(pk, row, self.indexes)
+        return row
+
+    def update(self, row: dict, changes: dict) -> None:
+        if "updated_at" in DEFAULTS.get(self.name, {}) and "updated_at" not in changes:
+            changes = dict(changes, updated_at=_now())  # update_updated_at_column trigger
+        pk = str(row[self.pk])
+        self._unindex(pk, row, changes)
+        row.update(changes)
+        self._reindex(pk, row, changes)
+
+    def delete(self, row: dict) -> None:
+        pk = str(row[self.pk])
+        self._unindex(pk, row, self.indexes)
+        self.rows.pop(pk, None)
+        self._seq.pop(pk, None)
+
+
+class FakeQuery:
+    """Chainable query builder bound to one table of a FakeSupabaseClient."""
+
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._operation = "select"
+        self._columns = "*"
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: list[tuple] = []
+        self._orders: list[tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._count: Optional[str] = None
+
+    # Operations
+
+    def select(self, columns: str = "*", count: Optional[str] = None, *_, **__):
+        if self._operation not in ("insert", "upsert", "update", "delete"):
+            self._operation = "select"
+        self._columns = columns
+        self._count = count
+        return self
+
+    def insert(self, payload, *_, **__):
+        self._operation = "insert"
+        self._payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict: Optional[str] = None, *_, **__):
+        self._operation = "upsert"
+        self._payload = payload
+        self._on_conflict = on_conflict
+        return self
+
+    def update(self, payload: dict, *_, **__):
+        self._operation = "update"
+        self._payload = payload
+        return self
+
+    def delete(self, *_, **__):
+        self._operation = "delete"
+        return self
+
+    # Filters
+
+    def _filter(self, column: Optional[str], op: str, value):
+        self._filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column, value):
+        return self._filter(column, "is", value)
+
+    def like(self, column, pattern):
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, "ilike", pattern)
+
+    def or_(self, filters: str, *_, **__):
+        return self._filter(None, "or", filters)
+
+    def match(self, query: dict):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, *_, **__):
+        self._orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, *_, **__):
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, *_, **__):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # Execution
+
+    @staticmethod
+    def _check(row: dict, column: str, op: str, value) -> bool:
+        current = row.get(column)
+        if op == "eq":
+            return current is not None and _key(current) == _key(value)
+        if op == "neq":
+            return current is None or _key(current) != _key(value)
+        if op == "in":
+            return _key(current) in {_key(v) for v in value}
+        if op == "is":
+            if value in (None, "null"):
+                return current is None
+            return str(current).lower() == str(value).lower()
+        if op in ("gt", "gte", "lt", "lte"):
+            if current is None:
+                return False
+            result = _compare(current, value)
+            return {"gt": result > 0, "gte": result >= 0, "lt": result < 0, "lte": result <= 0}[op]
+        if op in ("like", "ilike"):
+            return current is not None and bool(_like_to_regex(value, op == "ilike").match(str(current)))
+        return True
+
+    def _logic(self, row: dict, expr: str, combine=any) -> bool:
+        """Evaluate a PostgREST logic tree such as `a.lt.1,and(a.eq.1,b.lt.2)`."""
+        results = []
+        for part in _split_columns(expr):
+            if part.startswith(("and(", "or(")):
+                name, _, inner = part.partition("(")
+                results.append(self._logic(row, inner[:-1], all if name == "and" else any))
+            else:
+                column, op, value = part.split(".", 2)
+                negate = op == "not"
+                if negate:
+                    op, _, value = value.partition(".")
+                if op == "in":
+                    value = [v.strip().strip('"') for v in value.strip("()").split(",")]
+                else:
+                    value = value.strip('"').replace('\\"', '"').replace("\\\\", "\\")
+                results.append(self._check(row, column, op, value) != negate)
+        return combine(results)
+
+    def _matches(self, row: dict) -> bool:
+        for column, op, value in self._filters:
+            if op == "or":
+                if not self._logic(row, value):
+                    return False
+                continue
+            if "." in column:
+                # Filters on embedded resources (e.g. groups.name) are
+                # applied to the embed in _project()
+                continue
+            if not self._check(row, column, op, value):
+                return False
+        return True
+
+    def _candidates(self, table: FakeTable) -> list[dict]:
+        """Narrow the scan with the most selective indexed eq/in filter."""
+        best: Optional[list[dict]] = None
+        for column, op, value in self._filters:
+            if op not in ("eq", "in") or column is None or "." in column:
+                continue
+            rows = table.lookup(column, [value] if op == "eq" else value)
+            if best is None or len(rows) < len(best):
+                best = rows
+                if not best:
+                    break
+        return best if best is not None else list(table)
+
+    @staticmethod
+    def _parse_embed(spec: str) -> tuple[str, str, bool, str]:
+        """`alias:table!hint(columns)` -> (key, table, inner join, columns)."""
+        head, _, inner = spec.partition("(")
+        head = head.strip()
+        alias, _, name = head.rpartition(":")
+        name, _, hint = name.partition("!")
+        return (alias or name), name, hint == "inner", inner[:-1] if inner.endswith(")") else inner
+
+    def _embed(self, row: dict, table: str, name: str, columns: str, where: list[tuple]) -> Any:
+        target = self._client.get_table(name)
+        target_pk = target.pk
+        fk = FOREIGN_KEYS.get((table, name), target_pk)
+        if fk in row:
+            # Many-to-one: embed a single object
+            matches = target.lookup(target_pk, [row.get(fk)]) if row.get(fk) is not None else []
+        else:
+            # One-to-many: embed a list
+            source_pk = PRIMARY_KEYS.get(table, f"{table}_id")
+            matches = target.lookup(FOREIGN_KEYS.get((name, table), source_pk), [row.get(source_pk)])
+        matches = [r for r in matches if all(self._check(r, col, op, value) for col, op, value in where)]
+        if fk in row:
+            return self._project(matches[0], name, columns, top=False) if matches else None
+        return [self._project(r, name, columns, top=False) for r in matches]
+
+    def _project(self, row: dict, table: str, columns: str, top: bool = True) -> Optional[dict]:
+        result: dict = {}
+        for column in _split_columns(columns or "*"):
+            if "(" in column:
+                key, name, inner_join, inner = self._parse_embed(column)
+                # Filters such as eq("children.parent_id", ...) apply to the embed;
+                # with !inner they also drop parent rows whose embed is empty
+                where = [
+                    (col.split(".", 1)[1], op, value)
+                    for col, op, value in self._filters
+                    if top and col and col.startswith(f"{key}.") and col.count(".") == 1
+                ] if top else []
+                embedded = self._embed(row, table, name, inner, where)
+                if inner_join and not embedded:
+                    return None
+                result[key] = embedded
+            elif column == "*":
+                result.update(copy.deepcopy(row))
+            else:
+                alias, _, source = column.rpartition(":")
+                result[alias or source] = copy.deepcopy(row.get(source))
+        return result
+
+    def execute(self) -> FakeResponse:
+        if self._client.latency_ms:
+            time.sleep(self._client.latency_ms / 1000)
+        with self._client.lock:
+            self._client.round_trips += 1
+            self._client.calls.append((self._table, self._operation))
+            return self._execute()
+
+    def _execute(self) -> FakeResponse:
+        table = self._client.get_table(self._table)
+
+        if self._operation in ("insert", "upsert"):
+            payloads = self._payload if isinstance(self._payload, list) else [self._payload]
+            written, inserted = [], []
+            try:
+                for payload in payloads:
+                    existing = None
+                    if self._operation == "upsert":
+                        keys = [k.strip() for k in (self._on_conflict or table.pk).split(",")]
+                        candidates = table.lookup(keys[0], [payload.get(keys[0])])
+                        existing = next(
+                            (r for r in candidates if all(_key(r.get(k)) == _key(payload.get(k)) for k in keys)),
+                            None,
+                        )
+                    if existing is not None:
+                        table.update(existing, dict(payload))
+                        written.append(existing)
+                    else:
+                        inserted.append(table.insert(payload))
+                        written.append(inserted[-1])
+            except APIError:
+                # A multi-row insert fails as a whole, like the SQL statement
+                for row in inserted:
+                    table.delete(row)
+                raise
+            return FakeResponse(self._shape(written, table))
+
+        matched = [r for r in self._candidates(table) if self._matches(r)]
+
+        if self._operation == "update":
+            for row in matched:
+                table.update(row, dict(self._payload))
+            return FakeResponse(self._shape(matched, table))
+
+        if self._operation == "delete":
+            shaped = self._shape(matched, table)
+            for row in matched:
+                table.delete(row)
+                if table.name in TOMBSTONED:
+                    self._client.get_table("sync_tombstones").insert({
+                        "table_name": table.name,
+                        "row_id": row[table.pk],
+                        "church_id": row.get("church_id"),
+                        "session_id": row.get("session_id"),
+                    })
+            return FakeResponse(shaped)
+
+        for column, desc in reversed(self._orders):
+            present = [r for r in matched if r.get(column) is not None]
+            missing = [r for r in matched if r.get(column) is None]
+            present.sort(key=lambda r: _SortKey(r.get(column)), reverse=desc)
+            # PostgreSQL puts NULLs last ascending, first descending
+            matched = missing + present if desc else present + missing
+        total = len(matched)
+        matched = matched[self._offset:]
+        if self._limit is not None:
+            matched = matched[: self._limit]
+        data = [p for p in (self._project(r, self._table, self._columns) for r in matched) if p is not None]
+        return FakeResponse(data, count=total if self._count else None)
+
+    def _shape(self, rows: list[dict], table: FakeTable) -> list[dict]:
+        """Rows returned by a write (all columns unless .select() narrowed them)."""
+        return [self._project(r, table.name, self._columns) or {} for r in rows]
+
+
+class _SortKey:
+    """Orders numbers numerically and everything else as text."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        return _compare(self.value, other.value) < 0
+
+
+class FakeRpc:
+    """Builder returned by rpc(); only execute() is supported."""
+
+    def __init__(self, client: "FakeSupabaseClient", fn: str, params: dict):
+        self._client = client
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        if self._client.latency_ms:
+            time.sleep(self._client.latency_ms / 1000)
+        with self._client.lock:
+            self._client.round_trips += 1
+            self._client.calls.append((self._fn, "rpc"))
+            handler = self._client.functions.get(self._fn)
+            if handler is None:
+                raise APIError({
+                    "code": "PGRST202",
+                    "message": f"Could not find the function public.{self._fn} in the schema cache",
+                })
+            return FakeResponse(handler(self._client, **self._params))
+
+
+class FakeSupabaseClient:
+    """Drop-in replacement for `supabase.Client` backed by in-memory tables."""
+
+    def __init__(self, latency_ms: float = 0):
+        self._tables: dict[str, FakeTable] = {name: FakeTable(name) for name in PRIMARY_KEYS}
+        self.functions: dict[str, Callable[..., Any]] = {}
+        self.round_trips = 0
+        self.calls: list[tuple[str, str]] = []
+        # Simulated network round trip per execute(); queries themselves run
+        # one at a time, like statements serialised on a single table lock
+        self.latency_ms = latency_ms
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls) -> "FakeSupabaseClient":
+        try:
+            latency = float(os.environ.get("FAKE_SUPABASE_LATENCY_MS", 0))
+        except ValueError:
+            latency = 0
+        client = cls(latency_ms=latency)
+        seed_path = os.environ.get("FAKE_SUPABASE_SEED")
+        if seed_path:
+            with open(seed_path, encoding="utf-8") as handle:
+                for table, rows in json.load(handle).items():
+                    client.seed(table, rows)
+            print(f"✅ Fake Supabase seeded from {seed_path}")
+        return client
+
+    @property
+    def tables(self) -> dict[str, FakeTable]:
+        return self._tables
+
+    def get_table(self, name: str) -> FakeTable:
+        table = self._tables.get(name)
+        if table is None:
+            raise APIError({
+                "code": "PGRST205",
+                "message": f"Could not find the table 'public.{name}' in the schema cache",
+            })
+        return table
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[dict] = None, *_, **__) -> FakeRpc:
+        return FakeRpc(self, fn, params or {})
+
+    def register_rpc(self, name: str, handler: Callable[..., Any]) -> None:
+        """Expose handler(client, **params) as a database function."""
+        self.functions[name] = handler
+
+    def seed(self, table: str, rows: list[dict]) -> None:
+        """Load rows as-is (no defaults); unknown tables are created."""
+        with self.lock:
+            target = self._tables.get(table)
+            if target is None:
+                target = self._tables[table] = FakeTable(table)
+            for row in rows:
+                target.insert(row, apply_defaults=False)
+
+    def reset_counters(self) -> None:
+        self.round_trips = 0
+        self.calls = []
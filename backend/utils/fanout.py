@@ -0,0 +1,99 @@
+"""
+Fan-out - Run independent PostgREST reads concurrently
+
+Dashboards that need several unrelated reads (a group, its children count
+and its attendance) send them together instead of one after another, so
+the request waits for the slowest read rather than the sum of them:
+
+    group_res, children_res = parallel_queries(group_query, children_query)
+
+Each query is a built (not executed) request from get_supabase(). The
+reads are executed by the sync client on one bounded thread pool shared
+by the process, so a burst of dashboard requests cannot start more
+than QUERY_FANOUT_THREADS extra connections. Reads share the pooled
+transport from http_transport.py and are still recorded by query_trace.py
+(each read runs in a copy of the caller's context, where Flask keeps g and
+request).
+
+Views stay plain sync views; there is no ASGI mode with the async
+Supabase client. Flask runs each async view on a new event loop, and an
+AsyncClient's connections belong to the loop that opened them, so one
+client could not be shared across requests.
+
+Pass None in place of a query that is not needed; its result is None.
+With return_exceptions=True a failed query comes back as its exception,
+so the view can fall back for that read alone. A single query, or a call
+made from a pool thread, runs inline.
+
+Environment:
+    QUERY_FANOUT_THREADS   Shared pool size per process, 0 runs reads one
+                           after another (default: 8)
+"""
+
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+_THREAD_PREFIX = "query-fanout"
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def fanout_threads() -> int:
+    try:
+        return max(int(os.environ.get("QUERY_FANOUT_THREADS", 8)), 0)
+    except ValueError:
+        return 8
+
+
+def _get_pool() -> Optional[ThreadPoolExecutor]:
+    global _pool
+    if _pool is None:
+        threads = fanout_threads()
+        if threads == 0:
+            return None
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=_THREAD_PREFIX)
+    return _pool
+
+
+def _execute(query: Optional[Any]) -> Any:
+    return None if query is None else query.execute()
+
+
+def _run_inline(query: Optional[Any]) -> Future:
+    future: Future = Future()
+    try:
+        future.set_result(_execute(query))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def _submit(queries: tuple) -> list[Future]:
+    pool = _get_pool()
+    pending = [q for q in queries if q is not None]
+    if pool is None or len(pending) < 2 or threading.current_thread().name.startswith(_THREAD_PREFIX):
+        return [_run_inline(q) for q in queries]
+    return [
+        _run_inline(None) if q is None else pool.submit(contextvars.copy_context().run, _execute, q)
+        for q in queries
+    ]
+
+
+def _result(future: Future, return_exceptions: bool) -> Any:
+    if return_exceptions:
+        exc = future.exception()
+        if exc is not None:
+            return exc
+    return future.result()
+
+
+def parallel_queries(*queries: Optional[Any], return_exceptions: bool = False) -> list:
+    """Execute the queries concurrently and return their responses in order."""
+    futures = _submit(queries)
+    return [_result(future, return_exceptions) for future in futures]
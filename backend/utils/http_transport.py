@@ -0,0 +1,270 @@
+"""
+HTTP Transport - Pooled, instrumented transport for the Supabase client
+
+Every `.execute()` is one HTTP request to PostgREST. The shared client is
+given an httpx.Client built here so that:
+
+- connections are pooled and kept alive (HTTP/2 where the server offers
+  it), sized to the concurrent requests, notification workers and fan-out
+  threads (utils/fanout.py) that share the client in one process; past the
+  pool size requests wait for a connection
+- connect/read/write/pool timeouts are explicit instead of the library's
+  120 second default
+- idempotent reads (GET/HEAD) are retried with exponential backoff and full
+  jitter on connection errors, read timeouts and 502/503/504; writes are
+  never retried
+- each request's latency is recorded in a histogram keyed by table and
+  operation (exposed on /api/health)
+
+Environment:
+    WEB_THREADS                  Concurrent PostgREST requests per worker (default: 4)
+    SUPABASE_POOL_SIZE           Max connections (default: WEB_THREADS + NOTIFICATION_WORKERS
+                                 + QUERY_FANOUT_THREADS)
+    SUPABASE_HTTP2               Negotiate HTTP/2 (default: true)
+    SUPABASE_KEEPALIVE_SECONDS   Idle time before a pooled connection is closed (default: 60)
+    SUPABASE_CONNECT_TIMEOUT     Seconds to open a connection (default: 5)
+    SUPABASE_READ_TIMEOUT        Seconds to wait for a response (default: 30)
+    SUPABASE_READ_RETRIES        Extra attempts for failed reads (default: 2)
+    SUPABASE_RETRY_BACKOFF       Base backoff in seconds, doubled per attempt (default: 0.1)
+"""
+
+import bisect
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +inf)
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+RETRY_METHODS = {"GET", "HEAD"}
+RETRY_STATUSES = {502, 503, 504}
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def classify_request(request: httpx.Request) -> tuple[str, str]:
+    """
+    Map a PostgREST request to (table, operation).
+
+        GET  /rest/v1/children             -> ("children", "select")
+        POST /rest/v1/rpc/admin_stats      -> ("admin_stats", "rpc")
+        POST /rest/v1/users (merge-dups)   -> ("users", "upsert")
+    """
+    path = request.url.path
+    marker = "/rest/v1/"
+    index = path.find(marker)
+    resource = path[index + len(marker):] if index != -1 else path.strip("/")
+    if resource.startswith("rpc/"):
+        return resource[4:], "rpc"
+
+    method = request.method
+    if method in ("GET", "HEAD"):
+        op = "select"
+    elif method == "POST":
+        op = "upsert" if "resolution=" in request.headers.get("prefer", "") else "insert"
+    elif method == "PATCH":
+        op = "update"
+    elif method == "DELETE":
+        op = "delete"
+    else:
+        op = method.lower()
+    return resource or "-", op
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histograms per (table, operation)."""
+
+    def __init__(self, buckets_ms: Optional[list[float]] = None):
+        self.buckets_ms = buckets_ms or LATENCY_BUCKETS_MS
+        self._series: dict[tuple[str, str], dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, table: str, op: str, seconds: float, error: bool = False) -> None:
+        ms = seconds * 1000
+        slot = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            series = self._series.get((table, op))
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets_ms) + 1), "count": 0, "sum": 0.0, "max": 0.0, "errors": 0}
+                self._series[(table, op)] = series
+            series["counts"][slot] += 1
+            series["count"] += 1
+            series["sum"] += ms
+            series["max"] = max(series["max"], ms)
+            if error:
+                series["errors"] += 1
+
+    def _quantile(self, counts: list[int], total: int, q: float, max_ms: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (capped at the max seen)."""
+        rank = q * total
+        seen = 0
+        for slot, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                bound = self.buckets_ms[slot] if slot < len(self.buckets_ms) else max_ms
+                return round(min(bound, max_ms), 2)
+        return round(max_ms, 2)
+
+    def snapshot(self) -> list[dict]:
+        """Per-series summary, slowest total time first."""
+        with self._lock:
+            items = [(key, dict(series, counts=list(series["counts"]))) for key, series in self._series.items()]
+        rows = []
+        for (table, op), series in items:
+            total = series["count"]
+            rows.append({
+                "table": table,
+                "op": op,
+                "count": total,
+                "errors": series["errors"],
+                "meanMs": round(series["sum"] / total, 2) if total else 0.0,
+                "p50Ms": self._quantile(series["counts"], total, 0.5, series["max"]),
+                "p95Ms": self._quantile(series["counts"], total, 0.95, series["max"]),
+                "maxMs": round(series["max"], 2),
+                "buckets": dict(zip([f"le_{b}" for b in self.buckets_ms] + ["le_inf"], series["counts"])),
+            })
+        rows.sort(key=lambda row: row["meanMs"] * row["count"], reverse=True)
+        return rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Wraps a pooled transport with read retries and latency recording."""
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        histogram: LatencyHistogram,
+        read_retries: int = 2,
+        backoff: float = 0.1,
+    ):
+        self.transport = transport
+        self.histogram = histogram
+        self.read_retries = max(read_retries, 0)
+        self.backoff = backoff
+        self.retries = 0
+
+    def _sleep(self, attempt: int) -> None:
+        # Full jitter: uniform in [0, base * 2^attempt]
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        table, op = classify_request(request)
+        attempts = 1 + (self.read_retries if request.method in RETRY_METHODS else 0)
+        started = time.perf_counter()
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                response = self.transport.handle_request(request)
+            except RETRY_EXCEPTIONS:
+                if last:
+                    self.histogram.observe(table, op, time.perf_counter() - started, error=True)
+                    raise
+            except Exception:
+                self.histogram.observe(table, op, time.perf_counter() - started, error=True)
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last:
+                    self.histogram.observe(table, op, time.perf_counter() - started, error=response.status_code >= 500)
+                    return response
+                response.close()
+            self.retries += 1
+            self._sleep(attempt)
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class TransportSettings:
+    """Transport configuration, read from the environment."""
+
+    def __init__(self):
+        threads = _env_int("WEB_THREADS", 4)
+        workers = _env_int("NOTIFICATION_WORKERS", 2)
+        fanout = _env_int("QUERY_FANOUT_THREADS", 8)
+        self.pool_size = max(_env_int("SUPABASE_POOL_SIZE", threads + workers + fanout), 1)
+        self.http2 = os.environ.get("SUPABASE_HTTP2", "true").lower() != "false"
+        self.keepalive_seconds = _env_float("SUPABASE_KEEPALIVE_SECONDS", 60)
+        self.connect_timeout = _env_float("SUPABASE_CONNECT_TIMEOUT", 5)
+        self.read_timeout = _env_float("SUPABASE_READ_TIMEOUT", 30)
+        self.read_retries = _env_int("SUPABASE_READ_RETRIES", 2)
+        self.retry_backoff = _env_float("SUPABASE_RETRY_BACKOFF", 0.1)
+
+    def as_dict(self) -> dict:
+        return {
+            "poolSize": self.pool_size,
+            "http2": self.http2,
+            "keepaliveSeconds": self.keepalive_seconds,
+            "connectTimeout": self.connect_timeout,
+            "readTimeout": self.read_timeout,
+            "readRetries": self.read_retries,
+        }
+
+
+_histogram = LatencyHistogram()
+_transport: Optional[InstrumentedTransport] = None
+_settings: Optional[TransportSettings] = None
+
+
+def build_http_client(settings: Optional[TransportSettings] = None) -> httpx.Client:
+    """Create the pooled httpx.Client handed to create_client()."""
+    global _transport, _settings
+    settings = settings or TransportSettings()
+    http2 = settings.http2
+    if http2:
+        try:
+            import h2  # noqa: F401 - httpx needs it for HTTP/2
+        except ImportError:
+            print("⚠️ h2 not installed, Supabase transport falls back to HTTP/1.1")
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.pool_size,
+        max_keepalive_connections=settings.pool_size,
+        keepalive_expiry=settings.keepalive_seconds,
+    )
+    pooled = httpx.HTTPTransport(http2=http2, limits=limits)
+    _transport = InstrumentedTransport(pooled, _histogram, settings.read_retries, settings.retry_backoff)
+    _settings = settings
+    timeout = httpx.Timeout(
+        connect=settings.connect_timeout,
+        read=settings.read_timeout,
+        write=settings.read_timeout,
+        # Waiting for a pooled connection longer than a read means the pool is too small
+        pool=settings.read_timeout,
+    )
+    return httpx.Client(transport=_transport, timeout=timeout, follow_redirects=True)
+
+
+def get_latency_histogram() -> LatencyHistogram:
+    return _histogram
+
+
+def get_transport_stats() -> dict:
+    """Pool settings, retry count and per table/op latency (for /api/health)."""
+    return {
+        "settings": _settings.as_dict() if _settings else None,
+        "retries": _transport.retries if _transport else 0,
+        "latency": _histogram.snapshot(),
+    }
@@ -0,0 +1,204 @@
+"""
+Idempotency - Replay responses of retried check-in, checkout and booking requests
+Phase 3B and 6A from USER_CASE_FLOW.md
+
+Tablets retry a POST when the response is lost to a timeout. Without a key
+the retry runs the whole route again and creates a second check-in record
+or booking attempt. Mutating routes are wrapped with @idempotent; a client
+that sends an `Idempotency-Key` header (any unique string, e.g. a UUID per
+tap) gets:
+
+- the first request: processed as usual, and the response is stored
+- a retry with the same key: the stored response, with no PostgREST calls
+  and an `Idempotent-Replayed: true` header
+- a retry while the first is still running: waits up to
+  IDEMPOTENCY_WAIT_SECONDS for it, then 409 with Retry-After
+- the same key on a different request (path or body): 422
+
+Keys are scoped to the church and, when the request carries a session
+token, to the signed-in user, so a key another caller happens to reuse
+runs as a new request instead of replaying their response. Requests
+without the header behave as before. Responses are kept in the
+shared code store (utils/code_store.py), so a retry that lands on another
+worker is answered too. 5xx responses are not kept, so those can be
+retried. The store is bounded: entries expire after IDEMPOTENCY_TTL_HOURS,
+responses over IDEMPOTENCY_MAX_BODY_BYTES are replayed as a 409 (already
+applied) instead of in full, and past IDEMPOTENCY_MAX_KEYS new keys are not
+recorded.
+
+Environment:
+    IDEMPOTENCY_TTL_HOURS        How long responses are replayed (default: 24)
+    IDEMPOTENCY_WAIT_SECONDS     Wait for an in-flight original (default: 5)
+    IDEMPOTENCY_LOCK_SECONDS     Claim lifetime if a worker dies mid-request (default: 60)
+    IDEMPOTENCY_MAX_BODY_BYTES   Largest response replayed in full (default: 262144)
+    IDEMPOTENCY_MAX_KEYS         Keys kept per host (default: 50000)
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from flask import Response, jsonify, make_response, request
+
+from supabase_client import get_default_church_id
+from utils.auth import get_current_user
+from utils.code_store import get_code_store
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_store = None
+_store_lock = threading.Lock()
+
+# Cached size of the store; counting on every request would cost a scan
+_size = {"count": 0, "checked_at": 0.0}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = get_code_store("idempotency")
+        return _store
+
+
+def _code(key: str) -> str:
+    """Store key for an Idempotency-Key: scoped to the church and the caller."""
+    user = get_current_user() if request.headers.get("Authorization") else None
+    scope = f"{get_default_church_id() or ''}\n{(user or {}).get('id') or ''}\n"
+    return hashlib.sha256((scope + key).encode("utf-8")).hexdigest()
+
+
+def _fingerprint() -> str:
+    """What the key was first used for: method, path, query string and body."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.full_path}\n".encode("utf-8"))
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _has_room(store) -> bool:
+    now = time.monotonic()
+    if now - _size["checked_at"] > 10:
+        _size["count"] = len(store)
+        _size["checked_at"] = now
+    return _size["count"] < int(_env_float("IDEMPOTENCY_MAX_KEYS", 50000))
+
+
+def _replay(entry: dict) -> Response:
+    if entry.get("body") is None:
+        response = jsonify({
+            "error": "Request already processed",
+            "message": f"The response of this {HEADER} was too large to keep; the request was applied once.",
+            "status": entry.get("status"),
+        })
+        response.status_code = 409
+    else:
+        response = Response(entry["body"], status=entry["status"], mimetype=entry.get("mimetype"))
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _record(store, code: str, fingerprint: str, response: Response) -> None:
+    body = response.get_data(as_text=True)
+    if len(body.encode("utf-8")) > int(_env_float("IDEMPOTENCY_MAX_BODY_BYTES", 262144)):
+        body = None
+    store[code] = {
+        "state": "done",
+        "fingerprint": fingerprint,
+        "status": response.status_code,
+        "mimetype": response.mimetype,
+        "body": body,
+        "expires_at": datetime.utcnow() + timedelta(hours=_env_float("IDEMPOTENCY_TTL_HOURS", 24)),
+    }
+
+
+def idempotent(view: Callable) -> Callable:
+    """Honor the Idempotency-Key header on a mutating route."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        try:
+            store = _get_store()
+            code = _code(key)
+            fingerprint = _fingerprint()
+        except Exception as exc:  # pragma: no cover - the store must never block a check-in
+            print(f"⚠️ Error reading {HEADER}: {exc}")
+            return view(*args, **kwargs)
+
+        # A second attempt claims the key when the original gave up (5xx)
+        for _ in range(2):
+            claim = {
+                "state": "pending",
+                "fingerprint": fingerprint,
+                "expires_at": datetime.utcnow() + timedelta(seconds=_env_float("IDEMPOTENCY_LOCK_SECONDS", 60)),
+            }
+            if _has_room(store) and store.add(code, claim):
+                break
+            entry = _wait_for(store, code)
+            if entry is None:
+                continue
+            if entry.get("fingerprint") != fingerprint:
+                return jsonify({
+                    "error": f"{HEADER} reused",
+                    "message": f"This {HEADER} was already used for a different request",
+                }), 422
+            if entry.get("state") != "done":
+                response = jsonify({
+                    "error": "Request in progress",
+                    "message": f"A request with this {HEADER} is still being processed",
+                })
+                response.status_code = 409
+                response.headers["Retry-After"] = "1"
+                return response
+            return _replay(entry)
+        else:
+            # Store full (IDEMPOTENCY_MAX_KEYS)
+            print(f"⚠️ {HEADER} not recorded, store is full")
+            return view(*args, **kwargs)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            store.pop(code, None)
+            raise
+        try:
+            if response.status_code >= 500:
+                store.pop(code, None)
+            else:
+                _record(store, code, fingerprint, response)
+        except Exception as exc:  # pragma: no cover - the response is already built
+            print(f"⚠️ Error storing {HEADER} response: {exc}")
+        return response
+
+    return wrapper
+
+
+def _wait_for(store, code: str) -> Optional[dict]:
+    """The stored entry, waiting while the original request is in flight."""
+    deadline = time.monotonic() + _env_float("IDEMPOTENCY_WAIT_SECONDS", 5)
+    while True:
+        entry = store.get(code)
+        if entry is None or entry["expires_at"] <= datetime.utcnow():
+            return None
+        if entry.get("state") == "done" or time.monotonic() >= deadline:
+            return entry
+        time.sleep(0.05)
@@ -0,0 +1,285 @@
+"""
+Live Status - Pub/sub of check-in status changes for Server-Sent Events
+Phase 4 and 6A from USER_CASE_FLOW.md
+
+Parent phones and teacher tablets used to poll /api/checkin/status/<child_id>
+and /api/checkin/active, one check_in_records query per poll. They can now
+hold GET /api/checkin/stream open instead and receive events as they happen:
+
+- checked_in     a child was checked in (QR, OTP, manual or bulk)
+- pickup_ready   a teacher sent the pickup notification
+- checked_out    a child was released
+- resync         something changed on another worker; refetch once
+
+Check-in and checkout routes publish() to the broker of their worker, which
+wakes the streams waiting on it; the event itself is the payload, so no
+query is made to deliver it. Each publish also advances the worker's
+sequence in the church's entry of the shared code store
+(utils/code_store.py), a map of worker -> last sequence. Streams on the
+other workers of the host notice within LIVE_STATUS_REMOTE_SECONDS that
+some other worker's sequence moved and send `resync`, however often their
+own worker published meanwhile. An idle stream only blocks on a condition
+variable; the entry is read at most once per LIVE_STATUS_REMOTE_SECONDS per
+church and worker, whatever the number of streams.
+
+Event ids are "<broker>-<seq>"; a client that reconnects with
+Last-Event-ID gets the events it missed while they are still in the
+worker's history, otherwise a `resync`.
+
+The app is served by gunicorn's gevent worker (Procfile), where an open
+stream is a parked greenlet rather than a request thread, so a worker holds
+most of its WEB_CONNECTIONS as streams. Under a threaded server (flask run,
+gthread) each stream holds a thread and the default cap is half of
+WEB_THREADS. Over the cap (LIVE_STATUS_MAX_STREAMS) the endpoint answers
+503 and the client keeps polling.
+
+Environment:
+    LIVE_STATUS_MAX_STREAMS     Open streams per worker (default: 90% of WEB_CONNECTIONS under
+                                gevent, otherwise half of WEB_THREADS)
+    LIVE_STATUS_HEARTBEAT       Seconds between keep-alive comments (default: 15)
+    LIVE_STATUS_MAX_SECONDS     Stream lifetime before the client reconnects (default: 300)
+    LIVE_STATUS_REMOTE_SECONDS  How often other workers' changes are checked (default: 2)
+    LIVE_STATUS_HISTORY         Events kept per worker for reconnects (default: 500)
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from utils.code_store import get_code_store
+
+# Worker sequences only need to outlive the streams watching them
+VERSION_TTL = timedelta(days=1)
+
+_broker: Optional["StatusBroker"] = None
+_broker_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _cooperative() -> bool:
+    """True under gunicorn's gevent worker, where a stream is a greenlet."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def _default_max_streams() -> int:
+    if _cooperative():
+        # Keep a tenth of the connections for ordinary requests
+        connections = int(_env_float("WEB_CONNECTIONS", 1000))
+        return max(connections - max(connections // 10, 1), 1)
+    threads = int(_env_float("WEB_THREADS", 4))
+    return max(threads // 2, 1)
+
+
+class StatusBroker:
+    """Per-worker event history plus a condition variable the streams wait on."""
+
+    def __init__(self, history: int = 500, max_streams: int = 2):
+        self.name = uuid.uuid4().hex[:8]
+        self.max_streams = max_streams
+        self._events: deque = deque(maxlen=history)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._streams = 0
+        self._versions = get_code_store("live_status")
+        # church_id -> (read at, other workers' sequences), shared by streams
+        self._remote: dict[str, tuple[float, dict[str, int]]] = {}
+        self.published = 0
+
+    # Publishing
+
+    def publish(self, church_id: str, event_type: str, child_id: str, **fields) -> dict:
+        """Record an event and wake every waiting stream."""
+        event = {
+            "type": event_type,
+            "churchId": church_id,
+            "childId": child_id,
+            "at": datetime.utcnow().isoformat(),
+            **{key: value for key, value in fields.items() if value is not None},
+        }
+        with self._cond:
+            self._seq += 1
+            event["id"] = f"{self.name}-{self._seq}"
+            self._events.append((self._seq, event))
+            self.published += 1
+            seq = self._seq
+            self._cond.notify_all()
+        self._share_seq(church_id, seq)
+        return event
+
+    def _share_seq(self, church_id: str, seq: int) -> None:
+        now = time.time()
+
+        def advance(entry: Optional[dict]) -> dict:
+            # Workers that stopped publishing a day ago have restarted
+            workers = {
+                name: mark for name, mark in ((entry or {}).get("workers") or {}).items()
+                if now - mark[1] < VERSION_TTL.total_seconds()
+            }
+            workers[self.name] = [max(seq, workers.get(self.name, [0])[0]), now]
+            return {"workers": workers, "expires_at": datetime.utcnow() + VERSION_TTL}
+
+        try:
+            self._versions.update(church_id, advance)
+        except Exception as exc:  # pragma: no cover - never fail the write path
+            print(f"⚠️ Error sharing live status sequence: {exc}")
+
+    def remote_seqs(self, church_id: str, max_age: float = 0) -> dict[str, int]:
+        """
+        Last sequence published for the church by each other worker, read
+        again only when the last read is older than max_age seconds.
+        """
+        now = time.monotonic()
+        cached = self._remote.get(church_id)
+        if cached is not None and now - cached[0] < max_age:
+            return cached[1]
+        entry = self._versions.get(church_id)
+        workers = (entry or {}).get("workers") or {}
+        seqs = {name: mark[0] for name, mark in workers.items() if name != self.name}
+        self._remote[church_id] = (now, seqs)
+        return seqs
+
+    # Streams
+
+    def open_stream(self) -> bool:
+        with self._cond:
+            if self._streams >= self.max_streams:
+                return False
+            self._streams += 1
+            return True
+
+    def close_stream(self) -> None:
+        with self._cond:
+            self._streams -= 1
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def since(self, last_event_id: Optional[str]) -> Optional[int]:
+        """
+        Sequence to resume from for a Last-Event-ID, or None when the events
+        after it are no longer in this worker's history.
+        """
+        if not last_event_id:
+            return self._seq
+        name, _, seq = last_event_id.partition("-")
+        with self._cond:
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            if name != self.name or not seq.isdigit() or int(seq) + 1 < oldest:
+                return None
+            return int(seq)
+
+    def wait(self, after_seq: int, timeout: float) -> list[tuple[int, dict]]:
+        """Events newer than after_seq, blocking up to timeout for the first one."""
+        with self._cond:
+            if self._seq <= after_seq:
+                self._cond.wait(timeout)
+            # Sequences are contiguous, so the newest events are at the end
+            newer = min(self._seq - after_seq, len(self._events))
+            return [self._events[i] for i in range(len(self._events) - newer, len(self._events))]
+
+    def stats(self) -> dict:
+        return {
+            "openStreams": self._streams,
+            "maxStreams": self.max_streams,
+            "published": self.published,
+            "history": len(self._events),
+        }
+
+
+def get_status_broker() -> StatusBroker:
+    """Get the process-wide broker."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            max_streams = int(_env_float("LIVE_STATUS_MAX_STREAMS", _default_max_streams()))
+            history = int(_env_float("LIVE_STATUS_HISTORY", 500))
+            _broker = StatusBroker(history=history, max_streams=max_streams)
+        return _broker
+
+
+def publish_status(church_id: Optional[str], event_type: str, child_id: Optional[str], **fields) -> None:
+    """Publish a status change; failures are logged, never raised."""
+    if not church_id or not child_id:
+        return
+    try:
+        get_status_broker().publish(church_id, event_type, child_id, **fields)
+    except Exception as exc:  # pragma: no cover - never fail the write path
+        print(f"⚠️ Error publishing live status: {exc}")
+
+
+def _format(event_type: str, data: str, event_id: Optional[str] = None) -> str:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event_type}\ndata: {data}\n\n"
+
+
+def stream_events(
+    broker: StatusBroker,
+    church_id: str,
+    child_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    initial: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Yield SSE frames for the church, filtered to one child and/or session.
+    The caller reserves a slot with open_stream() and releases it with
+    close_stream() when the response is closed.
+    """
+    heartbeat = _env_float("LIVE_STATUS_HEARTBEAT", 15)
+    lifetime = _env_float("LIVE_STATUS_MAX_SECONDS", 300)
+    remote_every = _env_float("LIVE_STATUS_REMOTE_SECONDS", 2)
+
+    def matches(event: dict) -> bool:
+        return (
+            event["churchId"] == church_id
+            and (child_id is None or event["childId"] == child_id)
+            and (session_id is None or event.get("sessionId") == session_id)
+        )
+
+    # Positions are taken now, not when the first frame is pulled, so events
+    # published in between are not missed
+    after = broker.since(last_event_id)
+    seen = broker.remote_seqs(church_id)
+
+    def frames(after: Optional[int], seen: dict[str, int]) -> Iterator[str]:
+        yield "retry: 3000\n\n"
+        if after is None:
+            after = broker.last_seq
+            yield _format("resync", json.dumps({"reason": "history"}))
+        if initial is not None:
+            yield _format("status", initial)
+
+        started = last_beat = time.monotonic()
+        while time.monotonic() - started < lifetime:
+            for seq, event in broker.wait(after, min(remote_every, heartbeat)):
+                after = seq
+                if matches(event):
+                    yield _format(event["type"], json.dumps(event), event["id"])
+
+            # Changes published by another worker on this host
+            current = broker.remote_seqs(church_id, max_age=remote_every)
+            if any(seq > seen.get(name, 0) for name, seq in current.items()):
+                yield _format("resync", json.dumps({"reason": "remote"}))
+            seen = current
+
+            if time.monotonic() - last_beat >= heartbeat:
+                last_beat = time.monotonic()
+                yield ": keep-alive\n\n"
+
+    return frames(after, seen)
@@ -0,0 +1,223 @@
+"""
+Notification Queue - Background dispatch for parent notifications
+Phase 3B.4, 6A.2, 6A.4 from USER_CASE_FLOW.md
+
+create_notification() does an insert, a guardian lookup, email/SMS attempts
+and an update. Running that inline made every check-in/checkout wait on
+3+ extra Supabase round trips, so routes hand notifications to this queue
+and return as soon as the attendance record is written.
+
+- Bounded: when the queue is full the notification runs inline instead of
+  being dropped (the request is slower, but the parent still hears).
+- Retries: a send that raises or returns None is retried with backoff.
+- Drain on shutdown: queued notifications are flushed at interpreter exit
+  (gunicorn worker shutdown) up to NOTIFICATION_DRAIN_SECONDS.
+
+Environment:
+    NOTIFICATION_DISPATCH        async | sync (default: async)
+    NOTIFICATION_QUEUE_SIZE      Max queued notifications (default: 500)
+    NOTIFICATION_WORKERS         Dispatch threads per process (default: 2)
+    NOTIFICATION_MAX_ATTEMPTS    Attempts per notification (default: 3)
+    NOTIFICATION_DRAIN_SECONDS   Max time to drain on shutdown (default: 10)
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+LATENCY_SAMPLES = 500
+RETRY_BACKOFF_SECONDS = 0.5
+
+_queue: Optional["NotificationQueue"] = None
+_queue_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "attempts", "enqueued_at")
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+
+
+def _percentile(samples: list[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 2)
+
+
+class NotificationQueue:
+    """Bounded queue drained by a small pool of daemon threads."""
+
+    def __init__(self, maxsize: int = 500, workers: int = 2, max_attempts: int = 3):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_attempts = max(1, max_attempts)
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=maxsize)
+        self._threads: list[threading.Thread] = []
+        self._started = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self._wait_times: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._total_times: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._counters = {
+            "enqueued": 0,
+            "delivered": 0,
+            "failed": 0,
+            "retried": 0,
+            "inline": 0,
+        }
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"notification-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._started = True
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> bool:
+        """
+        Queue fn(*args, **kwargs) for background delivery.
+
+        Returns:
+            True if queued, False if it ran inline (queue full or shut down)
+        """
+        job = _Job(fn, args, kwargs)
+        if not self._closed:
+            self._start()
+            try:
+                self._queue.put_nowait(job)
+                self._count("enqueued")
+                return True
+            except queue.Full:
+                print("⚠️ Notification queue full, sending inline")
+
+        self._count("inline")
+        self._run(job)
+        return False
+
+    def _run(self, job: _Job) -> bool:
+        """Run a job, retrying with backoff. Returns True if delivered."""
+        started = time.monotonic()
+        with self._lock:
+            self._wait_times.append(started - job.enqueued_at)
+
+        while job.attempts < self.max_attempts:
+            job.attempts += 1
+            try:
+                if job.fn(*job.args, **job.kwargs) is not None:
+                    self._count("delivered")
+                    with self._lock:
+                        self._total_times.append(time.monotonic() - job.enqueued_at)
+                    return True
+            except Exception as exc:  # pragma: no cover - defensive logging
+                print(f"⚠️ Error dispatching notification ({job.fn.__name__}): {exc}")
+            if job.attempts < self.max_attempts:
+                self._count("retried")
+                time.sleep(RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1)))
+
+        self._count("failed")
+        print(f"⚠️ Notification {job.fn.__name__} failed after {job.attempts} attempts")
+        return False
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def drain(self, timeout: float = 10) -> bool:
+        """
+        Stop accepting work and wait for queued notifications to finish.
+        Returns True if the queue emptied within `timeout` seconds.
+        """
+        self._closed = True
+        if not self._started:
+            return True
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        drained = not self._queue.unfinished_tasks
+
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        if not drained:
+            print(f"⚠️ Notification queue shutdown with {self._queue.qsize()} notifications pending")
+        return drained
+
+    def stats(self) -> dict:
+        """Queue depth, counters and latency (ms) for the health endpoint."""
+        with self._lock:
+            wait_times = list(self._wait_times)
+            total_times = list(self._total_times)
+            counters = dict(self._counters)
+        return {
+            "depth": self._queue.qsize(),
+            "capacity": self.maxsize,
+            "workers": self.workers,
+            **counters,
+            "waitMsP50": _percentile(wait_times, 50),
+            "waitMsP95": _percentile(wait_times, 95),
+            "deliveryMsP50": _percentile(total_times, 50),
+            "deliveryMsP95": _percentile(total_times, 95),
+        }
+
+
+def get_notification_queue() -> NotificationQueue:
+    """Get the process-wide notification queue (created on first use)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = NotificationQueue(
+                maxsize=_env_int("NOTIFICATION_QUEUE_SIZE", 500),
+                workers=_env_int("NOTIFICATION_WORKERS", 2),
+                max_attempts=_env_int("NOTIFICATION_MAX_ATTEMPTS", 3),
+            )
+            atexit.register(_queue.drain, _env_int("NOTIFICATION_DRAIN_SECONDS", 10))
+        return _queue
+
+
+def dispatch_notification(fn: Callable, *args: Any, **kwargs: Any) -> None:
+    """
+    Send a notification without blocking the request.
+
+    Usage:
+        dispatch_notification(notify_check_in, child_id=..., guardian_id=...)
+
+    With NOTIFICATION_DISPATCH=sync the call runs inline (local debugging).
+    """
+    if os.environ.get("NOTIFICATION_DISPATCH", "async").lower() == "sync":
+        fn(*args, **kwargs)
+        return
+    get_notification_queue().submit(fn, *args, **kwargs)
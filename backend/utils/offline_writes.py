@@ -0,0 +1,64 @@
+"""
+Offline Sync Writes - One RPC call for an upload's check-outs and bookings
+Phase 6A from USER_CASE_FLOW.md
+
+Wraps apply_offline_sync() from database/migrations/008_offline_sync_writes.sql,
+which closes the uploaded check-outs and moves the changed bookings in one
+statement per table, each row with its own kiosk time and guarded on the
+state it was read in. Until the migration is run PostgREST answers
+PGRST202; the function is then skipped for the life of the process and
+routes/sync.py sends its per-timestamp guarded updates instead.
+"""
+
+import threading
+from typing import Any, Optional
+
+FUNCTION = "apply_offline_sync"
+
+# Set once PostgREST reports the function missing
+_missing = threading.Event()
+
+
+def is_available() -> bool:
+    return not _missing.is_set()
+
+
+def apply_offline_sync(
+    client: Any,
+    church_id: str,
+    closes: list[dict],
+    bookings: list[dict],
+) -> Optional[dict]:
+    """
+    Write check-outs and booking changes with one RPC round trip.
+
+    Args:
+        closes: [{"record_id", "timestamp_out"}]
+        bookings: [{"booking_id", "status", "checked_in_at"?, "checked_out_at"?}]
+
+    Returns:
+        {"closed": [record_id], "bookings": [booking_id]} - the rows updated;
+        None if the function is not deployed.
+
+    Raises:
+        Any other database error. Nothing was written in that case.
+    """
+    if _missing.is_set() or not hasattr(client, "rpc"):
+        return None
+
+    try:
+        res = client.rpc(FUNCTION, {
+            "p_church_id": church_id,
+            "p_closes": closes,
+            "p_bookings": bookings,
+        }).execute()
+    except Exception as exc:
+        message = str(exc)
+        # PGRST202: function not found in the schema cache (migration not run)
+        if "PGRST202" in message or "Could not find the function" in message:
+            if not _missing.is_set():
+                _missing.set()
+                print(f"⚠️ {FUNCTION}() not deployed, using per-timestamp updates (run migration 008)")
+            return None
+        raise
+    return res.data or {}
@@ -0,0 +1,206 @@
+"""
+Pagination - Keyset (seek) pagination over PostgREST queries
+
+Pages are ordered on (sort column, id column) and each page starts after
+the last row of the previous one, so reading page N costs the same as
+reading page 1 no matter how much history sits in front of it. The sort
+column may hold NULLs (created_at and timestamp have defaults but are
+nullable); they sort where PostgreSQL puts them and a cursor can sit on one.
+
+List endpoints accept `?limit=&cursor=` and return `next_cursor` (an
+opaque token, null on the last page):
+
+    try:
+        limit, after = get_page_args(default_limit=100)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    rows, next_cursor = fetch_page(query, "timestamp_in", "record_id", limit, after)
+    return jsonify({"data": [...], "next_cursor": next_cursor})
+
+Lists ordered on more than one column (sessions: newest date first, then
+start time) use fetch_ordered_page() with get_page_args(keys=3).
+"""
+
+import base64
+import json
+from typing import Any, Callable, Iterator, Optional
+
+from flask import request
+
+MAX_PAGE_SIZE = 500
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for use inside a PostgREST or=() logic tree."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_filter(sort_column: str, id_column: str, after: tuple[Any, Any], desc: bool = True) -> str:
+    """
+    Build the or_() filter selecting rows strictly after `after` in
+    (sort_column, id_column) order, NULL sort values included.
+
+    Example (desc):
+        timestamp_in.lt."2025-01-05",and(timestamp_in.eq."2025-01-05",record_id.lt."abc")
+    """
+    return seek_filter([(sort_column, desc), (id_column, desc)], after, nullable=(sort_column,))
+
+
+def seek_filter(order: list[tuple[str, bool]], after: tuple, nullable: tuple[str, ...] = ()) -> str:
+    """
+    Build the or_() filter selecting rows strictly after `after` in a
+    multi-column order of (column, desc) pairs. NULLs in the `nullable`
+    columns sort as PostgreSQL puts them: last ascending, first descending.
+    The last column must be a unique, non-null id.
+
+    Example ((session_date desc, start_time asc, session_id asc)):
+        session_date.lt."2025-01-05",
+        and(session_date.eq."2025-01-05",or(start_time.gt."10:00",start_time.is.null)),
+        and(session_date.eq."2025-01-05",start_time.eq."10:00",session_id.gt."abc")
+    """
+    branches, same = [], []
+    for (column, desc), value in zip(order, after):
+        if value is None:
+            beyond = f"{column}.not.is.null" if desc else None
+            equal = f"{column}.is.null"
+        else:
+            beyond = f"{column}.{'lt' if desc else 'gt'}.{_quote(value)}"
+            if column in nullable and not desc:
+                beyond = f"or({beyond},{column}.is.null)"
+            equal = f"{column}.eq.{_quote(value)}"
+        if beyond:
+            branches.append(f"and({','.join(same + [beyond])})" if same else beyond)
+        same.append(equal)
+    return ",".join(branches)
+
+
+def apply_keyset(query, sort_column: str, id_column: str, after: Optional[tuple[Any, Any]], desc: bool = True):
+    """Add the keyset filter (if any) and the stable (sort, id) ordering to a query."""
+    if after is not None:
+        query = query.or_(keyset_filter(sort_column, id_column, after, desc))
+    return query.order(sort_column, desc=desc).order(id_column, desc=desc)
+
+
+def iter_keyset(
+    build_query: Callable[[], Any],
+    sort_column: str,
+    id_column: str,
+    page_size: int = 500,
+    desc: bool = True,
+    after: Optional[tuple[Any, Any]] = None,
+) -> Iterator[list[dict]]:
+    """
+    Yield successive pages of rows until the query is exhausted.
+
+    Args:
+        build_query: Returns a fresh filtered query (select + filters, no
+            order/limit) each time it is called
+        sort_column: Column to order on (e.g. "timestamp_in")
+        id_column: Unique tie-breaker (e.g. "record_id"); must be selected
+        page_size: Rows per round trip
+        desc: Newest first when True
+        after: Optional (sort value, id) to start after
+    """
+    while True:
+        query = apply_keyset(build_query(), sort_column, id_column, after, desc)
+        rows = query.limit(page_size).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1][sort_column], rows[-1][id_column])
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque, URL-safe token for the position after a row's (sort..., id) values."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, keys: int = 2) -> tuple:
+    """
+    Inverse of encode_cursor(). Raises ValueError for malformed tokens.
+
+    The last (id) value must be set; sort values may be null.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(value, list) or len(value) != keys or value[-1] is None:
+        raise ValueError("Invalid cursor")
+    return tuple(value)
+
+
+def get_page_args(
+    default_limit: int = 50,
+    max_limit: int = MAX_PAGE_SIZE,
+    keys: int = 2,
+) -> tuple[int, Optional[tuple]]:
+    """
+    Read `limit` and `cursor` from the query string. `keys` is the number of
+    columns the list is ordered on, id included.
+
+    Returns:
+        (limit, after) where after is None for the first page
+    Raises:
+        ValueError with a client-facing message for bad input
+    """
+    raw_limit = request.args.get("limit")
+    try:
+        limit = int(raw_limit) if raw_limit else default_limit
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    limit = min(limit, max_limit)
+
+    cursor = request.args.get("cursor")
+    return limit, decode_cursor(cursor, keys) if cursor else None
+
+
+def fetch_page(
+    query,
+    sort_column: str,
+    id_column: str,
+    limit: int,
+    after: Optional[tuple[Any, Any]] = None,
+    desc: bool = True,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Run one page of a filtered query (select + filters, no order/limit).
+
+    Fetches limit + 1 rows to learn whether another page exists without a
+    count query.
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+    """
+    return fetch_ordered_page(query, [(sort_column, desc), (id_column, desc)], limit, after, nullable=(sort_column,))
+
+
+def fetch_ordered_page(
+    query,
+    order: list[tuple[str, bool]],
+    limit: int,
+    after: Optional[tuple] = None,
+    nullable: tuple[str, ...] = (),
+) -> tuple[list[dict], Optional[str]]:
+    """
+    fetch_page() for a list ordered on several (column, desc) pairs, the
+    last being the unique id. Columns listed in `nullable` may hold NULLs.
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+    """
+    if after is not None:
+        query = query.or_(seek_filter(order, after, nullable))
+    for column, desc in order:
+        query = query.order(column, desc=desc)
+    rows = query.limit(limit + 1).execute().data or []
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*(rows[-1][column] for column, _ in order))
@@ -0,0 +1,178 @@
+"""
+Principal Cache - Short-lived cache of authenticated users for get_current_user()
+
+Resolving a bearer token costs a users query. Principals are cached for
+PRINCIPAL_CACHE_TTL seconds and dropped explicitly when an admin suspends,
+activates or edits the user, so account changes apply on the next request.
+
+Backends:
+- "shared" (default): the code store (utils/code_store.py), so every
+  worker on the host sees the same entries and the same invalidations
+- "memory": per-process LRU, bounded by PRINCIPAL_CACHE_SIZE
+
+Environment:
+    PRINCIPAL_CACHE_BACKEND   shared | memory (default: shared)
+    PRINCIPAL_CACHE_TTL       Seconds a principal stays cached (default: 60)
+    PRINCIPAL_CACHE_SIZE      Max entries for the memory backend (default: 1024)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from utils.code_store import get_code_store
+
+_cache: Optional["PrincipalCache"] = None
+_cache_lock = threading.Lock()
+
+
+class MemoryPrincipalBackend:
+    """Per-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedPrincipalBackend:
+    """Entries kept in the shared code store, visible to every worker."""
+
+    def __init__(self, namespace: str = "principals"):
+        self._store = get_code_store(namespace)
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if datetime.utcnow() >= entry["expires_at"]:
+            self._store.pop(key, None)
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        self._store[key] = {
+            "value": value,
+            "expires_at": datetime.utcnow() + timedelta(seconds=ttl),
+        }
+
+    def delete(self, key: str) -> Optional[dict]:
+        entry = self._store.pop(key, None)
+        return entry.get("value") if entry else None
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class PrincipalCache:
+    """
+    Principals keyed by email, with a user_id -> email index so routes that
+    only know the user_id can invalidate.
+    """
+
+    def __init__(self, backend: Any, ttl: float = 60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, email: str) -> Optional[dict]:
+        principal = self.backend.get(f"email:{email.lower()}")
+        if principal is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return principal
+
+    def set(self, email: str, principal: dict) -> None:
+        if self.ttl <= 0:
+            return
+        self.backend.set(f"email:{email.lower()}", principal, self.ttl)
+        if principal.get("id"):
+            self.backend.set(f"user:{principal['id']}", {"email": email.lower()}, self.ttl)
+
+    def invalidate(self, user_id: Optional[str] = None, email: Optional[str] = None) -> None:
+        """Drop a principal by user_id and/or email."""
+        emails = {email.lower()} if email else set()
+        if user_id:
+            index = self.backend.delete(f"user:{user_id}")
+            if index and index.get("email"):
+                emails.add(index["email"])
+        for cached_email in emails:
+            principal = self.backend.delete(f"email:{cached_email}")
+            if principal and principal.get("id") and principal["id"] != user_id:
+                self.backend.delete(f"user:{principal['id']}")
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": "memory" if isinstance(self.backend, MemoryPrincipalBackend) else "shared",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 3) if total else None,
+            "invalidations": self.invalidations,
+            "entries": len(self.backend),
+            "ttlSeconds": self.ttl,
+        }
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Get the process-wide principal cache (backend chosen on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                ttl = float(os.environ.get("PRINCIPAL_CACHE_TTL", 60))
+            except ValueError:
+                ttl = 60
+            try:
+                size = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 1024))
+            except ValueError:
+                size = 1024
+
+            if os.environ.get("PRINCIPAL_CACHE_BACKEND", "shared").lower() == "memory":
+                backend = MemoryPrincipalBackend(size)
+            else:
+                backend = SharedPrincipalBackend()
+            _cache = PrincipalCache(backend, ttl)
+        return _cache
+
+
+def invalidate_principal(user_id: Optional[str] = None, email: Optional[str] = None) -> None:
+    """Forget a cached principal after the user's account changes."""
+    try:
+        get_principal_cache().invalidate(user_id=user_id, email=email)
+    except Exception as exc:  # pragma: no cover - cache must never break the write path
+        print(f"⚠️ Error invalidating principal cache: {exc}")
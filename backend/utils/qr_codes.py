@@ -56,16 +56,15 @@ def validate_qr_code(qr_code: str, stored_data: Dict) -> tuple[bool, Optional[st
     
     Args:
         qr_code: The QR code to validate
-        stored_data: Dict with qr_code, expires_at, child_id, etc.
+        stored_data: Dict or CodeStore of {qr_code: {expires_at, child_id, ...}}
     
     Returns:
         (is_valid, error_message)
     """
-    if not qr_code or qr_code not in stored_data:
+    data = stored_data.get(qr_code) if qr_code else None
+    if data is None:
         return False, "Invalid QR code"
     
-    data = stored_data[qr_code]
-    
     # Check expiration
     if datetime.utcnow() > data.get("expires_at"):
         return False, "QR code expired"
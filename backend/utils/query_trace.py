@@ -0,0 +1,241 @@
+"""
+Query Trace - Per-request PostgREST call tracing and round-trip budget
+
+get_supabase() hands out the shared client wrapped in TracingClient. The
+wrapper is a thin proxy over the query builders: filter calls are noted
+as they are chained and `.execute()` records one entry per round trip
+(table, operation, filtered columns, duration, rows) on the current
+request.
+
+After each request the middleware:
+- adds a Server-Timing header (total db time plus the slowest queries),
+  visible in the browser's network panel - only with QUERY_TRACE_HEADER=true
+  or in debug mode, since it names tables to whoever made the request
+- logs a warning when the request made more PostgREST calls than
+  QUERY_ROUND_TRIP_BUDGET
+- folds the request into per-route stats served by /api/debug/slow-routes
+  (requests that match no route share one "<unmatched>" entry, so probes
+  for random paths cannot grow the stats)
+
+Filter values are not recorded, only columns and operators, so emails and
+phone numbers never end up in logs.
+
+Queries run outside a request (notification workers, startup) are not
+traced. Rows streamed after the response has started (report exports)
+are not counted in that request's header.
+
+Environment:
+    QUERY_TRACE               Wrap the client and trace requests (default: true)
+    QUERY_TRACE_HEADER        Send Server-Timing on responses (default: false, true in debug)
+    QUERY_ROUND_TRIP_BUDGET   Warn above this many calls per request (default: 8)
+    QUERY_TRACE_TIMING_ITEMS  Slowest queries listed in Server-Timing (default: 5)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from flask import Flask, g, has_request_context, request
+
+# Builder methods that only add a filter / modifier
+_FILTER_METHODS = {
+    "eq", "neq", "gt", "gte", "lt", "lte", "in_", "is_", "like", "ilike",
+    "contains", "contained_by", "match", "or_", "filter", "text_search",
+}
+_OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+
+def _enabled() -> bool:
+    return os.environ.get("QUERY_TRACE", "true").lower() != "false"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class TracedBuilder:
+    """Proxy over a postgrest request builder that records `.execute()`."""
+
+    __slots__ = ("_builder", "_table", "_op", "_filters")
+
+    def __init__(self, builder: Any, table: str, op: str = "select", filters: Optional[list] = None):
+        self._builder = builder
+        self._table = table
+        self._op = op
+        self._filters = filters if filters is not None else []
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # e.g. `.not_` returns a builder
+            return TracedBuilder(attr, self._table, self._op, self._filters) if hasattr(attr, "execute") else attr
+
+        def call(*args, **kwargs):
+            if name in _OPERATIONS:
+                self._op = name
+            elif name in _FILTER_METHODS:
+                column = args[0] if args and name != "or_" else "or"
+                self._filters.append(f"{column}.{name.rstrip('_')}")
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute") and result is not self._builder:
+                return TracedBuilder(result, self._table, self._op, self._filters)
+            return self if result is self._builder else result
+
+        return call
+
+    def execute(self):
+        started = time.perf_counter()
+        error = False
+        res = None
+        try:
+            res = self._builder.execute()
+            return res
+        except Exception:
+            error = True
+            raise
+        finally:
+            _record(self._table, self._op, self._filters, time.perf_counter() - started, res, error)
+
+
+class TracingClient:
+    """Proxy over the Supabase client whose table()/rpc() builders are traced."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, name: str) -> TracedBuilder:
+        return TracedBuilder(self._client.table(name), name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[dict] = None, *args, **kwargs) -> TracedBuilder:
+        return TracedBuilder(self._client.rpc(fn, params, *args, **kwargs), fn, "rpc")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def _record(table: str, op: str, filters: list, seconds: float, res: Any, error: bool) -> None:
+    if not has_request_context():
+        return
+    trace = g.get("query_trace")
+    if trace is None:
+        return
+    data = getattr(res, "data", None)
+    trace.append({
+        "table": table,
+        "op": op,
+        "filters": list(filters),
+        "ms": round(seconds * 1000, 2),
+        "rows": len(data) if isinstance(data, list) else (1 if data else 0),
+        "error": error,
+    })
+
+
+class RouteStats:
+    """Per-route latency and round-trip counters (in-process)."""
+
+    def __init__(self):
+        self._routes: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, total_ms: float, queries: list[dict]) -> None:
+        db_ms = sum(q["ms"] for q in queries)
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = {"count": 0, "totalMs": 0.0, "maxMs": 0.0, "dbMs": 0.0, "roundTrips": 0,
+                         "maxRoundTrips": 0, "slowest": None}
+                self._routes[route] = stats
+            stats["count"] += 1
+            stats["totalMs"] += total_ms
+            stats["dbMs"] += db_ms
+            stats["roundTrips"] += len(queries)
+            stats["maxRoundTrips"] = max(stats["maxRoundTrips"], len(queries))
+            if total_ms >= stats["maxMs"]:
+                stats["maxMs"] = total_ms
+                stats["slowest"] = {"ms": round(total_ms, 2), "queries": queries}
+
+    def top(self, limit: int = 20) -> list[dict]:
+        with self._lock:
+            items = list(self._routes.items())
+        rows = []
+        for route, stats in items:
+            count = stats["count"]
+            rows.append({
+                "route": route,
+                "count": count,
+                "avgMs": round(stats["totalMs"] / count, 2),
+                "maxMs": round(stats["maxMs"], 2),
+                "avgDbMs": round(stats["dbMs"] / count, 2),
+                "avgRoundTrips": round(stats["roundTrips"] / count, 2),
+                "maxRoundTrips": stats["maxRoundTrips"],
+                "slowestRequest": stats["slowest"],
+            })
+        rows.sort(key=lambda row: row["avgMs"], reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+def _server_timing(queries: list[dict], total_ms: float, items: int) -> str:
+    db_ms = sum(q["ms"] for q in queries)
+    parts = [
+        f'db;dur={db_ms:.1f};desc="{len(queries)} PostgREST calls"',
+        f"app;dur={max(total_ms - db_ms, 0):.1f}",
+    ]
+    slowest = sorted(enumerate(queries), key=lambda item: item[1]["ms"], reverse=True)[:items]
+    for index, query in sorted(slowest):
+        parts.append(f'q{index + 1};dur={query["ms"]:.1f};desc="{query["table"]} {query["op"]}"')
+    return ", ".join(parts)
+
+
+def wrap_client(client: Any) -> Any:
+    """Return the client wrapped for tracing (unchanged when QUERY_TRACE=false)."""
+    if client is None or not _enabled() or isinstance(client, TracingClient):
+        return client
+    return TracingClient(client)
+
+
+def init_query_tracing(app: Flask) -> None:
+    """Register the before/after request hooks on the app."""
+    if not _enabled():
+        return
+    budget = _env_int("QUERY_ROUND_TRIP_BUDGET", 8)
+    timing_items = _env_int("QUERY_TRACE_TIMING_ITEMS", 5)
+    timing_header = os.environ.get("QUERY_TRACE_HEADER", "true" if app.debug else "false").lower() == "true"
+
+    @app.before_request
+    def _start_query_trace():
+        g.query_trace = []
+        g.query_trace_started = time.perf_counter()
+
+    @app.after_request
+    def _finish_query_trace(response):
+        queries = g.pop("query_trace", None)
+        started = g.pop("query_trace_started", None)
+        if queries is None or started is None:
+            return response
+        total_ms = (time.perf_counter() - started) * 1000
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else '<unmatched>'}"
+
+        if timing_header:
+            response.headers["Server-Timing"] = _server_timing(queries, total_ms, timing_items)
+        if budget and len(queries) > budget:
+            calls: dict[str, int] = {}
+            for query in queries:
+                key = f"{query['table']}.{query['op']}"
+                calls[key] = calls.get(key, 0) + 1
+            summary = ", ".join(f"{key} x{count}" for key, count in calls.items())
+            print(f"⚠️ {route} made {len(queries)} PostgREST calls (budget {budget}): {summary}")
+        route_stats.add(route, total_ms, queries)
+        return response
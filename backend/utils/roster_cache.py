@@ -0,0 +1,148 @@
+"""
+Roster Cache - Eligible children per session, kept in worker memory
+Phase 3B.3 from USER_CASE_FLOW.md
+
+Teacher tablets poll GET /api/sessions/<id>/eligible-children for the whole
+session. The roster only changes when children or the session change, so
+it is built once and served from memory:
+
+- sessions: session_id -> (group_id, gender_restriction)
+- rosters: (group_id, gender_restriction) -> children, shared by every
+  session with the same restriction
+
+Entries are tagged with the church's roster version, a token kept in the
+shared code store (utils/code_store.py). Creating, updating, approving,
+deleting or moving a child, renaming a group or parent, and updating or
+deleting a session replace the token via invalidate_rosters(), so every
+worker on the host rebuilds on its next read. A cache hit costs one local
+version read and no PostgREST round trips.
+
+Environment:
+    ROSTER_CACHE_TTL    Seconds a roster stays cached (default: 600, 0 disables)
+    ROSTER_CACHE_SIZE   Max cached sessions and rosters per worker (default: 256)
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from utils.code_store import get_code_store
+
+# Version tokens outlive any roster; an expired one is simply re-created
+VERSION_TTL = timedelta(days=30)
+
+_cache: Optional["RosterCache"] = None
+_cache_lock = threading.Lock()
+
+
+class RosterCache:
+    """Per-worker LRU of session restrictions and rosters, checked against a shared version."""
+
+    def __init__(self, ttl: float = 600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._versions = get_code_store("roster_versions")
+        self._sessions: "OrderedDict[tuple, tuple[str, float, Any]]" = OrderedDict()
+        self._rosters: "OrderedDict[tuple, tuple[str, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def version(self, church_id: str) -> str:
+        """Current roster version for the church (created on first use)."""
+        entry = self._versions.get(church_id)
+        if entry is not None and datetime.utcnow() < entry["expires_at"]:
+            return entry["version"]
+        return self._bump(church_id)
+
+    def _bump(self, church_id: str) -> str:
+        version = uuid.uuid4().hex
+        self._versions[church_id] = {"version": version, "expires_at": datetime.utcnow() + VERSION_TTL}
+        return version
+
+    def _get(self, entries: OrderedDict, key: tuple, version: str) -> Optional[Any]:
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            entry_version, expires, value = entry
+            if entry_version != version or time.monotonic() >= expires:
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return value
+
+    def _set(self, entries: OrderedDict, key: tuple, version: str, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            entries[key] = (version, time.monotonic() + self.ttl, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def get_session(self, church_id: str, session_id: str, version: str) -> Optional[dict]:
+        return self._get(self._sessions, (church_id, session_id), version)
+
+    def set_session(self, church_id: str, session_id: str, version: str, session: dict) -> None:
+        self._set(self._sessions, (church_id, session_id), version, session)
+
+    def get_roster(self, church_id: str, group_id: str, gender: Optional[str], version: str) -> Optional[list]:
+        roster = self._get(self._rosters, (church_id, group_id, gender or ""), version)
+        if roster is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return roster
+
+    def set_roster(self, church_id: str, group_id: str, gender: Optional[str], version: str, roster: list) -> None:
+        self._set(self._rosters, (church_id, group_id, gender or ""), version, roster)
+
+    def invalidate(self, church_id: str) -> None:
+        """Drop every cached session and roster of the church, on all workers."""
+        self._bump(church_id)
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 3) if total else None,
+            "invalidations": self.invalidations,
+            "sessions": len(self._sessions),
+            "rosters": len(self._rosters),
+            "ttlSeconds": self.ttl,
+        }
+
+
+def get_roster_cache() -> RosterCache:
+    """Get the process-wide roster cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                ttl = float(os.environ.get("ROSTER_CACHE_TTL", 600))
+            except ValueError:
+                ttl = 600
+            try:
+                size = int(os.environ.get("ROSTER_CACHE_SIZE", 256))
+            except ValueError:
+                size = 256
+            _cache = RosterCache(ttl, size)
+        return _cache
+
+
+def invalidate_rosters(church_id: Optional[str]) -> None:
+    """Forget cached rosters after children, groups, parents or sessions change."""
+    if not church_id:
+        return
+    try:
+        get_roster_cache().invalidate(church_id)
+    except Exception as exc:  # pragma: no cover - cache must never break the write path
+        print(f"⚠️ Error invalidating roster cache: {exc}")
@@ -0,0 +1,222 @@
+"""
+Tokens - Signed, self-contained session tokens
+
+A token carries the principal (user id, email, role, name, church) and its
+expiry, signed with HMAC-SHA256. get_current_user() verifies the signature
+and claims locally, so authorizing a request needs no users query.
+
+Format:
+    v1.<kid>.<payload>.<signature>     (payload and signature base64url)
+
+Key ring:
+    TOKEN_SIGNING_KEYS="2025b:new-secret,2025a:old-secret" - the first key
+    signs new tokens, every key verifies, so a key can be rotated in while
+    tokens signed with the previous one stay valid until they expire. When
+    unset, a single key derived from SECRET_KEY is used.
+
+Revocation:
+    Logout revokes one token (by jti); suspending a user or changing their
+    role/email revokes every token issued to them before that moment. Entries
+    live in the code store (utils/code_store.py) until the longest-lived
+    token they could affect has expired, so the list stays small and every
+    worker on the host sees it without a network call.
+
+Environment:
+    TOKEN_SIGNING_KEYS    Comma-separated kid:secret pairs (default: SECRET_KEY)
+    TOKEN_TTL_SECONDS     Lifetime of a session token (default: 43200, 12 hours)
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from config import config
+from utils.code_store import get_code_store
+
+TOKEN_PREFIX = "v1"
+DEFAULT_TTL_SECONDS = 12 * 60 * 60
+MFA_TTL_SECONDS = 15 * 60
+
+SCOPE_ACCESS = "access"
+SCOPE_MFA = "mfa"
+
+_ring: Optional["KeyRing"] = None
+_ring_lock = threading.Lock()
+
+
+class TokenError(ValueError):
+    """Raised when a token is malformed, forged, expired or revoked."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode((text + "=" * (-len(text) % 4)).encode("ascii"))
+
+
+class KeyRing:
+    """Signing keys by kid; the first key is the active one."""
+
+    def __init__(self, keys: list[tuple[str, bytes]]):
+        if not keys:
+            raise ValueError("Key ring needs at least one key")
+        self.active_kid = keys[0][0]
+        self.keys = dict(keys)
+
+    @classmethod
+    def from_env(cls) -> "KeyRing":
+        keys = []
+        for entry in os.environ.get("TOKEN_SIGNING_KEYS", "").split(","):
+            kid, sep, secret = entry.strip().partition(":")
+            if sep and kid and secret:
+                keys.append((kid, secret.encode("utf-8")))
+            elif entry.strip():
+                print("⚠️ Ignoring TOKEN_SIGNING_KEYS entry without kid:secret")
+        if not keys:
+            if config.SECRET_KEY == "dev-secret":
+                print("⚠️ Signing session tokens with the default dev SECRET_KEY")
+            keys.append(("default", config.SECRET_KEY.encode("utf-8")))
+        return cls(keys)
+
+    def sign(self, kid: str, message: bytes) -> bytes:
+        return hmac.new(self.keys[kid], message, hashlib.sha256).digest()
+
+
+def get_key_ring() -> KeyRing:
+    """Get the process-wide key ring (read from the environment on first use)."""
+    global _ring
+    with _ring_lock:
+        if _ring is None:
+            _ring = KeyRing.from_env()
+        return _ring
+
+
+def token_ttl() -> int:
+    try:
+        return int(os.environ.get("TOKEN_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(TOKEN_PREFIX + ".")
+
+
+def issue_token(user: dict, church_id: Optional[str] = None, scope: str = SCOPE_ACCESS, ttl: Optional[int] = None) -> str:
+    """
+    Sign a token for a user dict as built by the auth routes
+    ({id, email, role, name, profile_updated, ...}).
+    """
+    now = time.time()
+    lifetime = ttl if ttl is not None else (MFA_TTL_SECONDS if scope == SCOPE_MFA else token_ttl())
+    claims = {
+        "uid": user.get("id"),
+        "email": user.get("email"),
+        "role": user.get("role") or "parent",
+        "name": user.get("name"),
+        "pu": bool(user.get("profile_updated", False)),
+        "act": user.get("is_active") is not False,
+        "cid": church_id,
+        "scope": scope,
+        "iat": round(now, 3),
+        "exp": int(now + lifetime),
+        "jti": secrets.token_urlsafe(12),
+    }
+    ring = get_key_ring()
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    signing_input = f"{TOKEN_PREFIX}.{ring.active_kid}.{payload}".encode("ascii")
+    return f"{TOKEN_PREFIX}.{ring.active_kid}.{payload}.{_b64encode(ring.sign(ring.active_kid, signing_input))}"
+
+
+def verify_token(token: str, scope: str = SCOPE_ACCESS) -> dict:
+    """
+    Check signature, expiry, scope and revocation. Returns the claims.
+
+    Raises:
+        TokenError with a short reason
+    """
+    parts = token.split(".")
+    if len(parts) != 4 or parts[0] != TOKEN_PREFIX:
+        raise TokenError("malformed token")
+    _, kid, payload, signature = parts
+
+    ring = get_key_ring()
+    if kid not in ring.keys:
+        raise TokenError("unknown signing key")
+    expected = ring.sign(kid, f"{TOKEN_PREFIX}.{kid}.{payload}".encode("ascii"))
+    try:
+        valid = hmac.compare_digest(expected, _b64decode(signature))
+        claims = json.loads(_b64decode(payload)) if valid else None
+    except Exception:
+        raise TokenError("malformed token")
+    if not valid or not isinstance(claims, dict):
+        raise TokenError("bad signature")
+
+    if claims.get("scope") != scope:
+        raise TokenError("wrong token scope")
+    if time.time() >= claims.get("exp", 0):
+        raise TokenError("token expired")
+    if is_revoked(claims):
+        raise TokenError("token revoked")
+    return claims
+
+
+def principal_from_claims(claims: dict) -> dict[str, Any]:
+    """The user dict get_current_user() returns, rebuilt from token claims."""
+    email = claims.get("email") or ""
+    return {
+        "id": claims.get("uid"),
+        "email": email,
+        "role": claims.get("role") or "parent",
+        "name": claims.get("name") or email.split("@")[0].title(),
+        "profile_updated": claims.get("pu", False),
+        "is_active": claims.get("act", True),
+        "church_id": claims.get("cid"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Revocation list
+# ---------------------------------------------------------------------------
+
+def _revocations():
+    return get_code_store("revoked_tokens")
+
+
+def is_revoked(claims: dict) -> bool:
+    store = _revocations()
+    if claims.get("jti") and f"jti:{claims['jti']}" in store:
+        return True
+    entry = store.get(f"user:{claims.get('uid')}")
+    return bool(entry) and claims.get("iat", 0) <= entry["revoked_before"]
+
+
+def revoke_token(claims: dict) -> None:
+    """Revoke a single token (logout) until it would have expired anyway."""
+    if not claims.get("jti"):
+        return
+    _revocations()[f"jti:{claims['jti']}"] = {
+        "expires_at": datetime.utcfromtimestamp(claims.get("exp", time.time())),
+    }
+
+
+def revoke_user_tokens(user_id: Optional[str]) -> None:
+    """Revoke every token issued to a user up to now."""
+    if not user_id:
+        return
+    try:
+        _revocations()[f"user:{user_id}"] = {
+            "revoked_before": round(time.time(), 3),
+            "expires_at": datetime.utcnow() + timedelta(seconds=max(token_ttl(), MFA_TTL_SECONDS)),
+        }
+    except Exception as exc:  # pragma: no cover - revocation must never break the write path
+        print(f"⚠️ Error revoking tokens for user {user_id}: {exc}")
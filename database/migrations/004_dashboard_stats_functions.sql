@@ -0,0 +1,85 @@
+-- Migration: Dashboard counter functions
+-- Purpose: Return every counter a dashboard needs in one RPC round trip
+-- instead of 2-3 separate count queries per request.
+--
+-- Called from the backend with client.rpc("<function>", {...}). The backend
+-- passes p_since (start of "today" in UTC) so the numbers match the previous
+-- timestamp_in >= today filters exactly. If these functions are not deployed
+-- the routes fall back to the old per-counter queries.
+
+-- Admin dashboard: /api/analytics/admin
+CREATE OR REPLACE FUNCTION admin_dashboard_stats(p_church_id UUID, p_since TIMESTAMPTZ)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'total_children', (
+            SELECT COUNT(*) FROM children WHERE church_id = p_church_id
+        ),
+        'checked_in_today', (
+            SELECT COUNT(*) FROM check_in_records
+            WHERE church_id = p_church_id
+              AND timestamp_in >= p_since
+              AND timestamp_out IS NULL
+        )
+    );
+$$;
+
+-- Teacher dashboard: /api/teachers/dashboard and /api/analytics/teacher
+CREATE OR REPLACE FUNCTION teacher_dashboard_stats(p_church_id UUID, p_teacher_id UUID, p_since TIMESTAMPTZ)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'groups', COALESCE((
+            SELECT json_agg(json_build_object('group_id', g.group_id, 'name', g.name))
+            FROM groups g
+            WHERE g.church_id = p_church_id AND g.teacher_id = p_teacher_id
+        ), '[]'::json),
+        'checkins_today', COUNT(*),
+        'active_checkins', COUNT(*) FILTER (WHERE r.timestamp_out IS NULL)
+    )
+    FROM check_in_records r
+    WHERE r.church_id = p_church_id
+      AND r.teacher_id = p_teacher_id
+      AND r.timestamp_in >= p_since;
+$$;
+
+-- Group stats: /api/groups/<group_id>/stats
+-- Returns NULL when the group does not exist in the church.
+CREATE OR REPLACE FUNCTION group_dashboard_stats(p_church_id UUID, p_group_id UUID)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'group', row_to_json(g),
+        'children_count', (
+            SELECT COUNT(*) FROM children c
+            WHERE c.church_id = p_church_id
+              AND c.group_id = p_group_id
+              AND c.status = 'active'
+        ),
+        'recent_attendance', COALESCE((
+            SELECT json_agg(a ORDER BY a.date DESC)
+            FROM (
+                SELECT * FROM attendance_summary s
+                WHERE s.church_id = p_church_id AND s.group_id = p_group_id
+                ORDER BY s.date DESC
+                LIMIT 7
+            ) a
+        ), '[]'::json)
+    )
+    FROM groups g
+    WHERE g.church_id = p_church_id AND g.group_id = p_group_id;
+$$;
+
+-- Indexes backing the counters
+CREATE INDEX IF NOT EXISTS idx_checkin_church_teacher_time ON check_in_records(church_id, teacher_id, timestamp_in);
+CREATE INDEX IF NOT EXISTS idx_children_church_group_status ON children(church_id, group_id, status);
+
+GRANT EXECUTE ON FUNCTION admin_dashboard_stats(UUID, TIMESTAMPTZ) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION teacher_dashboard_stats(UUID, UUID, TIMESTAMPTZ) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION group_dashboard_stats(UUID, UUID) TO anon, authenticated, service_role;
@@ -0,0 +1,138 @@
+-- Migration: Daily attendance rollup
+-- Purpose: Keep per-child daily check-in counts up to date as check-ins
+-- happen, so analytics read a handful of rollup rows instead of pulling
+-- 30 days of raw check_in_records into the backend.
+--
+-- One row per (church, child, date) with the child's group on that day.
+-- Dates are check-in dates in the database timezone (UTC on Supabase),
+-- matching the backend's timestamp_in >= 'YYYY-MM-DD' filters.
+
+CREATE TABLE IF NOT EXISTS daily_attendance_rollup (
+    church_id UUID NOT NULL REFERENCES churches(church_id) ON DELETE CASCADE,
+    child_id UUID NOT NULL REFERENCES children(child_id) ON DELETE CASCADE,
+    group_id UUID REFERENCES groups(group_id) ON DELETE SET NULL,
+    date DATE NOT NULL,
+    checkins_count INTEGER NOT NULL DEFAULT 0,
+    checkouts_count INTEGER NOT NULL DEFAULT 0,
+    first_check_in TIMESTAMPTZ,
+    last_check_in TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (church_id, child_id, date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_church_group_date ON daily_attendance_rollup(church_id, group_id, date);
+CREATE INDEX IF NOT EXISTS idx_rollup_church_date ON daily_attendance_rollup(church_id, date);
+
+COMMENT ON TABLE daily_attendance_rollup IS 'Per-child daily check-in counts, maintained by trigger on check_in_records';
+
+-- Apply a +1/-1 change for one check-in record
+CREATE OR REPLACE FUNCTION apply_attendance_rollup(
+    p_church_id UUID,
+    p_child_id UUID,
+    p_timestamp_in TIMESTAMPTZ,
+    p_checkins INTEGER,
+    p_checkouts INTEGER
+) RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO daily_attendance_rollup AS r (
+        church_id, child_id, group_id, date,
+        checkins_count, checkouts_count, first_check_in, last_check_in
+    )
+    SELECT
+        p_church_id, p_child_id, c.group_id, p_timestamp_in::date,
+        GREATEST(p_checkins, 0), GREATEST(p_checkouts, 0),
+        CASE WHEN p_checkins > 0 THEN p_timestamp_in END,
+        CASE WHEN p_checkins > 0 THEN p_timestamp_in END
+    FROM (SELECT 1) one
+    LEFT JOIN children c ON c.child_id = p_child_id
+    ON CONFLICT (church_id, child_id, date) DO UPDATE SET
+        group_id = COALESCE(EXCLUDED.group_id, r.group_id),
+        checkins_count = GREATEST(r.checkins_count + p_checkins, 0),
+        checkouts_count = GREATEST(r.checkouts_count + p_checkouts, 0),
+        first_check_in = LEAST(r.first_check_in, EXCLUDED.first_check_in),
+        last_check_in = GREATEST(r.last_check_in, EXCLUDED.last_check_in),
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION check_in_records_rollup_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_attendance_rollup(
+            NEW.church_id, NEW.child_id, NEW.timestamp_in,
+            1, CASE WHEN NEW.timestamp_out IS NOT NULL THEN 1 ELSE 0 END
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM apply_attendance_rollup(
+            OLD.church_id, OLD.child_id, OLD.timestamp_in,
+            -1, CASE WHEN OLD.timestamp_out IS NOT NULL THEN -1 ELSE 0 END
+        );
+    ELSIF TG_OP = 'UPDATE' THEN
+        IF NEW.child_id IS DISTINCT FROM OLD.child_id
+           OR NEW.church_id IS DISTINCT FROM OLD.church_id
+           OR NEW.timestamp_in::date IS DISTINCT FROM OLD.timestamp_in::date THEN
+            -- Record moved: take it off the old day and add it to the new one
+            PERFORM apply_attendance_rollup(
+                OLD.church_id, OLD.child_id, OLD.timestamp_in,
+                -1, CASE WHEN OLD.timestamp_out IS NOT NULL THEN -1 ELSE 0 END
+            );
+            PERFORM apply_attendance_rollup(
+                NEW.church_id, NEW.child_id, NEW.timestamp_in,
+                1, CASE WHEN NEW.timestamp_out IS NOT NULL THEN 1 ELSE 0 END
+            );
+        ELSIF (OLD.timestamp_out IS NULL) <> (NEW.timestamp_out IS NULL) THEN
+            -- Checked out (or check-out undone)
+            PERFORM apply_attendance_rollup(
+                NEW.church_id, NEW.child_id, NEW.timestamp_in,
+                0, CASE WHEN NEW.timestamp_out IS NOT NULL THEN 1 ELSE -1 END
+            );
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_check_in_records_rollup ON check_in_records;
+CREATE TRIGGER trg_check_in_records_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON check_in_records
+    FOR EACH ROW EXECUTE FUNCTION check_in_records_rollup_trigger();
+
+-- Rebuild the rollup from raw records (from p_since onwards, or everything).
+-- Used for the initial backfill and to repair drift after bulk imports.
+CREATE OR REPLACE FUNCTION refresh_daily_attendance_rollup(p_since DATE DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    DELETE FROM daily_attendance_rollup
+    WHERE p_since IS NULL OR date >= p_since;
+
+    INSERT INTO daily_attendance_rollup (
+        church_id, child_id, group_id, date,
+        checkins_count, checkouts_count, first_check_in, last_check_in
+    )
+    SELECT
+        r.church_id, r.child_id, MAX(c.group_id::text)::uuid, r.timestamp_in::date,
+        COUNT(*), COUNT(r.timestamp_out), MIN(r.timestamp_in), MAX(r.timestamp_in)
+    FROM check_in_records r
+    LEFT JOIN children c ON c.child_id = r.child_id
+    WHERE p_since IS NULL OR r.timestamp_in >= p_since
+    GROUP BY r.church_id, r.child_id, r.timestamp_in::date;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$;
+
+-- Backfill existing check-ins
+SELECT refresh_daily_attendance_rollup();
+
+GRANT SELECT ON daily_attendance_rollup TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION refresh_daily_attendance_rollup(DATE) TO service_role;
@@ -0,0 +1,98 @@
+-- Migration: Change tracking for check-ins and bookings
+-- Purpose: Let tablets refresh GET /api/checkin/active and
+-- GET /api/sessions/<id>/bookings with ?since=<cursor>, downloading only
+-- the rows inserted, updated, closed or deleted after their last refresh
+-- instead of the whole list.
+--
+-- - updated_at on check_in_records and session_bookings, set on insert and
+--   by trigger on every update (check-out, booking status changes)
+-- - sync_tombstones: ids of deleted rows (e.g. cascades when a child or
+--   session is deleted), kept for two days
+
+-- Added without a default first so existing rows can be backfilled from
+-- their latest known change
+ALTER TABLE check_in_records ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+ALTER TABLE session_bookings ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+
+UPDATE check_in_records
+SET updated_at = COALESCE(timestamp_out, timestamp_in, created_at, CURRENT_TIMESTAMP)
+WHERE updated_at IS NULL;
+
+UPDATE session_bookings
+SET updated_at = COALESCE(checked_out_at, checked_in_at, booked_at, created_at, CURRENT_TIMESTAMP)
+WHERE updated_at IS NULL;
+
+ALTER TABLE check_in_records ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE session_bookings ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_check_in_records_church_updated ON check_in_records(church_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_session_bookings_session_updated ON session_bookings(session_id, updated_at);
+
+-- update_updated_at_column() is defined by the base schema; recreate it in
+-- case this database was set up without it
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_check_in_records_updated_at ON check_in_records;
+CREATE TRIGGER update_check_in_records_updated_at
+    BEFORE UPDATE ON check_in_records
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_session_bookings_updated_at ON session_bookings;
+CREATE TRIGGER update_session_bookings_updated_at
+    BEFORE UPDATE ON session_bookings
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Deleted rows, so delta refreshes can drop them too
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    tombstone_id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    row_id UUID NOT NULL,
+    church_id UUID,
+    session_id UUID,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_church ON sync_tombstones(table_name, church_id, deleted_at);
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_session ON sync_tombstones(table_name, session_id, deleted_at);
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted_at ON sync_tombstones(deleted_at);
+
+COMMENT ON TABLE sync_tombstones IS 'Ids of deleted check-ins and bookings for ?since= refreshes, kept for two days';
+
+-- TG_ARGV[0] is the primary key column of the table
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_row JSONB := to_jsonb(OLD);
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_id, church_id, session_id)
+    VALUES (
+        TG_TABLE_NAME,
+        (v_row ->> TG_ARGV[0])::uuid,
+        (v_row ->> 'church_id')::uuid,
+        (v_row ->> 'session_id')::uuid
+    );
+    -- Deletes are rare; prune old tombstones while we are here
+    DELETE FROM sync_tombstones WHERE deleted_at < CURRENT_TIMESTAMP - INTERVAL '2 days';
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_check_in_records_tombstone ON check_in_records;
+CREATE TRIGGER trg_check_in_records_tombstone
+    AFTER DELETE ON check_in_records
+    FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone('record_id');
+
+DROP TRIGGER IF EXISTS trg_session_bookings_tombstone ON session_bookings;
+CREATE TRIGGER trg_session_bookings_tombstone
+    AFTER DELETE ON session_bookings
+    FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone('booking_id');
+
+GRANT SELECT ON sync_tombstones TO anon, authenticated, service_role;
@@ -0,0 +1,87 @@
+-- Migration: Atomic check-in function
+-- Purpose: Write a check-in in one RPC call and one transaction instead of
+-- the child lookup, user lookup, fallback-teacher lookup, record insert and
+-- booking update the backend used to send one after another. Either the
+-- record is written and the booking flipped, or neither is.
+--
+-- Validation matches the backend's query path (routes/checkin.py):
+-- - the child must belong to the church, otherwise {"error": "child_not_found"}
+-- - a teacher_id that is not a user of the church is replaced by any Admin or
+--   Teacher of the church (admins checking in from shared tablets), otherwise
+--   {"error": "teacher_not_found"}
+--
+-- On success returns {"record": <check_in_records row>, "child": {child_id,
+-- name, group_id}, "teacher_id": <teacher written on the record>}.
+-- Constraint errors (method, guardian_id, booking_id) raise as they would on
+-- a plain insert and roll everything back.
+
+CREATE OR REPLACE FUNCTION check_in_child(
+    p_church_id UUID,
+    p_child_id UUID,
+    p_teacher_id UUID,
+    p_method TEXT,
+    p_guardian_id UUID DEFAULT NULL,
+    p_qr_code TEXT DEFAULT NULL,
+    p_otp_code TEXT DEFAULT NULL,
+    p_session_id UUID DEFAULT NULL,
+    p_booking_id UUID DEFAULT NULL
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_child children%ROWTYPE;
+    v_teacher_id UUID;
+    v_record check_in_records%ROWTYPE;
+    v_now TIMESTAMP := (now() AT TIME ZONE 'UTC');
+BEGIN
+    SELECT * INTO v_child
+    FROM children c
+    WHERE c.child_id = p_child_id AND c.church_id = p_church_id;
+    IF NOT FOUND THEN
+        RETURN json_build_object('error', 'child_not_found');
+    END IF;
+
+    SELECT u.user_id INTO v_teacher_id
+    FROM users u
+    WHERE u.user_id = p_teacher_id AND u.church_id = p_church_id;
+    IF v_teacher_id IS NULL THEN
+        SELECT u.user_id INTO v_teacher_id
+        FROM users u
+        WHERE u.church_id = p_church_id
+          AND u.role IN ('Admin', 'Teacher', 'admin', 'teacher')
+        LIMIT 1;
+    END IF;
+    IF v_teacher_id IS NULL THEN
+        RETURN json_build_object('error', 'teacher_not_found');
+    END IF;
+
+    INSERT INTO check_in_records (
+        church_id, child_id, teacher_id, method, timestamp_in,
+        guardian_id, qr_code, otp_code, session_id, booking_id
+    ) VALUES (
+        p_church_id, p_child_id, v_teacher_id, p_method, v_now,
+        p_guardian_id, p_qr_code, p_otp_code, p_session_id, p_booking_id
+    )
+    RETURNING * INTO v_record;
+
+    IF p_booking_id IS NOT NULL THEN
+        UPDATE session_bookings
+        SET status = 'checked_in', checked_in_at = v_now
+        WHERE booking_id = p_booking_id;
+    END IF;
+
+    RETURN json_build_object(
+        'record', row_to_json(v_record),
+        'child', json_build_object(
+            'child_id', v_child.child_id,
+            'name', v_child.name,
+            'group_id', v_child.group_id
+        ),
+        'teacher_id', v_teacher_id
+    );
+END;
+$$;
+
+-- Writes: the backend calls this with the service role key only
+REVOKE EXECUTE ON FUNCTION check_in_child(UUID, UUID, UUID, TEXT, UUID, TEXT, TEXT, UUID, UUID) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION check_in_child(UUID, UUID, UUID, TEXT, UUID, TEXT, TEXT, UUID, UUID) TO service_role;
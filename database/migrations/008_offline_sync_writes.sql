@@ -0,0 +1,69 @@
+-- Migration: Offline sync writes
+-- Purpose: Write the check-outs and booking changes of an offline kiosk
+-- upload (routes/sync.py) in one RPC call and one statement per table,
+-- instead of one guarded update per distinct kiosk timestamp.
+--
+-- Each row carries its own time. Updates are guarded on the state the
+-- backend read, so rows changed online meanwhile are left as they are:
+-- - a check-out only closes a record whose timestamp_out is still NULL
+-- - a booking moves to checked_in from booked/checked_in/checked_out and to
+--   checked_out from booked/checked_in (never out of cancelled)
+--
+-- p_closes:   [{"record_id", "timestamp_out"}]
+-- p_bookings: [{"booking_id", "status", "checked_in_at"?, "checked_out_at"?}]
+--
+-- Returns {"closed": [record_id], "bookings": [booking_id]}: the rows that
+-- were actually updated. A record missing from "closed" was released online.
+
+CREATE OR REPLACE FUNCTION apply_offline_sync(
+    p_church_id UUID,
+    p_closes JSON DEFAULT '[]',
+    p_bookings JSON DEFAULT '[]'
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_closed UUID[];
+    v_bookings UUID[];
+BEGIN
+    WITH changes AS (
+        SELECT * FROM json_to_recordset(p_closes) AS x(record_id UUID, timestamp_out TIMESTAMP)
+    ), updated AS (
+        UPDATE check_in_records r
+        SET timestamp_out = changes.timestamp_out
+        FROM changes
+        WHERE r.record_id = changes.record_id
+          AND r.church_id = p_church_id
+          AND r.timestamp_out IS NULL
+        RETURNING r.record_id
+    )
+    SELECT COALESCE(array_agg(record_id), '{}') INTO v_closed FROM updated;
+
+    WITH changes AS (
+        SELECT * FROM json_to_recordset(p_bookings)
+            AS x(booking_id UUID, status TEXT, checked_in_at TIMESTAMP, checked_out_at TIMESTAMP)
+    ), updated AS (
+        UPDATE session_bookings b
+        SET status = changes.status,
+            checked_in_at = COALESCE(changes.checked_in_at, b.checked_in_at),
+            checked_out_at = COALESCE(changes.checked_out_at, b.checked_out_at)
+        FROM changes, sessions s
+        WHERE b.booking_id = changes.booking_id
+          AND s.session_id = b.session_id
+          AND s.church_id = p_church_id
+          AND b.status = ANY (CASE changes.status
+              WHEN 'checked_in' THEN ARRAY['booked', 'checked_in', 'checked_out']
+              WHEN 'checked_out' THEN ARRAY['booked', 'checked_in']
+              ELSE ARRAY[]::TEXT[]
+          END)
+        RETURNING b.booking_id
+    )
+    SELECT COALESCE(array_agg(booking_id), '{}') INTO v_bookings FROM updated;
+
+    RETURN json_build_object('closed', v_closed, 'bookings', v_bookings);
+END;
+$$;
+
+-- Writes: the backend calls this with the service role key only
+REVOKE EXECUTE ON FUNCTION apply_offline_sync(UUID, JSON, JSON) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION apply_offline_sync(UUID, JSON, JSON) TO service_role;
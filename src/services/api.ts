@@ -635,9 +635,16 @@ export const reportsApi = {
     return apiRequest<any>(endpoint);
   },
 
-  export: async (format: 'csv' | 'excel', params?: Record<string, string>) => {
-    const query = new URLSearchParams({ format, ...params });
-    const endpoint = `${API_ENDPOINTS.REPORTS.EXPORT(format)}?${query.toString()}`;
+  export: async (format: 'csv' | 'excel', params?: Record<string, string | undefined>) => {
+    const query = new URLSearchParams();
+    Object.entries(params ?? {}).forEach(([key, value]) => {
+      if (value) query.append(key, value);
+    });
+
+    // EXPORT() already carries ?format=, so the rest are appended with &
+    const endpoint = query.toString()
+      ? `${API_ENDPOINTS.REPORTS.EXPORT(format)}&${query.toString()}`
+      : API_ENDPOINTS.REPORTS.EXPORT(format);
     
     const response = await fetch(`${API_BASE_URL}${endpoint}`, {
       headers: {